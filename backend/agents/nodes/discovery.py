@@ -5,6 +5,8 @@ Performs web searches using Tavily and finds potential brand URLs.
 from typing import List, Dict, Any, Union
 from models import ProspectorState, QuerySearchResults
 from .utils import get_tavily_client, normalize_url
+from services.tracing import span
+from services.resilience import resilience
 
 async def discovery_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -35,12 +37,17 @@ async def discovery_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[
                 print(f"[TAVILY] Query {i + 1}: \"{query}\"")
                 new_progress.append(f"🔎 Query {i + 1}: \"{query}\"")
                 
-                response = client.search(
-                    query=query,
-                    search_depth="advanced",
-                    max_results=30,
-                    exclude_domains=exclude_domains,
-                )
+                with span("search.tavily", query_index=i) as s:
+                    # Sync SDK: run in a worker thread, under the Tavily rate limit / circuit breaker
+                    response = await resilience.run_sync(
+                        "tavily_search",
+                        client.search,
+                        query=query,
+                        search_depth="advanced",
+                        max_results=30,
+                        exclude_domains=exclude_domains,
+                    )
+                    s.set_attribute("results", len(response.get("results", [])))
                 
                 query_results = QuerySearchResults(query_index=i, query=query, results=[])
                 for result in response.get("results", []):
@@ -2,9 +2,11 @@
 Node 1: Search Initializer
 Generates search queries and handles initial setup/cache checking.
 """
+import uuid
 from typing import List, Dict, Any, Union
 from models import ProspectorState
 from services.database import get_prospects_by_city
+from services.tracing import span
 from .utils import get_exchange_rate, convert_eur_to_usd
 
 async def initialize_search(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[str, Any]:
@@ -29,7 +31,8 @@ async def initialize_search(state: Union[ProspectorState, Dict[str, Any]]) -> Di
     print(f"[INIT] Starting intelligent search for: {target_city}, {target_country}")
     
     # 💰 CACHE CHECK
-    existing_prospects = await get_prospects_by_city(target_city, limit=100)
+    with span("db.get_prospects_by_city"):
+        existing_prospects = await get_prospects_by_city(target_city, limit=100)
     
     if len(existing_prospects) >= 10:
         return {
@@ -92,6 +95,7 @@ def create_initial_state(city: str) -> ProspectorState:
     return ProspectorState(
         target_city=city,
         target_country="USA", # Default, ideally derived later
+        search_id=uuid.uuid4().hex,
         search_queries=[],
         candidate_urls=[],
         potential_brands=[],
@@ -6,6 +6,7 @@ from typing import List, Dict, Any, Union
 from models import ProspectorState, BrandLead
 from services.database import save_prospect, get_existing_urls_for_city
 from services.vector_db import calculate_prospect_score
+from services.tracing import span
 from .utils import normalize_url
 
 async def filter_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[str, Any]:
@@ -21,7 +22,8 @@ async def filter_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[str
     if not potential_brands:
         return {"verified_brands": [], "progress": ["🎯 RESULTADO FINAL: 0 marcas encontradas"]}
     
-    existing_urls = await get_existing_urls_for_city(target_city)
+    with span("db.get_existing_urls"):
+        existing_urls = await get_existing_urls_for_city(target_city)
     new_progress.append(f"\n💾 Guardando {len(potential_brands)} marcas na base de dados...")
     
     saved_count, duplicate_count, verified_brands = 0, 0, []
@@ -59,8 +61,10 @@ async def filter_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict[str
         }
         
         try:
-            scores, similar_clients = await calculate_prospect_score(prospect_dict)
-            result = await save_prospect(prospect=prospect_dict, city=target_city, scores=scores, similar_clients=similar_clients)
+            with span("scoring.calculate_prospect_score"):
+                scores, similar_clients = await calculate_prospect_score(prospect_dict)
+            with span("db.save_prospect"):
+                result = await save_prospect(prospect=prospect_dict, city=target_city, scores=scores, similar_clients=similar_clients)
             
             if result["status"] == "saved":
                 saved_count += 1
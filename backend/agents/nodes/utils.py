@@ -1,26 +1,47 @@
 """
 Utility functions for LangGraph nodes.
 """
-from typing import List
-import re
-from urllib.parse import urlparse
+from typing import Any, Dict, List
 from langchain_openai import AzureChatOpenAI
 from tavily import TavilyClient
 from config import Config
+from services.llm_metrics import UsageCallbackHandler
+from services.url_utils import normalize_url, get_domain_from_url  # Re-exported for the nodes
 
-def get_llm() -> AzureChatOpenAI:
-    """Get Azure OpenAI LLM instance"""
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:  # Older langgraph: no custom stream events
+    get_stream_writer = None
+
+# Sampling temperature of get_llm() (part of LLM cache keys)
+LLM_TEMPERATURE = 0.3
+
+def get_llm(call_site: str = "default") -> AzureChatOpenAI:
+    """Get Azure OpenAI LLM instance (usage is recorded under `call_site`)"""
     return AzureChatOpenAI(
         azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
         api_key=Config.AZURE_OPENAI_API_KEY,
         api_version=Config.AZURE_OPENAI_API_VERSION,
         deployment_name=Config.AZURE_OPENAI_DEPLOYMENT,
-        temperature=0.3,
+        temperature=LLM_TEMPERATURE,
+        callbacks=[UsageCallbackHandler(call_site, Config.AZURE_OPENAI_DEPLOYMENT)],
     )
 
+def emit_event(event: Dict[str, Any]) -> None:
+    """Send a custom event to the workflow stream (no-op outside a streamed graph run)."""
+    if get_stream_writer is None:
+        return
+    try:
+        get_stream_writer()(event)
+    except Exception:
+        pass
+
 def get_tavily_client() -> TavilyClient:
     """Get Tavily client instance"""
-    return TavilyClient(api_key=Config.TAVILY_API_KEY)
+    client = TavilyClient(api_key=Config.TAVILY_API_KEY)
+    if Config.TAVILY_BASE_URL:
+        client.base_url = Config.TAVILY_BASE_URL
+    return client
 
 async def get_exchange_rate() -> float:
     """Fetch current EUR to USD exchange rate"""
@@ -31,32 +52,3 @@ def convert_eur_to_usd(eur: float, rate: float) -> float:
     """Convert EUR to USD"""
     return eur * rate
 
-def normalize_url(url: str) -> str:
-    """Normalize URL for comparison to detect duplicates"""
-    if not url:
-        return ""
-    
-    try:
-        normalized = url.lower().strip()
-        normalized = re.sub(r'^https?://', '', normalized)
-        normalized = re.sub(r'^www\.', '', normalized)
-        normalized = normalized.rstrip('/')
-        normalized = normalized.split('?')[0].split('#')[0]
-        return normalized
-    except Exception:
-        return url.lower().strip()
-
-def get_domain_from_url(url: str) -> str:
-    """
-    Extract base domain from URL.
-    E.g. https://www.tomjames.com/locations -> tomjames.com
-    """
-    if not url: return ""
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        if domain.startswith("www."):
-            domain = domain[4:]
-        return domain
-    except Exception:
-        return url
@@ -2,19 +2,23 @@
 Node 3: Validation Node
 Data-driven filtering using price extraction, vector similarity, and final LLM analysis.
 """
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Callable, Optional, Union
 import asyncio
-import json
-import re
 from models import ProspectorState, BrandLead, ExtractedContent
-from config import CONFECOS_LANCA_PROFILE
+from config import Config, CONFECOS_LANCA_PROFILE
 from data.premium_locations import detect_premium_location, calculate_location_score
-from .utils import get_llm, get_domain_from_url, normalize_url
+from .utils import get_llm, get_domain_from_url, normalize_url, emit_event, LLM_TEMPERATURE
 from services.content_scraper import batch_extract_content, enrich_content_with_prices
 from services.price_extractor import extract_price_from_content
 from services.vector_db import find_similar_clients
 from services.client_analysis import generate_rich_client_examples
-from services.database import is_domain_suppressed
+from services.database import filter_suppressed
+from services.relevance_filter import relevance_filter
+from services.content_condenser import condense_contents
+from services.structured_llm import array_response_format, parse_json_array, stream_json_array
+from services.llm_cache import llm_cache, content_hash
+from services.tracing import span
+from services.resilience import resilience
 
 # Limit global validation concurrency (e.g., 3 city searches at a time)
 validation_semaphore = asyncio.Semaphore(3)
@@ -35,44 +39,51 @@ async def validation_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict
         return {"potential_brands": [], "progress": ["⚠️ Nenhum resultado de busca para processar"]}
     
     try:
-        # STEP 1: Aggregate UNIQUE candidates
-        candidate_urls = []
-        unique_urls = set()
-        seen_domains = set()
-        
+        # STEP 1: Aggregate UNIQUE candidates (first URL per domain)
+        first_url_by_domain = {}
         for q in search_results:
             for r in q.results:
                 url = r.get("url")
                 if url:
-                    domain = get_domain_from_url(url)
-                    if domain not in seen_domains:
-                        # [RGPD] Suppression check
-                        if await is_domain_suppressed(domain):
-                            print(f"[RGPD] Skipping suppressed domain: {domain}")
-                            continue
-
-                        seen_domains.add(domain)
-                        norm_url = normalize_url(url)
-                        if norm_url not in unique_urls:
-                            unique_urls.add(norm_url)
-                            candidate_urls.append(url)
+                    first_url_by_domain.setdefault(get_domain_from_url(url), url)
+
+        # [RGPD] Suppression check - one in-memory batch lookup, no DB round-trips
+        with span("db.filter_suppressed", domains=len(first_url_by_domain)):
+            allowed_domains = set(await filter_suppressed(list(first_url_by_domain)))
+        for domain in first_url_by_domain:
+            if domain not in allowed_domains:
+                print(f"[RGPD] Skipping suppressed domain: {domain}")
+
+        candidate_urls = []
+        unique_urls = set()
+        for domain, url in first_url_by_domain.items():
+            # Directories/blogs are rejected on the URL alone, before scraping
+            if domain not in allowed_domains or relevance_filter.is_url_excluded(url):
+                continue
+            norm_url = normalize_url(url)
+            if norm_url not in unique_urls:
+                unique_urls.add(norm_url)
+                candidate_urls.append(url)
         
         new_progress.append(f"\n🚜 HARVEST: Processando {len(candidate_urls)} URLs únicos...")
         print(f"[VALIDATION] {len(candidate_urls)} candidates after domain/RGPD filtering.")
     
         # STEP 2: SCRAPE EVERYTHING
-        extracted_contents = await batch_extract_content(candidate_urls)
+        with span("scrape.batch_extract", urls=len(candidate_urls)):
+            extracted_contents = await batch_extract_content(candidate_urls, relevance_filter=relevance_filter)
         successful_extractions = [e for e in extracted_contents if e.content]
         new_progress.append(f"   ✅ Conteúdo extraído: {len(successful_extractions)}/{len(candidate_urls)}")
         
         # STEP 3: DATA-DRIVEN FILTERING
         new_progress.append(f"\n🛡️ DATA FILTER (Filtro Impiedoso)...")
-        keyword_filtered = filter_by_keywords(successful_extractions)
+        with span("filter.keywords", pages=len(successful_extractions)):
+            keyword_filtered = filter_by_keywords(successful_extractions)
         print(f"[VALIDATION] {len(keyword_filtered)} candidates after keyword filtering.")
         new_progress.append(f"   📉 Keyword Check: {len(keyword_filtered)} relevantes")
         
         new_progress.append(f"   🕵️ Procurando preços em {len(keyword_filtered)} sites...")
-        enriched_contents = await enrich_content_with_prices(keyword_filtered)
+        with span("prices.enrich", pages=len(keyword_filtered)):
+            enriched_contents = await enrich_content_with_prices(keyword_filtered)
         
         scored_candidates = []
         for content in enriched_contents:
@@ -80,7 +91,8 @@ async def validation_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict
             price_eur = price_info.get("avg_price", 0)
             if 0 < price_eur < 300: continue
                 
-            similar_clients = await find_similar_clients(content.content[:4000], n_results=1)
+            with span("similarity.find_similar_clients"):
+                similar_clients = await find_similar_clients(content.content[:4000], n_results=1)
             similarity_score = similar_clients[0]["similarity"] if similar_clients else 0
             
             if similarity_score < 45 and price_eur == 0: continue
@@ -95,7 +107,19 @@ async def validation_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict
         
         # STEP 4: Final AI Analysis
         new_progress.append(f"\n🧠 Análise Final (IA) de {len(final_candidates_content)} finalistas...")
-        final_selection = await select_final_candidates(final_candidates_content, price_threshold_usd, target_city)
+        prompt_contents = final_candidates_content
+        if Config.CONDENSE_CONTENT:
+            with span("condense", pages=len(final_candidates_content)):
+                prompt_contents, savings = condense_contents(
+                    final_candidates_content, Config.CONDENSED_TOKEN_BUDGET, baseline_chars=PROMPT_CONTENT_CHARS
+                )
+            new_progress.append(
+                f"   ✂️ Conteúdo condensado: {savings['original_tokens']} → {savings['digest_tokens']} tokens (-{savings['saved_ratio']:.0%})"
+            )
+        with span("selection", candidates=len(final_candidates_content), mode=Config.SELECTION_MODE):
+            final_selection = await select_final_candidates(
+                final_candidates_content, price_threshold_usd, target_city, prompt_contents=prompt_contents
+            )
         
         new_progress.append(f"   🏆 {len(final_selection)} MARCAS SELECIONADAS")
         return {
@@ -108,25 +132,55 @@ async def validation_node(state: Union[ProspectorState, Dict[str, Any]]) -> Dict
         return {"potential_brands": [], "progress": [f"❌ Erro crítico: {error}"]}
 
 def filter_by_keywords(contents: List[ExtractedContent]) -> List[ExtractedContent]:
-    """Fast directory/irrelevant site filter."""
-    pos_kw = ["suit", "fato", "jacket", "blazer", "tailor", "sartorial", "bespoke", "abito", "traje", "costume", "menswear", "moda"]
-    neg_kw = ["yelp", "tripadvisor", "directory", "pages", "list", "blog", "news", "guide", "ranking"]
-    
-    filtered = []
-    for item in contents:
-        txt = item.content.lower()[:5000]
-        if any(neg in item.url.lower() for neg in neg_kw): continue
-        score = sum(1 for kw in pos_kw if kw in txt)
-        if any(kw in txt for kw in ["suit", "tailor", "bespoke", "sartorial"]): score += 3
-        if score >= 2: filtered.append(item)
-    return filtered
-
-async def select_final_candidates(extracted_contents: List[ExtractedContent], price_threshold: float, target_city: str) -> List[BrandLead]:
-    """Analyzes and qualifies brands using LLM reasoning."""
-    llm = get_llm()
-    sites_content = "\n\n".join([f"=== CANDIDATE {i+1} ===\nURL: {e.url}\nCONTENT: {e.content[:8000]}" for i, e in enumerate(extracted_contents) if e.content])
-    
-    prompt = f"""You are the FINAL selection agent for "Confeções Lança". 
+    """Fast directory/irrelevant site filter (see services/relevance_filter.py)."""
+    return [item for item in contents if relevance_filter.evaluate(item.url, item.content)["relevant"]]
+
+# Final selection returns at most this many brands per city
+MAX_SELECTED_BRANDS = 20
+
+# Characters of each page included in the selection prompt
+PROMPT_CONTENT_CHARS = 8000
+
+
+# Selection output schema (used when Config.STRUCTURED_OUTPUT is on)
+SELECTION_OUTPUT_KEY = "brands"
+SELECTION_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "url": {"type": "string"},
+        "storeCount": {"type": "integer"},
+        "isChain": {"type": "boolean"},
+        "avgPrice": {"type": "number"},
+        "priceSource": {"type": "string", "enum": ["found", "not_public"]},
+        "priceNote": {"type": "string"},
+        "woolPercentage": {"type": "string"},
+        "madeToMeasure": {"type": "boolean"},
+        "brandStyle": {"type": "string"},
+        "businessModel": {"type": "string"},
+        "detailedDescription": {"type": "string"},
+        "storeLocations": {"type": "array", "items": {"type": "string"}},
+        "whySelected": {"type": "string"},
+        "city": {"type": "string"},
+        "country": {"type": "string"},
+        "locationQuality": {"type": "string", "enum": ["premium", "standard"]},
+        "fitScore": {"type": "integer"},
+    },
+    "additionalProperties": False,
+}
+SELECTION_ITEM_SCHEMA["required"] = list(SELECTION_ITEM_SCHEMA["properties"])
+
+
+def build_selection_prompt(
+    extracted_contents: List[ExtractedContent],
+    target_city: str,
+    max_brands: int = MAX_SELECTED_BRANDS,
+    wrap_key: Optional[str] = None,
+) -> str:
+    sites_content = "\n\n".join([f"=== CANDIDATE {i+1} ===\nURL: {e.url}\nCONTENT: {e.content[:PROMPT_CONTENT_CHARS]}" for i, e in enumerate(extracted_contents) if e.content])
+    output_rule = f'Return ONLY JSON: an object {{"{wrap_key}": [...]}} holding the array.' if wrap_key else "Return ONLY JSON."
+    
+    return f"""You are the FINAL selection agent for "Confeções Lança". 
     {CONFECOS_LANCA_PROFILE}
     
     CLIENTES REAIS DA LANÇA (Use as "Golden Profile"):
@@ -135,7 +189,7 @@ async def select_final_candidates(extracted_contents: List[ExtractedContent], pr
     CANDIDATES TO EVALUATE:
     {sites_content}
     
-    TASK: Return a JSON array of up to 20 brands that are good partnership opportunities.
+    TASK: Return a JSON array of up to {max_brands} brands that are good partnership opportunities.
     LANGUAGE: Use PORTUGUESE (PORTUGAL) for all descriptive text.
     CITY: Must have presence in {target_city}.
     
@@ -160,53 +214,227 @@ async def select_final_candidates(extracted_contents: List[ExtractedContent], pr
     - woolPercentage: Look for labels like "100% Wool", "Pure New Wool", "Super 110s/130s".
     - madeToMeasure: Is there a "Service à medida", "Bespoke", or "Custom Tailoring" option? 
     
-    Return ONLY JSON."""
+    {output_rule}"""
 
-    try:
-        response = await llm.ainvoke(prompt)
-        raw = response.content.replace("```json", "").replace("```", "").strip()
-        candidates = json.loads(raw)
+
+def selection_prompt_and_format(extracted_contents: List[ExtractedContent], target_city: str, max_brands: int = MAX_SELECTED_BRANDS):
+    """Prompt plus the response_format matching Config.STRUCTURED_OUTPUT (None when off)."""
+    response_format = array_response_format("brand_selection", SELECTION_OUTPUT_KEY, SELECTION_ITEM_SCHEMA)
+    prompt = build_selection_prompt(
+        extracted_contents, target_city, max_brands, wrap_key=SELECTION_OUTPUT_KEY if response_format else None
+    )
+    return prompt, response_format
+
+
+# Bump when the selection prompt changes, so cached selections are not reused
+SELECTION_PROMPT_VERSION = 1
+
+
+def selection_cache_parts(extracted_contents: List[ExtractedContent], target_city: str, max_brands: int) -> Dict[str, Any]:
+    """Normalized selection inputs: the candidate set (URL + content hash), city and output settings."""
+    return {
+        "prompt_version": SELECTION_PROMPT_VERSION,
+        "city": target_city.lower().strip(),
+        "max_brands": max_brands,
+        "structured_output": Config.STRUCTURED_OUTPUT,
+        "candidates": sorted(
+            [normalize_url(e.url), content_hash(e.content[:PROMPT_CONTENT_CHARS])]
+            for e in extracted_contents if e.content
+        ),
+    }
+
+
+async def stream_selection(extracted_contents: List[ExtractedContent], target_city: str, max_brands: int = MAX_SELECTED_BRANDS):
+    """
+    Yield the LLM's picks for `extracted_contents` as they are generated.
+    A cached completion for the same candidate set is replayed instead of calling the LLM.
+    """
+    cache_key = llm_cache.make_key(
+        "selection", selection_cache_parts(extracted_contents, target_city, max_brands), LLM_TEMPERATURE
+    )
+    with span("db.llm_cache_get"):
+        cached = await llm_cache.get("selection", cache_key)
+    picks = parse_json_array(cached) if cached is not None else None
+    if picks is not None:
+        print(f"[SELECTION-AGENT] Cache hit ({len(picks)} picks)")
+        for data in picks:
+            yield data
+        return
+
+    prompt, response_format = selection_prompt_and_format(extracted_contents, target_city, max_brands)
+    transcript: List[str] = []
+    with span("llm.selection", candidates=len(extracted_contents)):
+        async with resilience.guard("azure_chat"):
+            async for data in stream_json_array(get_llm("selection"), prompt, response_format, transcript=transcript):
+                yield data
+    completion = "".join(transcript)
+    # Only complete arrays are cached
+    if parse_json_array(completion) is not None:
+        with span("db.llm_cache_put"):
+            await llm_cache.put("selection", cache_key, completion)
+
+
+class BrandLeadBuilder:
+    """
+    Turns LLM picks into BrandLeads one at a time, as they stream in.
+    Picks overlapping an earlier one (same domain, or one name containing the other) are dropped.
+    """
+
+    def __init__(self, extracted_contents: List[ExtractedContent], target_city: str):
+        self.target_city = target_city
+        self.leads: List[BrandLead] = []
+        self._seen_domains, self._seen_names = set(), set()
+        self._content_by_url: Dict[str, str] = {}
+        for e in extracted_contents:
+            self._content_by_url.setdefault(e.url, e.content)
+
+    def add(self, data: Dict[str, Any]) -> Optional[BrandLead]:
+        url = data.get("url", "")
+        domain = get_domain_from_url(url)
+        name = (data.get("name") or "").lower().strip()
         
-        seen_domains, seen_names, unique_results = set(), set(), []
-        for data in candidates:
-            url = data.get("url", "")
-            domain = get_domain_from_url(url)
-            name = data.get("name", "").lower().strip()
-            
-            if not url or not domain or domain in seen_domains or any(s in name or name in s for s in seen_names):
-                continue
-            
-            seen_domains.add(domain)
-            seen_names.add(name)
-            
-            # Premium Street Detection
-            content = next((e.content for e in extracted_contents if e.url == url), "")
-            street, tier = detect_premium_location(content, target_city)
-            
-            location_quality = "premium" if street else data.get("locationQuality", "standard")
-            location_score = calculate_location_score(street, tier) if street else 0
-            
-            unique_results.append(BrandLead(
-                name=data.get("name", "Unknown"),
-                website_url=url,
-                store_count=data.get("storeCount", 1) or 1,
-                average_suit_price_usd=data.get("avgPrice", 0),
-                city=target_city,
-                origin_country=data.get("country", "International"),
-                verified=data.get("priceSource") == "found",
-                brand_style=data.get("brandStyle", "Premium"),
-                business_model=data.get("businessModel", "Retail"),
-                company_overview=data.get("whySelected", ""),
-                detailed_description=data.get("detailedDescription"),
-                store_locations=data.get("storeLocations", []),
-                location_quality=location_quality,
-                location_score=location_score,
-                fit_score=data.get("fitScore", 0),
-                wool_percentage=data.get("woolPercentage"),
-                made_to_measure=data.get("madeToMeasure", False),
-                passes_constraints=True
-            ))
-        return unique_results
+        if not url or not domain or domain in self._seen_domains or any(s in name or name in s for s in self._seen_names):
+            return None
+        
+        self._seen_domains.add(domain)
+        self._seen_names.add(name)
+        
+        # Premium Street Detection
+        content = self._content_by_url.get(url) or ""
+        street, tier = detect_premium_location(content, self.target_city)
+        
+        location_quality = "premium" if street else data.get("locationQuality", "standard")
+        location_score = calculate_location_score(street, tier) if street else 0
+        
+        lead = BrandLead(
+            name=data.get("name", "Unknown"),
+            website_url=url,
+            store_count=data.get("storeCount", 1) or 1,
+            average_suit_price_usd=data.get("avgPrice", 0),
+            city=self.target_city,
+            origin_country=data.get("country", "International"),
+            verified=data.get("priceSource") == "found",
+            brand_style=data.get("brandStyle", "Premium"),
+            business_model=data.get("businessModel", "Retail"),
+            company_overview=data.get("whySelected", ""),
+            detailed_description=data.get("detailedDescription"),
+            store_locations=data.get("storeLocations", []),
+            location_quality=location_quality,
+            location_score=location_score,
+            fit_score=data.get("fitScore", 0),
+            wool_percentage=data.get("woolPercentage"),
+            made_to_measure=data.get("madeToMeasure", False),
+            passes_constraints=True
+        )
+        self.leads.append(lead)
+        return lead
+
+
+def build_brand_leads(candidates: List[Dict[str, Any]], extracted_contents: List[ExtractedContent], target_city: str) -> List[BrandLead]:
+    """Deduplicate LLM picks (domain / name overlap) and turn them into BrandLeads."""
+    builder = BrandLeadBuilder(extracted_contents, target_city)
+    for data in candidates:
+        builder.add(data)
+    return builder.leads
+
+
+def emit_lead(lead: BrandLead) -> None:
+    """Push a selected lead to the SSE stream while the LLM is still generating."""
+    emit_event({"type": "lead", "brand": lead.model_dump(by_alias=True)})
+
+
+async def select_final_candidates(
+    extracted_contents: List[ExtractedContent],
+    price_threshold: float,
+    target_city: str,
+    prompt_contents: Optional[List[ExtractedContent]] = None,
+) -> List[BrandLead]:
+    """
+    Analyzes and qualifies brands using LLM reasoning.
+    `prompt_contents` (e.g. condensed digests) replaces the page text sent to the LLM;
+    premium street detection always uses the full `extracted_contents`.
+
+    The completion is parsed while it streams: each brand is validated, deduplicated
+    and sent to the workflow stream as soon as its JSON object closes.
+    """
+    prompt_contents = prompt_contents or extracted_contents
+    if Config.SELECTION_MODE == "map_reduce":
+        return await select_final_candidates_map_reduce(extracted_contents, target_city, prompt_contents)
+    
+    builder = BrandLeadBuilder(extracted_contents, target_city)
+    try:
+        async for data in stream_selection(prompt_contents, target_city):
+            lead = builder.add(data)
+            if lead:
+                emit_lead(lead)
     except Exception as e:
-        print(f"[SELECTION-AGENT] Error: {e}")
-        return []
+        # Leads that were complete before the failure are kept
+        print(f"[SELECTION-AGENT] Error after {len(builder.leads)} leads: {e}")
+    return builder.leads
+
+
+async def _select_batch(
+    batch: List[ExtractedContent],
+    target_city: str,
+    semaphore: asyncio.Semaphore,
+    batch_number: int,
+    on_pick: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Map step: evaluate one small batch, retrying it on its own if the call or the JSON fails.
+    `on_pick` sees every pick as soon as it is parsed (including picks of failed attempts).
+    """
+    attempts = Config.SELECTION_BATCH_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        picks = []
+        try:
+            async with semaphore:
+                async for data in stream_selection(batch, target_city, max_brands=len(batch)):
+                    picks.append(data)
+                    if on_pick:
+                        on_pick(data)
+            return picks
+        except Exception as e:
+            print(f"[SELECTION-AGENT] Batch {batch_number} attempt {attempt}/{attempts} failed: {e}")
+            if attempt < attempts:
+                await asyncio.sleep(2 ** (attempt - 1))
+    return []
+
+
+async def select_final_candidates_map_reduce(
+    extracted_contents: List[ExtractedContent],
+    target_city: str,
+    prompt_contents: Optional[List[ExtractedContent]] = None,
+) -> List[BrandLead]:
+    """
+    Map-reduce selection: small batches are evaluated in parallel (bounded by
+    Config.SELECTION_CONCURRENCY), then merged without another LLM call.
+    A failed batch only loses its own candidates.
+
+    Picks are streamed as provisional leads while the batches run; the merge
+    below decides the final list (best fit first).
+    """
+    contents = [e for e in (prompt_contents or extracted_contents) if e.content]
+    batch_size = max(1, Config.SELECTION_BATCH_SIZE)
+    batches = [contents[i:i + batch_size] for i in range(0, len(contents), batch_size)]
+    semaphore = asyncio.Semaphore(Config.SELECTION_CONCURRENCY)
+    streamed = BrandLeadBuilder(extracted_contents, target_city)
+    
+    def on_pick(data: Dict[str, Any]):
+        lead = streamed.add(data)
+        if lead:
+            emit_lead(lead)
+    
+    results = await asyncio.gather(*[
+        _select_batch(batch, target_city, semaphore, n, on_pick) for n, batch in enumerate(batches, start=1)
+    ])
+    failed = sum(1 for batch, picks in zip(batches, results) if not picks)
+    print(f"[SELECTION-AGENT] Map-reduce: {len(batches)} batches, {failed} without picks")
+    
+    # Reduce: best fit first, so deduplication keeps the strongest entry per brand
+    merged = sorted(
+        (c for picks in results for c in picks),
+        key=lambda c: c.get("fitScore") if isinstance(c.get("fitScore"), (int, float)) else 0,
+        reverse=True,
+    )
+    return build_brand_leads(merged, extracted_contents, target_city)[:MAX_SELECTED_BRANDS]
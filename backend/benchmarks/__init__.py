@@ -0,0 +1,4 @@
+"""
+Offline benchmarks: replay recorded provider responses through the real nodes.
+See benchmarks/run.py for usage.
+"""
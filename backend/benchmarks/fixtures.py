@@ -0,0 +1,275 @@
+"""
+Benchmark Fixtures
+Provider responses for one reference city, replayed by benchmarks/stubs.py.
+
+A fixture is a JSON document:
+    {
+      "city": "lisbon", "source": "synthetic" | "recorded", "seed": 7,
+      "search_queries": [...],
+      "search": {query: [{"url", "title", "content"}, ...]},   # incl. site: searches
+      "firecrawl": {url: markdown},
+      "tavily_extract": {url: raw_content},
+      "jina": {url: markdown},
+      "brands": {url: selection pick},                         # what the LLM returns per candidate
+      "embeddings": {text_hash: [floats]}                      # recorded fixtures only
+    }
+
+Recorded fixtures (python -m benchmarks.run --record <city>) are stored in
+benchmarks/fixtures/<city>.json and take precedence. Without one, a deterministic
+synthetic fixture with the same shape is generated: brand pages with and without
+prices (some only on a secondary suits page), navigation/cookie boilerplate,
+directories and blogs, off-topic pages, and a provider mix where Firecrawl misses
+about 1 page in 5 and Tavily Extract / Jina fill the gaps.
+"""
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from agents.nodes.initializer import generate_queries_from_clients
+from data.premium_locations import PREMIUM_STREETS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+REFERENCE_CITIES = ["lisbon", "milan", "london"]
+
+CITY_PROFILES: Dict[str, Dict[str, Any]] = {
+    "lisbon": {"country": "Portugal", "tld": "pt", "currency": "€", "streets": ["Rua Augusta", "Rua do Ouro", "Avenida de Roma"]},
+    "milan": {"country": "Italy", "tld": "it", "currency": "€", "streets": ["Corso Buenos Aires", "Via Torino", "Corso Vercelli"]},
+    "london": {"country": "United Kingdom", "tld": "co.uk", "currency": "£", "streets": ["Oxford Street", "High Holborn", "Upper Street"]},
+}
+
+# Page mix of a synthetic fixture
+BRAND_PAGES = 26
+DIRECTORY_PAGES = 8
+OFF_TOPIC_PAGES = 10
+RESULTS_PER_QUERY = 30
+
+_SYLLABLES = ["lan", "var", "mon", "tel", "ros", "cas", "bel", "dor", "fio", "mar", "sar", "ten", "vel", "quin", "lor", "ber"]
+_SUFFIXES = ["tailoring", "sartoria", "menswear", "atelier", "bespoke", "& sons", "uomo", "house"]
+
+
+def fixture_path(city: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{city.lower().replace(' ', '_')}.json")
+
+
+def load_fixture(city: str, synthetic: bool = False, seed: int = 7) -> Dict[str, Any]:
+    """Recorded fixture for `city` if present (unless `synthetic`), else a generated one."""
+    path = fixture_path(city)
+    if not synthetic and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return synthesize_fixture(city, seed)
+
+
+def save_fixture(fixture: Dict[str, Any]) -> str:
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = fixture_path(fixture["city"])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def empty_fixture(city: str, source: str, seed: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "city": city, "source": source, "seed": seed, "search_queries": [], "search": {},
+        "firecrawl": {}, "tavily_extract": {}, "jina": {}, "brands": {}, "embeddings": {},
+    }
+
+
+# ============================================================================
+# SYNTHETIC PAGES
+# ============================================================================
+
+def _brand_name(rng: random.Random, used: set) -> str:
+    while True:
+        name = (rng.choice(_SYLLABLES) + rng.choice(_SYLLABLES)).capitalize()
+        if name not in used:
+            used.add(name)
+            return f"{name} {rng.choice(_SUFFIXES).title()}"
+
+
+def _slug(name: str) -> str:
+    return "".join(ch for ch in name.lower() if ch.isalnum())
+
+
+def _boilerplate_head(name: str, base: str) -> str:
+    menu = ["Home", "New In", "Suits", "Jackets", "Shirts", "Accessories", "Stores", "About", "Contact"]
+    links = "\n".join(f"* [{item}]({base}/{item.lower().replace(' ', '-')})" for item in menu)
+    return f"[Skip to content]({base}/#main)\n\n{links}\n\n[Sign in]({base}/account) [Cart (0)]({base}/cart)\n\n# {name}"
+
+
+def _boilerplate_foot(name: str) -> str:
+    return (
+        "## Newsletter\n\nSubscribe to our newsletter for early access to new collections and private events.\n\n"
+        "## Customer Service\n\n* Shipping\n* Returns\n* Terms & Conditions\n* Privacy Policy\n* Cookie Settings\n\n"
+        "We use cookies to improve your experience. By continuing you accept all cookies as described in our privacy policy.\n\n"
+        f"© {name}. All rights reserved. Follow us on Instagram."
+    )
+
+
+def _suit_prices(rng: random.Random, currency: str, low: int, high: int, count: int) -> List[str]:
+    lines = []
+    for _ in range(count):
+        model = rng.choice(["Two-piece suit", "Three-piece suit", "Navy travel suit", "Grey flannel suit", "Ceremony suit"])
+        cloth = rng.choice(["Super 120s wool", "Super 130s wool", "100% wool", "wool and cashmere", "pure new wool"])
+        lines.append(f"* {model}, {cloth} — {currency}{rng.randrange(low, high, 5)}")
+    return lines
+
+
+def _brand_page(rng: random.Random, brand: Dict[str, Any], city: str, profile: Dict[str, Any], with_prices: bool) -> str:
+    base = brand["url"].rstrip("/")
+    sections = [_boilerplate_head(brand["name"], base)]
+    sections.append(
+        f"{brand['name']} has dressed the men of {city.title()} since {brand['founded']}. "
+        f"A family atelier cutting suits and jackets in our own workshop, with a made to measure service "
+        f"and fabrics from Vitale Barberis Canonico, Loro Piana and Holland & Sherry."
+    )
+    sections.append(
+        "## Our Story\n\n" + " ".join(
+            rng.choice([
+                "Every suit is cut by hand and finished with a floating canvas.",
+                "Our tailors measure each client personally at the boutique.",
+                "The heritage of the house is tailoring, not fashion.",
+                "We believe a suit should last a decade, not a season.",
+                "Craftsmanship passed down three generations of tailors.",
+            ]) for _ in range(5)
+        )
+    )
+    if with_prices:
+        sections.append("## Suits\n\n" + "\n".join(_suit_prices(rng, profile["currency"], brand["price_low"], brand["price_high"], 6)))
+    else:
+        sections.append("## Collection\n\nDiscover the new season: suits, blazers and overcoats in pure wool. Prices on request in store.")
+    sections.append("## Fabrics\n\nSuper 110s to Super 150s wool, flannel, linen and cashmere blends. Bunches available at the atelier.")
+    address = brand["street"].title()
+    sections.append(f"## Visit Us\n\nOur boutique is located at {address} {rng.randint(2, 180)}, {city.title()}. Opening hours: Monday to Saturday, 10:00 - 19:00.")
+    if brand["store_count"] > 1:
+        sections.append(f"We also welcome clients in {brand['store_count'] - 1} other stores.")
+    sections.append(_boilerplate_foot(brand["name"]))
+    return "\n\n".join(sections)
+
+
+def _suits_page(rng: random.Random, brand: Dict[str, Any], profile: Dict[str, Any]) -> str:
+    base = brand["url"].rstrip("/")
+    body = "## Suits\n\n" + "\n".join(_suit_prices(rng, profile["currency"], brand["price_low"], brand["price_high"], 10))
+    return "\n\n".join([_boilerplate_head(brand["name"], base), body, _boilerplate_foot(brand["name"])])
+
+
+def _directory_page(rng: random.Random, city: str, names: List[str]) -> str:
+    picks = rng.sample(names, min(8, len(names)))
+    entries = "\n".join(f"{i}. **{n}** — tailor, suits and alterations. ★★★★☆" for i, n in enumerate(picks, 1))
+    return f"# The best tailors in {city.title()}\n\n{entries}\n\nRead more reviews and compare prices."
+
+
+def _off_topic_page(rng: random.Random, city: str, kind: str) -> str:
+    text = {
+        "restaurant": f"Seasonal menu, wine list and terrace in the heart of {city.title()}. Book a table online.",
+        "hotel": f"Boutique hotel with 40 rooms, spa and rooftop bar in {city.title()}. Best rate guaranteed.",
+        "shoes": "Handmade leather shoes and boots. Goodyear welted, resoling service available.",
+        "watches": "Swiss watches, servicing and straps. Authorized dealer of independent watchmakers.",
+    }[kind]
+    return "\n\n".join([f"# {kind.title()} {city.title()}", text * 6, "We use cookies. Accept all. Privacy policy."])
+
+
+def _result(url: str, title: str, snippet: str) -> Dict[str, str]:
+    return {"url": url, "title": title, "content": snippet}
+
+
+# ============================================================================
+# SYNTHETIC FIXTURE
+# ============================================================================
+
+def synthesize_fixture(city: str, seed: int = 7) -> Dict[str, Any]:
+    """Deterministic fixture for `city` (same city + seed -> same fixture)."""
+    city = city.lower().strip()
+    rng = random.Random(f"{city}:{seed}")
+    profile = CITY_PROFILES.get(city, {"country": "Unknown", "tld": "com", "currency": "€", "streets": ["Main Street"]})
+    premium = [street for street, _ in PREMIUM_STREETS.get(city, [])]
+    fixture = empty_fixture(city, "synthetic", seed)
+    fixture["search_queries"] = generate_queries_from_clients(city)
+
+    results: List[Dict[str, str]] = []
+    used_names: set = set()
+    brands = []
+    for i in range(BRAND_PAGES):
+        name = _brand_name(rng, used_names)
+        price_low = rng.choice([250, 450, 600, 800, 1100])
+        brand = {
+            "name": name,
+            "url": f"https://www.{_slug(name)}.{profile['tld']}/",
+            "founded": rng.randint(1920, 2015),
+            "store_count": rng.choice([1, 1, 2, 3, 4, 6, 12, 35]),
+            "price_low": price_low,
+            "price_high": price_low + rng.choice([200, 400, 900]),
+            "street": rng.choice(premium) if premium and rng.random() < 0.4 else rng.choice(profile["streets"]),
+        }
+        brands.append(brand)
+        mode = rng.random()
+        with_prices = mode < 0.6
+        page = _brand_page(rng, brand, city, profile, with_prices)
+        _assign_provider(rng, fixture, brand["url"], page)
+        if not with_prices and mode < 0.9:
+            # Prices only on the suits page, found through the site: search
+            suits_url = brand["url"] + "suits"
+            domain = brand["url"].split("//", 1)[1].removeprefix("www.").rstrip("/")
+            fixture["search"][f'site:{domain} "suits" price'] = [_result(suits_url, f"Suits | {name}", "Suits from")]
+            _assign_provider(rng, fixture, suits_url, _suits_page(rng, brand, profile))
+        results.append(_result(brand["url"], f"{name} | Tailoring in {city.title()}", f"{name}: suits and made to measure."))
+        fixture["brands"][brand["url"]] = _brand_pick(rng, brand, city, profile, with_prices)
+
+    names = [b["name"] for b in brands]
+    for i in range(DIRECTORY_PAGES):
+        url = rng.choice([
+            f"https://www.yelp.com/search?find_desc=tailor&find_loc={city}&start={i * 10}",
+            f"https://www.timeout.com/{city}/shopping/best-tailors-in-{city}-{i}",
+            f"https://menswear-{i}.com/blog/best-suits-{city}",
+            f"https://www.tripadvisor.com/Attractions-tailors-{city}-{i}",
+        ])
+        fixture["firecrawl"][url] = _directory_page(rng, city, names)
+        results.append(_result(url, f"Best tailors in {city.title()}", "Our ranking of the best tailors."))
+
+    for i in range(OFF_TOPIC_PAGES):
+        kind = rng.choice(["restaurant", "hotel", "shoes", "watches"])
+        url = f"https://www.{kind}{_slug(rng.choice(_SYLLABLES) * 2)}{i}.{profile['tld']}/"
+        _assign_provider(rng, fixture, url, _off_topic_page(rng, city, kind))
+        results.append(_result(url, f"{kind.title()} in {city.title()}", "Visit us."))
+
+    # Spread over the queries with overlap, like real search results
+    for query in fixture["search_queries"]:
+        fixture["search"][query] = rng.sample(results, min(RESULTS_PER_QUERY, len(results)))
+    return fixture
+
+
+def _assign_provider(rng: random.Random, fixture: Dict[str, Any], url: str, page: str):
+    """Firecrawl gets ~80% of pages; misses fall back to Tavily Extract (plain text) or Jina."""
+    roll = rng.random()
+    if roll < 0.8:
+        fixture["firecrawl"][url] = page
+    elif roll < 0.9:
+        fixture["tavily_extract"][url] = " ".join(line.strip("#*[] ") for line in page.splitlines() if line.strip())
+    else:
+        fixture["jina"][url] = page
+
+
+def _brand_pick(rng: random.Random, brand: Dict[str, Any], city: str, profile: Dict[str, Any], with_prices: bool) -> Dict[str, Any]:
+    avg_price = (brand["price_low"] + brand["price_high"]) / 2
+    return {
+        "name": brand["name"],
+        "url": brand["url"],
+        "storeCount": brand["store_count"],
+        "isChain": brand["store_count"] > 5,
+        "avgPrice": avg_price if with_prices else 0,
+        "priceSource": "found" if with_prices else "not_public",
+        "priceNote": "Preço médio dos fatos na loja online" if with_prices else "Preço sob consulta",
+        "woolPercentage": rng.choice(["100% lã", "Super 120s", "Super 130s", "lã e caxemira"]),
+        "madeToMeasure": rng.random() < 0.75,
+        "brandStyle": rng.choice(["Clássico", "Contemporâneo", "Sartorial", "Premium"]),
+        "businessModel": rng.choice(["Retalho", "Atelier", "Marca própria"]),
+        "detailedDescription": f"Alfaiataria fundada em {brand['founded']} com foco em fatos de lã.",
+        "storeLocations": [brand["street"].title()],
+        "whySelected": "Posicionamento premium e serviço por medida.",
+        "city": city.title(),
+        "country": profile["country"],
+        "locationQuality": "standard",
+        "fitScore": rng.randint(40, 95),
+    }
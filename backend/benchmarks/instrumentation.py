@@ -0,0 +1,116 @@
+"""
+Benchmark Instrumentation
+DB round-trip counting and per-stage wall time / memory measurement.
+
+CountingPool wraps the asyncpg pool held by PostgresManager, so every query made
+through PostgresManager.get_pool() (nodes, services, caches, usage flushes) is
+counted without touching the code under test. One round-trip = one call of a
+query method (execute, fetch, COPY, ...); executemany counts once.
+"""
+import contextlib
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict
+
+from services.postgres import PostgresManager
+
+QUERY_METHODS = {
+    "execute", "executemany", "fetch", "fetchrow", "fetchval",
+    "copy_records_to_table", "copy_to_table", "copy_from_query",
+}
+
+
+class CountingConnection:
+    def __init__(self, conn, counter: Counter):
+        self._conn = conn
+        self._counter = counter
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._conn, name)
+        if name not in QUERY_METHODS:
+            return attribute
+
+        async def counted(*args, **kwargs):
+            self._counter[name] += 1
+            return await attribute(*args, **kwargs)
+        return counted
+
+
+class _CountingAcquire:
+    def __init__(self, acquire_context, counter: Counter):
+        self._acquire = acquire_context
+        self._counter = counter
+
+    async def __aenter__(self) -> CountingConnection:
+        self._counter["acquire"] += 1
+        return CountingConnection(await self._acquire.__aenter__(), self._counter)
+
+    async def __aexit__(self, *exc):
+        return await self._acquire.__aexit__(*exc)
+
+
+class CountingPool:
+    def __init__(self, pool):
+        self._pool = pool
+        self.counter: Counter = Counter()
+
+    def acquire(self, *args, **kwargs) -> _CountingAcquire:
+        return _CountingAcquire(self._pool.acquire(*args, **kwargs), self.counter)
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._pool, name)
+        if name not in QUERY_METHODS:
+            return attribute
+
+        async def counted(*args, **kwargs):
+            self.counter[name] += 1
+            return await attribute(*args, **kwargs)
+        return counted
+
+    def round_trips(self) -> int:
+        return sum(count for method, count in self.counter.items() if method in QUERY_METHODS)
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.counter)
+
+
+async def install_counting_pool() -> CountingPool:
+    """Wrap PostgresManager's pool (created if needed); PostgresManager.close() still works."""
+    pool = await PostgresManager.get_pool()
+    if not isinstance(pool, CountingPool):
+        pool = CountingPool(pool)
+        PostgresManager._pool = pool
+    return pool
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextlib.contextmanager
+def measure_stage(pool: CountingPool = None):
+    """
+    Yields a dict filled on exit with wall_s, db_round_trips, db_calls, peak_rss_mb
+    and, when tracemalloc is tracing, py_peak_mb (Python allocations during the stage).
+    """
+    result: Dict[str, Any] = {}
+    before = Counter(pool.counter) if pool else Counter()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["wall_s"] = round(time.perf_counter() - started, 4)
+        if pool:
+            calls = pool.counter - before
+            result["db_round_trips"] = sum(n for method, n in calls.items() if method in QUERY_METHODS)
+            result["db_calls"] = dict(calls)
+        result["peak_rss_mb"] = peak_rss_mb()
+        if tracemalloc.is_tracing():
+            result["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
@@ -0,0 +1,312 @@
+"""
+Micro-benchmarks of the CPU-side hot paths.
+
+Times price extraction, the keyword filter, premium street detection, URL
+normalization, link ranking, client profile text, the scoring functions (scalar and kernel),
+BrandLead construction / serialization, content condensation and the streaming
+JSON parser on realistic inputs: 12k-character pages (the scraper's cut-off)
+built from the benchmark fixtures.
+
+Every run is appended to a JSON history (benchmarks/history/micro.json). Each
+benchmark is compared with its latest earlier result from the same machine and
+Python version; one whose best time per item got slower than --threshold fails the run.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter price,scoring --repeat 7
+    python -m benchmarks.micro --threshold 0.05 --baseline <commit>
+    python -m benchmarks.micro --no-save            # measure and compare only
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from models import BrandLead, ExtractedContent
+from data.lanca_clients import LANCA_CLIENTS
+from data.premium_locations import detect_premium_location
+from services.price_extractor import extract_price_from_content, has_price
+from services.vector_db import (
+    generate_client_profile_text,
+    score_prospect,
+    passes_hard_filters,
+    calculate_price_score,
+    calculate_size_score,
+    calculate_wool_score,
+    calculate_mtm_score,
+)
+from services.scoring_kernel import score_prospects
+from services.content_condenser import condense_content
+from services.deep_crawler import rank_links
+from services.structured_llm import JsonArrayStreamParser
+from services.url_utils import normalize_url, get_domain_from_url
+from agents.nodes.validator import filter_by_keywords
+from benchmarks.fixtures import synthesize_fixture
+
+HISTORY_FILE = os.path.join(os.path.dirname(__file__), "history", "micro.json")
+MAX_HISTORY_RUNS = 200
+
+# Pages are cut here by the scraper (content_scraper.py)
+PAGE_CHARS = 12000
+CORPUS_CITIES = ["lisbon", "milan", "london"]
+
+
+# ============================================================================
+# INPUTS
+# ============================================================================
+
+def page_corpus(seed: int = 7) -> List[Tuple[str, str, str]]:
+    """(city, url, content) for every fixture page, padded with the city's other pages to PAGE_CHARS."""
+    corpus = []
+    for city in CORPUS_CITIES:
+        fixture = synthesize_fixture(city, seed)
+        pages = {**fixture["firecrawl"], **fixture["tavily_extract"], **fixture["jina"]}
+        filler = list(pages.values())
+        for index, (url, content) in enumerate(sorted(pages.items())):
+            parts, size = [content], len(content)
+            offset = index
+            while size < PAGE_CHARS:
+                extra = filler[offset % len(filler)]
+                parts.append(extra)
+                size += len(extra) + 2
+                offset += 7
+            corpus.append((city, url, "\n\n".join(parts)[:PAGE_CHARS]))
+    return corpus
+
+
+def prospect_inputs(picks: List[Dict[str, Any]], count: int, seed: int) -> Tuple[List[Dict], List[Optional[float]]]:
+    rng = random.Random(seed)
+    prospects, similarities = [], []
+    for i in range(count):
+        pick = picks[i % len(picks)]
+        prospects.append({
+            "name": pick["name"],
+            "avg_suit_price_eur": (pick.get("avgPrice") or 0) / 1.08,
+            "store_count": pick.get("storeCount", 1),
+            "wool_percentage": pick.get("woolPercentage"),
+            "made_to_measure": pick.get("madeToMeasure", False),
+            "country_code": rng.choice(["PT", "IT", "GB", "ES", "XX"]),
+        })
+        similarities.append(round(rng.uniform(20, 95), 2) if rng.random() > 0.05 else None)
+    return prospects, similarities
+
+
+def brand_lead_kwargs(pick: Dict[str, Any], city: str) -> Dict[str, Any]:
+    """Same mapping as BrandLeadBuilder.add."""
+    return {
+        "name": pick.get("name", "Unknown"),
+        "website_url": pick["url"],
+        "store_count": pick.get("storeCount", 1) or 1,
+        "average_suit_price_usd": pick.get("avgPrice", 0),
+        "city": city,
+        "origin_country": pick.get("country", "International"),
+        "verified": pick.get("priceSource") == "found",
+        "brand_style": pick.get("brandStyle", "Premium"),
+        "business_model": pick.get("businessModel", "Retail"),
+        "company_overview": pick.get("whySelected", ""),
+        "detailed_description": pick.get("detailedDescription"),
+        "store_locations": pick.get("storeLocations", []),
+        "location_quality": pick.get("locationQuality", "standard"),
+        "fit_score": pick.get("fitScore", 0),
+        "wool_percentage": pick.get("woolPercentage"),
+        "made_to_measure": pick.get("madeToMeasure", False),
+        "passes_constraints": True,
+    }
+
+
+def build_cases(seed: int = 7) -> Dict[str, Tuple[Callable[[], Any], int]]:
+    """name -> (callable running one batch, items per batch)."""
+    corpus = page_corpus(seed)
+    contents = [ExtractedContent(url=url, content=content) for _, url, content in corpus]
+    texts = [content for _, _, content in corpus]
+    urls = [url for _, url, _ in corpus] * 20
+
+    picks = [pick for city in CORPUS_CITIES for pick in synthesize_fixture(city, seed)["brands"].values()]
+    prospects, similarities = prospect_inputs(picks, 1000, seed)
+    similar = [[{"name": "Client", "similarity": s}] if s is not None else [] for s in similarities]
+    lead_kwargs = [brand_lead_kwargs(pick, pick["city"]) for pick in picks]
+    leads = [BrandLead(**kwargs) for kwargs in lead_kwargs]
+    completion = json.dumps(picks[:20], ensure_ascii=False, indent=1)
+    chunks = [completion[i:i + 48] for i in range(0, len(completion), 48)]
+
+    def parse_stream():
+        parser = JsonArrayStreamParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+
+    def component_scores():
+        for p in prospects:
+            passes_hard_filters(p)
+            calculate_price_score(p["avg_suit_price_eur"])
+            calculate_size_score(p["store_count"])
+            calculate_wool_score(p["wool_percentage"])
+            calculate_mtm_score(p["made_to_measure"])
+
+    return {
+        "price.extract_price_from_content": (lambda: [extract_price_from_content(t) for t in texts], len(texts)),
+        "price.has_price": (lambda: [has_price(t) for t in texts], len(texts)),
+        "filter.filter_by_keywords": (lambda: filter_by_keywords(contents), len(contents)),
+        "location.detect_premium_location": (lambda: [detect_premium_location(t, c) for c, _, t in corpus], len(corpus)),
+        "links.rank_links": (lambda: [rank_links(c.content, c.url, ("price", "stores", "fabric")) for c in contents], len(contents)),
+        "url.normalize_url": (lambda: [normalize_url(u) for u in urls], len(urls)),
+        "url.get_domain_from_url": (lambda: [get_domain_from_url(u) for u in urls], len(urls)),
+        "profile.generate_client_profile_text": (lambda: [generate_client_profile_text(c) for c in LANCA_CLIENTS], len(LANCA_CLIENTS)),
+        "scoring.component_scores": (component_scores, len(prospects)),
+        "scoring.score_prospect": (lambda: [score_prospect(p, s) for p, s in zip(prospects, similar)], len(prospects)),
+        "scoring.score_prospects_kernel": (lambda: score_prospects(prospects, similarities), len(prospects)),
+        "models.brandlead_construct": (lambda: [BrandLead(**kwargs) for kwargs in lead_kwargs], len(lead_kwargs)),
+        "models.brandlead_dump": (lambda: [lead.model_dump(by_alias=True) for lead in leads], len(leads)),
+        "condense.condense_content": (lambda: [condense_content(t) for t in texts], len(texts)),
+        "llm.json_array_stream_parser": (parse_stream, 20),
+    }
+
+
+# ============================================================================
+# MEASUREMENT & HISTORY
+# ============================================================================
+
+def measure(fn: Callable[[], Any], items: int, repeat: int) -> Dict[str, float]:
+    """Best and median time per item (µs) over `repeat` timed batches of ~0.2s."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_item = [total / number / items * 1e6 for total in timer.repeat(repeat=repeat, number=number)]
+    best = min(per_item)
+    return {
+        "best_us": round(best, 3),
+        "median_us": round(statistics.median(per_item), 3),
+        "stdev_us": round(statistics.stdev(per_item), 3) if len(per_item) > 1 else 0.0,
+        "items_per_s": round(1e6 / best, 1) if best else None,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_key() -> str:
+    """Runs are only compared with runs from the same machine and interpreter."""
+    return f"{platform.node()}|{platform.machine()}|{platform.python_implementation()} {platform.python_version()}"
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("runs", [])
+
+
+def save_history(path: str, runs: List[Dict[str, Any]]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"runs": runs[-MAX_HISTORY_RUNS:]}, f, indent=1)
+
+
+def find_baselines(runs: List[Dict[str, Any]], names: List[str], commit: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Per benchmark, the latest earlier run from this environment that measured it
+    (at `commit`, when given), so partial runs (--filter) do not hide older results.
+    """
+    key, baselines = environment_key(), {}
+    for run in reversed(runs):
+        if run.get("environment") != key or (commit is not None and run.get("commit") != commit):
+            continue
+        for name in names:
+            if name not in baselines and run["results"].get(name, {}).get("best_us"):
+                baselines[name] = {"commit": run.get("commit"), "created_at": run["created_at"], **run["results"][name]}
+    return baselines
+
+
+def compare(results: Dict[str, Dict], baselines: Dict[str, Dict[str, Any]], threshold: float) -> Tuple[Dict[str, float], List[str]]:
+    """Change of best time per benchmark (ratio) and the benchmarks slower than the threshold."""
+    changes, regressions = {}, []
+    for name, result in results.items():
+        previous = baselines.get(name)
+        if not previous:
+            continue
+        change = result["best_us"] / previous["best_us"] - 1
+        changes[name] = change
+        if change > threshold:
+            regressions.append(
+                f"{name}: {previous['best_us']:.2f} → {result['best_us']:.2f} µs/item ({change:+.0%}, vs {previous['commit'] or '?'})"
+            )
+    return changes, regressions
+
+
+def print_results(results: Dict[str, Dict], changes: Dict[str, float], baselines: Dict[str, Dict[str, Any]]):
+    commits = sorted({b["commit"] or "?" for b in baselines.values()})
+    against = f" vs {', '.join(commits)}" if commits else " (no baseline)"
+    print("\n" + "=" * 96)
+    print(f"{'BENCHMARK':<38} {'BEST µs':>10} {'MEDIAN µs':>10} {'STDEV':>8} {'ITEMS/s':>12} {'CHANGE':>9}")
+    print("-" * 96)
+    for name, r in results.items():
+        change = f"{changes[name]:+.1%}" if name in changes else "-"
+        print(f"{name:<38} {r['best_us']:>10.2f} {r['median_us']:>10.2f} {r['stdev_us']:>8.2f} {r['items_per_s']:>12,.0f} {change:>9}")
+    print("=" * 96)
+    print(f"Time per item{against}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the CPU-side hot paths.")
+    parser.add_argument("--filter", help="Comma separated name prefixes, e.g. price,scoring")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed batches per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs the baseline (0.10 = 10%%)")
+    parser.add_argument("--baseline", metavar="COMMIT", help="Compare with the latest run at this commit")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    cases = build_cases(args.seed)
+    if args.filter:
+        prefixes = tuple(p.strip() for p in args.filter.split(",") if p.strip())
+        cases = {name: case for name, case in cases.items() if name.startswith(prefixes)}
+
+    results = {}
+    for name, (fn, items) in cases.items():
+        print(f"[MICRO] {name}...")
+        results[name] = measure(fn, items, args.repeat)
+
+    runs = load_history(args.history)
+    baselines = find_baselines(runs, list(results), args.baseline)
+    changes, regressions = compare(results, baselines, args.threshold)
+    print_results(results, changes, baselines)
+
+    if not args.no_save:
+        runs.append({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "environment": environment_key(),
+            "repeat": args.repeat,
+            "results": results,
+        })
+        save_history(args.history, runs)
+        print(f"[MICRO] Run saved to {args.history}")
+
+    if regressions:
+        print(f"[MICRO] ❌ {len(regressions)} regressions (> {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,335 @@
+"""
+Offline pipeline benchmark.
+
+Replays provider fixtures (benchmarks/fixtures.py) through the real validation_node,
+filter_node and scoring functions with stubbed Tavily / Firecrawl / Jina / Azure
+clients (benchmarks/stubs.py), so runs are repeatable and need no network or API keys.
+Only a local PostgreSQL is needed (docker-compose up -d): the benchmark uses its own
+database (default lanca_leads_bench, created and migrated on first run).
+
+Per city and stage it reports wall time, throughput, DB round-trips, peak memory and
+the slowest traced steps. With --baseline it exits with status 1 when a stage got
+slower (or made more DB round-trips) than --max-regression allows.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --cities lisbon --latency zero --repeat 3
+    python -m benchmarks.run --output bench.json --baseline benchmarks/baseline.json --max-regression 0.15
+    python -m benchmarks.run --latency realistic --latency-scale 0.2 --set-latency firecrawl=4000
+    python -m benchmarks.run --record lisbon        # real providers -> benchmarks/fixtures/lisbon.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+import asyncpg
+
+from config import Config
+from services.postgres import PostgresManager
+from services.database import init_database, normalize_city
+from services.vector_db import populate_clients_database, score_prospect
+from services.scoring_kernel import score_prospects
+from services.tracing import node_trace
+from agents.nodes.initializer import create_initial_state
+from agents.nodes.discovery import discovery_node
+from agents.nodes.validator import validation_node
+from agents.nodes.persistence import filter_node
+from models import QuerySearchResults
+from benchmarks.fixtures import REFERENCE_CITIES, load_fixture, save_fixture, empty_fixture
+from benchmarks.stubs import LATENCY_PROFILES, LatencyProfile, StubProviders, RecordingProviders
+from benchmarks.instrumentation import CountingPool, install_counting_pool, measure_stage
+
+DEFAULT_DATABASE = os.getenv("BENCH_POSTGRES_DB", "lanca_leads_bench")
+
+# Wall time differences below this are noise, whatever the ratio
+MIN_WALL_REGRESSION_S = 0.05
+
+SCORING_ROWS = 20000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark of validation, persistence and scoring.")
+    parser.add_argument("--cities", default=",".join(REFERENCE_CITIES), help="Comma separated reference cities")
+    parser.add_argument("--synthetic", action="store_true", help="Ignore recorded fixtures")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of synthetic fixtures and latency jitter")
+    parser.add_argument("--latency", choices=sorted(LATENCY_PROFILES), default="realistic")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every injected delay")
+    parser.add_argument("--set-latency", action="append", default=[], metavar="OP=MS",
+                        help="Override one delay, e.g. firecrawl=4000 (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per city; the fastest run of each stage is kept")
+    parser.add_argument("--scoring-rows", type=int, default=SCORING_ROWS)
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM cache enabled (disabled by default)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also measure peak Python allocations per stage")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="Allowed slowdown ratio vs the baseline")
+    parser.add_argument("--record", metavar="CITY", help="Record a fixture for CITY with the real providers")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="PostgreSQL database used by the benchmark")
+    return parser.parse_args()
+
+
+def parse_overrides(values: List[str]) -> Dict[str, float]:
+    overrides = {}
+    for value in values:
+        operation, _, ms = value.partition("=")
+        overrides[operation.strip()] = float(ms)
+    return overrides
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+async def ensure_database(name: str):
+    """Create the benchmark database if missing, then apply the migrations."""
+    kwargs = {**PostgresManager._connection_kwargs(), "database": "postgres"}
+    conn = await asyncpg.connect(**kwargs)
+    try:
+        if not await conn.fetchval("SELECT 1 FROM pg_database WHERE datname = $1", name):
+            await conn.execute(f'CREATE DATABASE "{name}"')
+            print(f"[BENCH] Created database {name}")
+    finally:
+        await conn.close()
+    await init_database()
+
+
+async def clear_city(pool: CountingPool, city: str):
+    """Prospects saved by a previous run would turn every save into a duplicate."""
+    async with pool._pool.acquire() as conn:
+        await conn.execute("DELETE FROM prospects WHERE city = $1", normalize_city(city))
+
+
+# ============================================================================
+# STAGES
+# ============================================================================
+
+def top_steps(summary: Dict[str, Any], limit: int = 5) -> Dict[str, Dict[str, Any]]:
+    steps = list(summary.get("steps", {}).items())[:limit]
+    return {name: {"count": step["count"], "total_ms": step["total_ms"]} for name, step in steps}
+
+
+def _finish(metrics: Dict[str, Any], items: int, unit: str):
+    metrics["items"] = items
+    metrics["unit"] = unit
+    metrics["throughput"] = round(items / metrics["wall_s"], 2) if metrics["wall_s"] else None
+
+
+def _node_error(progress: List[str]) -> Optional[str]:
+    return next((line.strip() for line in progress if "❌" in line), None)
+
+
+async def run_pipeline(city: str, fixture: Dict[str, Any], providers: StubProviders, pool: CountingPool) -> Dict[str, Dict]:
+    await clear_city(pool, city)
+    search_results = [
+        QuerySearchResults(query_index=i, query=query, results=fixture["search"].get(query, []))
+        for i, query in enumerate(fixture["search_queries"])
+    ]
+    state = create_initial_state(city).model_copy(
+        update={"search_queries": fixture["search_queries"], "search_results": search_results}
+    )
+    candidates = len({r["url"] for q in search_results for r in q.results})
+    stages = {}
+
+    providers.calls.clear()
+    with measure_stage(pool) as validation, node_trace("validation", state.search_id) as summary:
+        result = await validation_node(state)
+    _finish(validation, candidates, "urls")
+    validation.update({
+        "selected": len(result.get("potential_brands", [])),
+        "error": _node_error(result.get("progress", [])),
+        "provider_calls": dict(providers.calls),
+        "steps": top_steps(summary),
+    })
+    stages["validation"] = validation
+
+    brands = result.get("potential_brands", [])
+    providers.calls.clear()
+    filter_state = {"target_city": city, "potential_brands": brands, "search_id": state.search_id}
+    with measure_stage(pool) as persistence, node_trace("filter", state.search_id) as summary:
+        saved = await filter_node(filter_state)
+    _finish(persistence, len(brands), "prospects")
+    persistence.update({
+        "saved": len(saved.get("verified_brands", [])),
+        "provider_calls": dict(providers.calls),
+        "steps": top_steps(summary),
+    })
+    stages["persistence"] = persistence
+    return stages
+
+
+def scoring_inputs(fixture: Dict[str, Any], rows: int, seed: int):
+    """Prospect dicts shaped like filter_node's, built from the fixture picks and repeated to `rows`."""
+    rng = random.Random(seed)
+    picks = list(fixture["brands"].values()) or [{"name": "Brand", "avgPrice": 800, "storeCount": 2}]
+    prospects, similarities = [], []
+    for i in range(rows):
+        pick = picks[i % len(picks)]
+        prospects.append({
+            "name": pick.get("name"),
+            "avg_suit_price_eur": (pick.get("avgPrice") or 0) / 1.08,
+            "store_count": pick.get("storeCount", 1),
+            "wool_percentage": pick.get("woolPercentage"),
+            "made_to_measure": pick.get("madeToMeasure", False),
+            "country_code": rng.choice(["PT", "IT", "GB", "ES", "XX"]),
+        })
+        similarities.append(round(rng.uniform(20, 95), 2) if rng.random() > 0.05 else None)
+    return prospects, similarities
+
+
+def run_scoring(fixture: Dict[str, Any], rows: int, seed: int) -> Dict[str, Dict]:
+    prospects, similarities = scoring_inputs(fixture, rows, seed)
+    similar = [[{"name": "Client", "similarity": s}] if s is not None else [] for s in similarities]
+
+    with measure_stage() as scalar:
+        for prospect, clients in zip(prospects, similar):
+            score_prospect(prospect, clients)
+    _finish(scalar, rows, "prospects")
+
+    with measure_stage() as kernel:
+        score_prospects(prospects, similarities)
+    _finish(kernel, rows, "prospects")
+    return {"scoring.scalar": scalar, "scoring.kernel": kernel}
+
+
+def fastest(runs: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    return {stage: min((run[stage] for run in runs), key=lambda m: m["wall_s"]) for stage in runs[0]}
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def print_report(report: Dict[str, Any]):
+    print("\n" + "=" * 96)
+    print(f"{'CITY':<10} {'STAGE':<16} {'WALL (s)':>9} {'THROUGHPUT':>18} {'DB RT':>6} {'RSS MB':>8} {'PY MB':>7}  NOTES")
+    print("-" * 96)
+    for city, stages in report["cities"].items():
+        for stage, m in stages.items():
+            throughput = f"{m['throughput']}/{m['unit'][:4]}·s" if m.get("throughput") is not None else "-"
+            notes = []
+            if "selected" in m:
+                notes.append(f"{m['selected']} selected")
+            if "saved" in m:
+                notes.append(f"{m['saved']} saved")
+            if m.get("error"):
+                notes.append(m["error"][:40])
+            print(f"{city:<10} {stage:<16} {m['wall_s']:>9.3f} {throughput:>18} {m.get('db_round_trips', '-'):>6} "
+                  f"{m['peak_rss_mb']:>8} {m.get('py_peak_mb', '-'):>7}  {', '.join(notes)}")
+            for name, step in m.get("steps", {}).items():
+                print(f"{'':<28} {name:<40} {step['count']:>5}× {step['total_ms']:>10.1f} ms")
+    print("=" * 96)
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Stages slower than baseline * (1 + max_regression), or with more DB round-trips."""
+    regressions = []
+    for city, stages in report["cities"].items():
+        for stage, m in stages.items():
+            base = baseline.get("cities", {}).get(city, {}).get(stage)
+            if not base:
+                continue
+            limit = base["wall_s"] * (1 + max_regression)
+            if m["wall_s"] > limit and m["wall_s"] - base["wall_s"] > MIN_WALL_REGRESSION_S:
+                regressions.append(f"{city}/{stage}: wall {base['wall_s']:.3f}s → {m['wall_s']:.3f}s")
+            if "db_round_trips" in m and "db_round_trips" in base:
+                if m["db_round_trips"] > base["db_round_trips"] * (1 + max_regression):
+                    regressions.append(f"{city}/{stage}: DB round-trips {base['db_round_trips']} → {m['db_round_trips']}")
+    return regressions
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+async def record(city: str):
+    """Run discovery + validation against the real providers and store what they returned."""
+    fixture = empty_fixture(city.lower().strip(), "recorded")
+    with RecordingProviders(fixture):
+        await populate_clients_database(force_refresh=True)
+        state = create_initial_state(city)
+        discovered = await discovery_node(state)
+        state = state.model_copy(update={"search_results": discovered.get("search_results", [])})
+        await validation_node(state)
+    fixture["search_queries"] = state.search_queries
+    path = save_fixture(fixture)
+    print(f"[BENCH] Recorded {len(fixture['firecrawl'])} Firecrawl / {len(fixture['tavily_extract'])} Tavily / "
+          f"{len(fixture['jina'])} Jina pages, {len(fixture['brands'])} picks -> {path}")
+
+
+async def main(args) -> int:
+    try:
+        await ensure_database(args.database)
+        if args.record:
+            await record(args.record)
+            return 0
+        return await benchmark(args)
+    finally:
+        await PostgresManager.close()
+
+
+async def benchmark(args) -> int:
+    latency = LatencyProfile(args.latency, args.latency_scale, overrides=parse_overrides(args.set_latency), seed=args.seed)
+    pool = await install_counting_pool()
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "latency": latency.describe(),
+        "llm_cache": args.cache,
+        "repeat": args.repeat,
+        "fixtures": {},
+        "cities": {},
+    }
+    for city in [c.strip().lower() for c in args.cities.split(",") if c.strip()]:
+        fixture = load_fixture(city, synthetic=args.synthetic, seed=args.seed)
+        report["fixtures"][city] = fixture["source"]
+        print(f"[BENCH] {city}: {fixture['source']} fixture, {len(fixture['brands'])} brand picks")
+        with StubProviders(fixture, latency, llm_cache=args.cache) as providers:
+            await populate_clients_database(force_refresh=True)
+            runs = [await run_pipeline(city, fixture, providers, pool) for _ in range(max(1, args.repeat))]
+            await clear_city(pool, city)
+        stages = fastest(runs)
+        stages.update(fastest([run_scoring(fixture, args.scoring_rows, args.seed) for _ in range(max(1, args.repeat))]))
+        report["cities"][city] = stages
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression)
+        if regressions:
+            print(f"[BENCH] ❌ {len(regressions)} regressions (> {args.max_regression:.0%}):")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"[BENCH] ✅ No regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.database == os.getenv("POSTGRES_DB", "lanca_leads"):
+        print(f"[BENCH] Refusing to run against the application database ({args.database}); use --database")
+        sys.exit(2)
+    # PostgresManager reads the database name when the pool is created
+    os.environ["POSTGRES_DB"] = args.database
+    Config.TRACE_EXPORTER = "none"
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    status = asyncio.run(main(args))
+    print(f"[BENCH] Done in {time.perf_counter() - started:.1f}s")
+    sys.exit(status)
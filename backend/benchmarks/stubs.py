@@ -0,0 +1,360 @@
+"""
+Provider Stubs
+Replace Tavily, Firecrawl, Jina, the Azure chat model and Azure embeddings with
+clients that answer from a fixture (benchmarks/fixtures.py) after an injected delay.
+
+- StubProviders(fixture, latency).install() patches the module attributes the
+  pipeline looks providers up from; uninstall() restores them
+- LatencyProfile: per-call delays in ms with seeded jitter; sync providers
+  (Tavily, Firecrawl) block like the real SDKs, async ones await
+- RecordingProviders wraps the real providers and fills a fixture instead
+  (python -m benchmarks.run --record <city>)
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from services.structured_llm import parse_json_array
+
+LATENCY_PROFILES: Dict[str, Dict[str, float]] = {
+    "zero": {},
+    # Typical p50 latencies seen in production logs
+    "realistic": {
+        "tavily_search": 1200,
+        "tavily_extract": 2500,
+        "firecrawl": 2000,
+        "jina": 1500,
+        "llm_first_token": 1500,
+        "llm_per_pick": 500,
+        "llm_invoke": 1800,
+        "embedding": 150,
+    },
+}
+
+EMBEDDING_DIMENSIONS = 1536
+
+# Texts with menswear vocabulary get embeddings close to the client profiles
+_MENSWEAR = re.compile(r"suit|tailor|bespoke|menswear|sartori|fato|abito|wool", re.IGNORECASE)
+_CANDIDATE_URL = re.compile(r"^URL: (\S+)$", re.MULTILINE)
+_MAX_BRANDS = re.compile(r"up to (\d+) brands")
+
+
+def text_key(text: str) -> str:
+    """Key of a text in fixture["embeddings"]."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:24]
+
+
+class LatencyProfile:
+    def __init__(self, name: str = "realistic", scale: float = 1.0, jitter: float = 0.2,
+                 overrides: Optional[Dict[str, float]] = None, seed: int = 7):
+        self.name = name
+        self.delays_ms = {**LATENCY_PROFILES[name], **(overrides or {})}
+        self.scale = scale
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+
+    def seconds(self, operation: str, factor: float = 1.0) -> float:
+        base = self.delays_ms.get(operation, 0) * factor * self.scale
+        if base <= 0:
+            return 0.0
+        return base * (1 + self._rng.uniform(-self.jitter, self.jitter)) / 1000
+
+    def describe(self) -> Dict[str, Any]:
+        return {"profile": self.name, "scale": self.scale, "jitter": self.jitter, "delays_ms": self.delays_ms}
+
+
+class _Message:
+    """Minimal chat chunk / message: stream_json_array and the explanation only read .content."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Patches:
+    def __init__(self):
+        self._saved: List[tuple] = []
+
+    def set(self, target, attribute: str, value):
+        self._saved.append((target, attribute, getattr(target, attribute)))
+        setattr(target, attribute, value)
+
+    def restore(self):
+        while self._saved:
+            target, attribute, value = self._saved.pop()
+            setattr(target, attribute, value)
+
+
+def _patch_targets():
+    """Modules that hold provider references (imported lazily so env vars can be set first)."""
+    from agents.nodes import discovery, validator
+    from services import content_scraper, vector_db
+    from services.firecrawl_service import firecrawl_service
+    return discovery, validator, content_scraper, vector_db, firecrawl_service
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class StubTavilyClient:
+    def __init__(self, providers: "StubProviders"):
+        self._providers = providers
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        self._providers.calls["tavily_search"] += 1
+        time.sleep(self._providers.latency.seconds("tavily_search"))
+        return {"query": query, "results": list(self._providers.fixture["search"].get(query, []))}
+
+    def extract(self, urls: List[str], **kwargs) -> Dict[str, Any]:
+        self._providers.calls["tavily_extract"] += 1
+        time.sleep(self._providers.latency.seconds("tavily_extract"))
+        pages = self._providers.fixture["tavily_extract"]
+        return {
+            "results": [{"url": url, "raw_content": pages[url]} for url in urls if url in pages],
+            "failed_results": [{"url": url, "error": "not found"} for url in urls if url not in pages],
+        }
+
+
+class StubFirecrawlApp:
+    def __init__(self, providers: "StubProviders"):
+        self._providers = providers
+
+    def scrape(self, url: str, formats=None, **kwargs) -> Optional[Dict[str, Any]]:
+        self._providers.calls["firecrawl"] += 1
+        time.sleep(self._providers.latency.seconds("firecrawl"))
+        markdown = self._providers.fixture["firecrawl"].get(url)
+        return {"markdown": markdown} if markdown else None
+
+
+class StubChatModel:
+    """Selection picks come from fixture["brands"] for the candidate URLs in the prompt."""
+
+    def __init__(self, providers: "StubProviders"):
+        self._providers = providers
+
+    def bind(self, **kwargs) -> "StubChatModel":
+        return self
+
+    def _selection(self, prompt: str) -> tuple:
+        brands = self._providers.fixture["brands"]
+        limit = _MAX_BRANDS.search(prompt)
+        picks = [brands[url] for url in _CANDIDATE_URL.findall(prompt) if url in brands]
+        picks = picks[:int(limit.group(1))] if limit else picks
+        payload = {"brands": picks} if "holding the array" in prompt else picks
+        return json.dumps(payload, ensure_ascii=False, indent=1), len(picks)
+
+    async def astream(self, prompt: str):
+        self._providers.calls["llm_stream"] += 1
+        latency = self._providers.latency
+        text, picks = self._selection(prompt)
+        chunks = [text[i:i + 48] for i in range(0, len(text), 48)] or [""]
+        await asyncio.sleep(latency.seconds("llm_first_token"))
+        per_chunk = latency.seconds("llm_per_pick", picks / len(chunks))
+        for chunk in chunks:
+            if per_chunk:
+                await asyncio.sleep(per_chunk)
+            yield _Message(chunk)
+
+    async def ainvoke(self, prompt: str) -> _Message:
+        self._providers.calls["llm_invoke"] += 1
+        await asyncio.sleep(self._providers.latency.seconds("llm_invoke"))
+        return _Message("Ambas são pequenas alfaiatarias premium com fatos 100% lã e serviço por medida.")
+
+
+class StubEmbeddings:
+    """Recorded vectors when the fixture has them, else deterministic hash-seeded vectors."""
+
+    def __init__(self, providers: "StubProviders"):
+        self._providers = providers
+        self._topic = np.random.default_rng(0).standard_normal(EMBEDDING_DIMENSIONS)
+
+    def _vector(self, text: str) -> List[float]:
+        key = text_key(text)
+        recorded = self._providers.fixture.get("embeddings", {}).get(key)
+        if recorded:
+            return recorded
+        noise = np.random.default_rng(int(key[:12], 16)).standard_normal(EMBEDDING_DIMENSIONS)
+        weight = 1.5 if _MENSWEAR.search(text or "") else 0.3
+        vector = weight * self._topic + noise
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self._providers.calls["embedding"] += 1
+        await asyncio.sleep(self._providers.latency.seconds("embedding"))
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._providers.calls["embedding"] += 1
+        await asyncio.sleep(self._providers.latency.seconds("embedding"))
+        return [self._vector(t) for t in texts]
+
+
+class StubProviders:
+    def __init__(self, fixture: Dict[str, Any], latency: LatencyProfile, llm_cache: bool = False):
+        self.fixture = fixture
+        self.latency = latency
+        self.llm_cache = llm_cache
+        self.calls: Counter = Counter()
+        self._patches = _Patches()
+
+    async def _jina(self, url: str, timeout: int = 30, max_length: int = 15000, relevance_filter=None) -> Dict[str, Any]:
+        self.calls["jina"] += 1
+        await asyncio.sleep(self.latency.seconds("jina"))
+        content = self.fixture["jina"].get(url)
+        if not content:
+            return {"success": False, "content": "", "error": "HTTP 404", "url": url}
+        return {"success": True, "content": content[:max_length], "title": "", "url": url}
+
+    def install(self):
+        discovery, validator, content_scraper, vector_db, firecrawl_service = _patch_targets()
+        tavily = StubTavilyClient(self)
+        chat = StubChatModel(self)
+        embeddings = StubEmbeddings(self)
+
+        self._patches.set(discovery, "get_tavily_client", lambda: tavily)
+        self._patches.set(content_scraper, "get_tavily_client", lambda: tavily)
+        self._patches.set(content_scraper, "extract_with_jina", self._jina)
+        self._patches.set(firecrawl_service, "app", StubFirecrawlApp(self))
+        self._patches.set(validator, "get_llm", lambda call_site="default": chat)
+        self._patches.set(vector_db, "AzureChatOpenAI", lambda **kwargs: chat)
+        self._patches.set(vector_db, "AzureOpenAIEmbeddings", lambda **kwargs: embeddings)
+        self._patches.set(Config, "FIRECRAWL_API_KEY", Config.FIRECRAWL_API_KEY or "bench")
+        self._patches.set(Config, "LLM_CACHE_ENABLED", Config.LLM_CACHE_ENABLED and self.llm_cache)
+        self._patches.set(Config, "FETCH_ROBOTS_TXT", False)  # Offline: no robots.txt or direct fetches
+        self._patches.set(Config, "DIRECT_FETCH_ENABLED", False)
+        return self
+
+    def uninstall(self):
+        self._patches.restore()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class _RecordingTavily:
+    def __init__(self, client, fixture: Dict[str, Any]):
+        self._client = client
+        self._fixture = fixture
+
+    def search(self, query: str, **kwargs) -> Dict[str, Any]:
+        response = self._client.search(query=query, **kwargs)
+        self._fixture["search"][query] = [
+            {"url": r.get("url", ""), "title": r.get("title", ""), "content": r.get("content", "")}
+            for r in response.get("results", [])
+        ]
+        return response
+
+    def extract(self, urls: List[str], **kwargs) -> Dict[str, Any]:
+        response = self._client.extract(urls=urls, **kwargs)
+        for result in response.get("results", []):
+            if result.get("raw_content"):
+                self._fixture["tavily_extract"][result["url"]] = result["raw_content"]
+        return response
+
+
+class _RecordingFirecrawl:
+    def __init__(self, app, fixture: Dict[str, Any]):
+        self._app = app
+        self._fixture = fixture
+
+    def scrape(self, url: str, **kwargs):
+        result = self._app.scrape(url=url, **kwargs)
+        markdown = getattr(result, "markdown", None)
+        if markdown is None and isinstance(result, dict):
+            data = result.get("data", result)
+            markdown = data.get("markdown") if isinstance(data, dict) else None
+        if markdown:
+            self._fixture["firecrawl"][url] = markdown
+        return result
+
+
+class _RecordingChat:
+    def __init__(self, llm, fixture: Dict[str, Any]):
+        self._llm = llm
+        self._fixture = fixture
+
+    def bind(self, **kwargs) -> "_RecordingChat":
+        return _RecordingChat(self._llm.bind(**kwargs), self._fixture)
+
+    async def astream(self, prompt: str):
+        parts = []
+        async for chunk in self._llm.astream(prompt):
+            parts.append(chunk.content if isinstance(chunk.content, str) else "")
+            yield chunk
+        for pick in parse_json_array("".join(parts)) or []:
+            if pick.get("url"):
+                self._fixture["brands"][pick["url"]] = pick
+
+
+class _RecordingEmbeddings:
+    def __init__(self, embeddings, fixture: Dict[str, Any]):
+        self._embeddings = embeddings
+        self._fixture = fixture
+
+    def _store(self, text: str, vector: List[float]):
+        self._fixture["embeddings"][text_key(text)] = [round(v, 6) for v in vector]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = await self._embeddings.aembed_query(text)
+        self._store(text, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = await self._embeddings.aembed_documents(texts)
+        for text, vector in zip(texts, vectors):
+            self._store(text, vector)
+        return vectors
+
+
+class RecordingProviders:
+    """Real providers, with every response copied into `fixture`."""
+
+    def __init__(self, fixture: Dict[str, Any]):
+        self.fixture = fixture
+        self._patches = _Patches()
+
+    async def _jina(self, url: str, *args, **kwargs) -> Dict[str, Any]:
+        result = await self._real_jina(url, *args, **kwargs)
+        if result.get("success") and result.get("content"):
+            self.fixture["jina"][url] = result["content"]
+        return result
+
+    def install(self):
+        discovery, validator, content_scraper, vector_db, firecrawl_service = _patch_targets()
+        fixture = self.fixture
+        get_tavily, get_llm = content_scraper.get_tavily_client, validator.get_llm
+        embeddings_cls = vector_db.AzureOpenAIEmbeddings
+        self._real_jina = content_scraper.extract_with_jina
+
+        self._patches.set(discovery, "get_tavily_client", lambda: _RecordingTavily(get_tavily(), fixture))
+        self._patches.set(content_scraper, "get_tavily_client", lambda: _RecordingTavily(get_tavily(), fixture))
+        self._patches.set(content_scraper, "extract_with_jina", self._jina)
+        self._patches.set(firecrawl_service, "app", _RecordingFirecrawl(firecrawl_service.app, fixture))
+        self._patches.set(validator, "get_llm", lambda call_site="default": _RecordingChat(get_llm(call_site), fixture))
+        self._patches.set(vector_db, "AzureOpenAIEmbeddings", lambda **kwargs: _RecordingEmbeddings(embeddings_cls(**kwargs), fixture))
+        self._patches.set(Config, "LLM_CACHE_ENABLED", False)
+        return self
+
+    def uninstall(self):
+        self._patches.restore()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
@@ -2,7 +2,11 @@
 Calculate Azure OpenAI costs per city search
 
 This script estimates the cost of running a prospect search for one city.
+Measured numbers (recorded per call in the llm_usage table) are printed with:
+    python calculate_costs.py --measured [DAYS]
 """
+import asyncio
+import sys
 
 # Azure OpenAI Pricing (as of 2024, approximate - check your Azure portal for exact prices)
 # Prices are per 1K tokens
@@ -127,6 +131,33 @@ def calculate_cost_per_search(
     return costs, total_cost
 
 
+async def print_measured_costs(days: int = 30):
+    """Per-day, per-city totals recorded by services/llm_metrics.py."""
+    from services.llm_metrics import get_daily_usage
+    from services.postgres import PostgresManager
+
+    try:
+        rows = await get_daily_usage(days)
+    finally:
+        await PostgresManager.close()
+
+    print("=" * 70)
+    print(f"Measured Azure OpenAI usage - last {days} days")
+    print("=" * 70)
+    for row in rows:
+        tokens = row["prompt_tokens"] + row["completion_tokens"]
+        per_search = row["cost_usd"] / row["searches"] if row["searches"] else 0
+        print(f"  {row['day']} {str(row['city'] or '-'):20} {row['searches']:3} searches "
+              f"{tokens:9} tokens  ${row['cost_usd']:.4f}  (${per_search:.4f}/search)")
+    if not rows:
+        print("  No usage recorded yet")
+
+
+if __name__ == "__main__" and "--measured" in sys.argv:
+    args = [a for a in sys.argv[1:] if a != "--measured"]
+    asyncio.run(print_measured_costs(int(args[0]) if args else 30))
+    sys.exit(0)
+
 if __name__ == "__main__":
     print("=" * 70)
     print("Azure OpenAI Cost Calculator - Per City Search")
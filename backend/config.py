@@ -9,18 +9,56 @@ load_dotenv()
 
 
 class Config:
+    # Mock providers for load tests (python -m mock_providers.server): when set, Tavily,
+    # Firecrawl, Jina and Azure OpenAI all point at this base URL, e.g. http://localhost:8099
+    MOCK_PROVIDERS_URL = os.getenv("MOCK_PROVIDERS_URL", "").rstrip("/") or None
+    
     # Azure OpenAI
-    AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
-    AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+    AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY") or ("mock" if MOCK_PROVIDERS_URL else None)
+    AZURE_OPENAI_ENDPOINT = f"{MOCK_PROVIDERS_URL}/azure" if MOCK_PROVIDERS_URL else os.getenv("AZURE_OPENAI_ENDPOINT")
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-    AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
+    AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT") or ("gpt-4o-mini" if MOCK_PROVIDERS_URL else None)
     AZURE_OPENAI_EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
     
-    # Tavily
-    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    # Tavily (TAVILY_BASE_URL overrides https://api.tavily.com)
+    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY") or ("mock" if MOCK_PROVIDERS_URL else None)
+    TAVILY_BASE_URL = f"{MOCK_PROVIDERS_URL}/tavily" if MOCK_PROVIDERS_URL else os.getenv("TAVILY_BASE_URL")
+    
+    # Firecrawl (FIRECRAWL_API_URL overrides the hosted API)
+    FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY") or ("mock" if MOCK_PROVIDERS_URL else None)
+    FIRECRAWL_API_URL = f"{MOCK_PROVIDERS_URL}/firecrawl" if MOCK_PROVIDERS_URL else os.getenv("FIRECRAWL_API_URL")
+    
+    # Jina Reader
+    JINA_READER_URL = f"{MOCK_PROVIDERS_URL}/jina/" if MOCK_PROVIDERS_URL else os.getenv("JINA_READER_URL", "https://r.jina.ai/")
+    JINA_API_KEY = os.getenv("JINA_API_KEY")  # Optional, raises the rate limit (20 -> 200 rpm)
+    
+    # Provider rate limits / concurrency / circuit breakers (services/resilience.py), JSON per provider,
+    # e.g. {"jina": {"rate_per_minute": 200}, "firecrawl": {"max_concurrency": 10}}
+    PROVIDER_LIMITS = os.getenv("PROVIDER_LIMITS")
     
-    # Firecrawl
-    FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
+    # Page fetches per site (services/fetch_scheduler.py): concurrency, minimum seconds between
+    # request starts, and robots.txt Crawl-delay (honoured up to FETCH_MAX_CRAWL_DELAY_S)
+    FETCH_DOMAIN_CONCURRENCY = int(os.getenv("FETCH_DOMAIN_CONCURRENCY", "2"))
+    FETCH_DOMAIN_DELAY_S = float(os.getenv("FETCH_DOMAIN_DELAY_S", "1.0"))
+    FETCH_MAX_CRAWL_DELAY_S = float(os.getenv("FETCH_MAX_CRAWL_DELAY_S", "10"))
+    FETCH_ROBOTS_TXT = os.getenv("FETCH_ROBOTS_TXT", "false" if MOCK_PROVIDERS_URL else "true").lower() == "true"
+    
+    # First-tier direct page fetch (services/direct_fetcher.py) before the paid providers;
+    # pages with less than DIRECT_FETCH_MIN_CHARS of text (JS-rendered) go to Firecrawl
+    DIRECT_FETCH_ENABLED = os.getenv("DIRECT_FETCH_ENABLED", "false" if MOCK_PROVIDERS_URL else "true").lower() == "true"
+    DIRECT_FETCH_TIMEOUT_S = float(os.getenv("DIRECT_FETCH_TIMEOUT_S", "10"))
+    DIRECT_FETCH_MAX_BYTES = int(os.getenv("DIRECT_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    DIRECT_FETCH_MIN_CHARS = int(os.getenv("DIRECT_FETCH_MIN_CHARS", "500"))
+    DIRECT_FETCH_CACHE_ENTRIES = int(os.getenv("DIRECT_FETCH_CACHE_ENTRIES", "2000"))
+    
+    # Deep price discovery: "deep_crawl" (bounded breadth-first crawl per site for prices, store count
+    # and fabric, services/deep_crawler.py) or "single_link" (one best suit/shop link per priceless page)
+    PRICE_DISCOVERY_MODE = os.getenv("PRICE_DISCOVERY_MODE", "deep_crawl")
+    DEEP_CRAWL_MAX_PAGES = int(os.getenv("DEEP_CRAWL_MAX_PAGES", "6"))
+    DEEP_CRAWL_PER_LEVEL = int(os.getenv("DEEP_CRAWL_PER_LEVEL", "3"))
+    DEEP_CRAWL_MAX_DEPTH = int(os.getenv("DEEP_CRAWL_MAX_DEPTH", "2"))
+    DEEP_CRAWL_MAX_CHARS = int(os.getenv("DEEP_CRAWL_MAX_CHARS", "60000"))
+    DEEP_CRAWL_TIME_BUDGET_S = float(os.getenv("DEEP_CRAWL_TIME_BUDGET_S", "45"))
     
     # Resend
     RESEND_API_KEY = os.getenv("RESEND_API_KEY")
@@ -34,6 +72,49 @@ class Config:
     # Database
     SYNC_DATABASE_URL = os.getenv("SYNC_DATABASE_URL")
     
+    # Keep search results / candidate URLs (as content-addressed blobs) and progress messages (as an
+    # event log) out of the LangGraph checkpoints (services/state_store.py)
+    STATE_OFFLOAD_ENABLED = os.getenv("STATE_OFFLOAD_ENABLED", "true").lower() == "true"
+    
+    # Checkpoint retention (services/checkpoint_retention.py): completed threads keep only their latest
+    # checkpoint, threads idle for CHECKPOINT_RETENTION_DAYS are deleted; runs every INTERVAL_H hours
+    CHECKPOINT_RETENTION_ENABLED = os.getenv("CHECKPOINT_RETENTION_ENABLED", "true").lower() == "true"
+    CHECKPOINT_RETENTION_DAYS = int(os.getenv("CHECKPOINT_RETENTION_DAYS", "14"))
+    CHECKPOINT_RETENTION_INTERVAL_H = float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_H", "6"))
+    CHECKPOINT_RETENTION_BATCH = int(os.getenv("CHECKPOINT_RETENTION_BATCH", "200"))
+    
+    # Price extraction: JSON of EUR rates overriding the built-in table, e.g. {"GBP": 1.18}
+    EXCHANGE_RATES_EUR = os.getenv("EXCHANGE_RATES_EUR")
+    
+    # Relevance pre-filter: extra keyword languages on top of the base set (pt, es, it, fr, de)
+    RELEVANCE_LANGUAGES = os.getenv("RELEVANCE_LANGUAGES", "")
+    
+    # Final LLM selection: "map_reduce" (parallel small batches + merge) or "single" (one prompt)
+    SELECTION_MODE = os.getenv("SELECTION_MODE", "map_reduce")
+    SELECTION_BATCH_SIZE = int(os.getenv("SELECTION_BATCH_SIZE", "5"))
+    SELECTION_CONCURRENCY = int(os.getenv("SELECTION_CONCURRENCY", "4"))
+    SELECTION_BATCH_RETRIES = int(os.getenv("SELECTION_BATCH_RETRIES", "2"))
+    # Schema-constrained selection output: "json_schema" (API 2024-08-01-preview+), "json_object" or "off"
+    STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "off").lower()
+    
+    # LLM response cache (Postgres); per call site TTL/size overrides as JSON, e.g. {"selection": {"ttl_hours": 24}}
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_SETTINGS = os.getenv("LLM_CACHE_SETTINGS")
+    
+    # LLM cost accounting: USD per 1M tokens by model prefix, e.g. {"gpt-4o": {"input": 2.5, "output": 10}}
+    LLM_PRICING = os.getenv("LLM_PRICING")
+    
+    # Workflow tracing exporter: "file" (JSON lines in TRACE_FILE), "console", "otel" or "none"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file").lower()
+    TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(os.path.dirname(__file__), "traces", "spans.jsonl"))
+    
+    # Condense candidate pages into digests before the selection LLM (token budget per page)
+    CONDENSE_CONTENT = os.getenv("CONDENSE_CONTENT", "true").lower() == "true"
+    CONDENSED_TOKEN_BUDGET = int(os.getenv("CONDENSED_TOKEN_BUDGET", "1200"))
+    
+    # Bulk imports (uploaded CSV/JSONL files are kept here until the job completes)
+    IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "uploads", "imports"))
+    
     @classmethod
     def is_langsmith_enabled(cls) -> bool:
         return cls.LANGCHAIN_TRACING_V2.lower() == "true" and cls.LANGCHAIN_API_KEY is not None
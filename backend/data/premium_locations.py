@@ -11,7 +11,9 @@ Data sourced from:
 - Industry knowledge of luxury retail districts
 """
 
-from typing import Dict, List, Tuple, Optional
+import re
+import unicodedata
+from typing import Dict, List, Pattern, Tuple, Optional
 
 # ============================================================================
 # PREMIUM STREETS DATABASE
@@ -224,9 +226,85 @@ PREMIUM_STREETS: Dict[str, List[Tuple[str, int]]] = {
 # DETECTION FUNCTIONS
 # ============================================================================
 
+class _FoldTable(dict):
+    """
+    str.translate table: lowercase + strip accents, one character in -> one out.
+    Filled lazily per code point, so folding keeps match positions valid in the original text.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        decomposed = unicodedata.normalize("NFD", char.lower())
+        folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+        if len(folded) != 1:
+            folded = char.lower() if len(char.lower()) == 1 else char
+        self[codepoint] = folded
+        return folded
+
+
+_FOLD_TABLE = _FoldTable({ord("’"): "'", ord("‘"): "'"})  # Curly apostrophes
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip accents without changing the string length ("Usaquén" -> "usaquen")."""
+    return text.translate(_FOLD_TABLE)
+
+
 def normalize_text(text: str) -> str:
-    """Normalize text for matching (lowercase, handle accents loosely)."""
-    return text.lower().strip()
+    """Normalize text for matching (lowercase, accents folded, whitespace collapsed)."""
+    return " ".join(fold_accents(text).split())
+
+
+def _street_regex(street: str) -> str:
+    """Regex for one street: words separated by any whitespace/hyphens, "ß" also as "ss"."""
+    words = re.split(r"[\s\-]+", fold_accents(street).strip())
+    return r"[\s\-]+".join(re.escape(word).replace("ß", "(?:ß|ss)") for word in words)
+
+
+def _compile_city_matcher(streets: List[Tuple[str, int]]) -> Tuple[Pattern, List[Tuple[str, int, int]]]:
+    """
+    One alternation per city, one capture group per street (longest streets first,
+    so "new bond street" wins over a shorter street starting at the same position).
+    Returns the pattern and group -> (street, tier, priority) where priority is the list order.
+    """
+    ordered = sorted(enumerate(streets), key=lambda item: -len(item[1][0]))
+    groups = [(street, tier, priority) for priority, (street, tier) in ordered]
+    alternatives = "|".join(f"({_street_regex(street)})" for street, _, _ in groups)
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)"), groups
+
+
+# Built once at import: folded city key -> (pattern, groups)
+_CITY_MATCHERS: Dict[str, Tuple[Pattern, List[Tuple[str, int, int]]]] = {
+    normalize_text(city): _compile_city_matcher(streets)
+    for city, streets in PREMIUM_STREETS.items()
+}
+
+
+def find_premium_locations(content: str, city: str) -> List[Dict]:
+    """
+    Find every premium street of `city` mentioned in `content` in a single pass.
+    Matching ignores case, accents and whitespace/hyphen differences.
+
+    Returns:
+        List of {"street", "tier", "start", "end", "text"} in order of appearance;
+        start/end are positions in the original content.
+    """
+    matcher = _CITY_MATCHERS.get(normalize_text(city))
+    if not matcher or not content:
+        return []
+    pattern, groups = matcher
+
+    hits = []
+    for match in pattern.finditer(fold_accents(content)):
+        street, tier, _ = groups[match.lastindex - 1]
+        hits.append({
+            "street": street,
+            "tier": tier,
+            "start": match.start(),
+            "end": match.end(),
+            "text": content[match.start():match.end()],
+        })
+    return hits
 
 
 def detect_premium_location(content: str, city: str) -> Tuple[Optional[str], Optional[int]]:
@@ -238,21 +316,16 @@ def detect_premium_location(content: str, city: str) -> Tuple[Optional[str], Opt
         city: The city to check for
         
     Returns:
-        Tuple of (street_name, tier) if found, or (None, None)
+        Tuple of (street_name, tier) for the best match (lowest tier, then list
+        order in PREMIUM_STREETS), or (None, None)
     """
-    city_key = normalize_text(city)
-    content_lower = normalize_text(content)
-    
-    # Check if we have data for this city
-    if city_key not in PREMIUM_STREETS:
+    hits = find_premium_locations(content, city)
+    if not hits:
         return None, None
     
-    # Search for premium streets in content
-    for street, tier in PREMIUM_STREETS[city_key]:
-        if street in content_lower:
-            return street, tier
-    
-    return None, None
+    priorities = {street: priority for street, _, priority in _CITY_MATCHERS[normalize_text(city)][1]}
+    best = min(hits, key=lambda hit: (hit["tier"], priorities[hit["street"]]))
+    return best["street"], best["tier"]
 
 
 def calculate_location_score(street_name: Optional[str], tier: Optional[int]) -> int:
@@ -284,7 +357,7 @@ def get_supported_cities() -> List[str]:
 
 def has_city_data(city: str) -> bool:
     """Check if we have premium street data for a city."""
-    return normalize_text(city) in PREMIUM_STREETS
+    return normalize_text(city) in _CITY_MATCHERS
 
 
 # ============================================================================
@@ -306,6 +379,8 @@ if __name__ == "__main__":
         ("Located in Fifth Avenue, New York", "new york"),
         ("Find us at Avenida da Liberdade 123, Lisbon", "lisbon"),
         ("Shop in our downtown location", "london"),  # Should not find
+        ("Carrera 6, Usaquen, Bogotá", "Bogotá"),
+        ("Flagship an der Friedrichstrasse 71", "berlin"),
     ]
     
     for content, city in test_cases:
@@ -6,7 +6,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from services.database import init_database
 from services.postgres import PostgresManager
-from routers import prospects, cities, analytics, workflow, email
+from services.suppression import suppression_list
+from services.llm_metrics import usage_recorder
+from services.direct_fetcher import direct_fetcher
+from services.checkpoint_retention import checkpoint_retention
+from routers import prospects, cities, analytics, workflow, email, imports, jobs
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -16,8 +20,18 @@ async def lifespan(app: FastAPI):
         print("[API] ✅ PostgreSQL database initialized")
     except Exception as e:
         print(f"[API] ❌ Database initialization failed: {e}")
+    try:
+        await suppression_list.start_listener()
+    except Exception as e:
+        print(f"[API] ⚠️ Suppression list listener unavailable: {e}")
+    usage_recorder.start()
+    checkpoint_retention.start()
     yield
     # Shutdown
+    await checkpoint_retention.stop()
+    await usage_recorder.stop()
+    await suppression_list.stop_listener()
+    await direct_fetcher.close()
     await PostgresManager.close()
     print("[API] 🛑 PostgreSQL connection pool closed")
 
@@ -41,6 +55,8 @@ app.include_router(prospects.router)
 app.include_router(cities.router)
 app.include_router(analytics.router)
 app.include_router(email.router)
+app.include_router(imports.router)
+app.include_router(jobs.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,36 @@
+-- Table for the RGPD/GDPR suppression list (domains that must never be contacted)
+CREATE TABLE IF NOT EXISTS suppression_list (
+    domain TEXT PRIMARY KEY,
+    reason TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Notify listeners (services/suppression.py) whenever the list changes.
+-- Payloads: INSERT:<domain>, DELETE:<domain>, UPDATE:<old domain>:<new domain>, TRUNCATE
+CREATE OR REPLACE FUNCTION notify_suppression_list_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('suppression_list_changed', 'TRUNCATE');
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('suppression_list_changed', 'DELETE:' || OLD.domain);
+        RETURN OLD;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        PERFORM pg_notify('suppression_list_changed', 'UPDATE:' || OLD.domain || ':' || NEW.domain);
+        RETURN NEW;
+    END IF;
+    PERFORM pg_notify('suppression_list_changed', 'INSERT:' || NEW.domain);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER suppression_list_changed
+    AFTER INSERT OR UPDATE OR DELETE ON suppression_list
+    FOR EACH ROW EXECUTE FUNCTION notify_suppression_list_changed();
+
+-- TRUNCATE fires no row triggers: listeners reload the whole list instead
+CREATE OR REPLACE TRIGGER suppression_list_truncated
+    AFTER TRUNCATE ON suppression_list
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_suppression_list_changed();
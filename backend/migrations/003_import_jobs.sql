@@ -0,0 +1,19 @@
+-- Bulk prospect imports (services/import_service.py)
+-- rows_read is the resume checkpoint: rows before it are already committed
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    source_name TEXT,
+    format TEXT NOT NULL,
+    default_city TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    rows_read INTEGER NOT NULL DEFAULT 0,
+    rows_imported INTEGER NOT NULL DEFAULT 0,
+    rows_updated INTEGER NOT NULL DEFAULT 0,
+    rows_skipped INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_jobs_created_at ON import_jobs(created_at DESC);
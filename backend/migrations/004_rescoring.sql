@@ -0,0 +1,19 @@
+-- Cached profile embedding per prospect, so rescoring does not re-embed every row
+ALTER TABLE prospects ADD COLUMN IF NOT EXISTS profile_embedding vector(1536);
+
+-- Background rescoring jobs (services/rescoring.py)
+-- last_id is the keyset checkpoint: prospects with id <= last_id are already processed
+CREATE TABLE IF NOT EXISTS rescore_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    dry_run BOOLEAN NOT NULL DEFAULT FALSE,
+    reembed BOOLEAN NOT NULL DEFAULT FALSE,
+    chunk_size INTEGER NOT NULL DEFAULT 500,
+    last_id TEXT,
+    rows_processed INTEGER NOT NULL DEFAULT 0,
+    rows_changed INTEGER NOT NULL DEFAULT 0,
+    report JSONB,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
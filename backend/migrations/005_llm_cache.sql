@@ -0,0 +1,15 @@
+-- LLM response cache (services/llm_cache.py)
+-- cache_key is a fingerprint of deployment, temperature and the normalized prompt inputs
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key TEXT PRIMARY KEY,
+    call_site TEXT NOT NULL,
+    response TEXT NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- LRU eviction per call site, TTL cleanup
+CREATE INDEX IF NOT EXISTS idx_llm_cache_call_site_last_used ON llm_cache (call_site, last_used_at DESC);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_expires_at ON llm_cache (expires_at);
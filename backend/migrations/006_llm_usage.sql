@@ -0,0 +1,23 @@
+-- Measured LLM / embedding usage per call (services/llm_metrics.py)
+-- estimated = TRUE when the provider reported no token usage and tokens were estimated from text length
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    kind TEXT NOT NULL,
+    call_site TEXT NOT NULL,
+    model TEXT,
+    city TEXT,
+    search_id TEXT,
+    thread_id TEXT,
+    node TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms DOUBLE PRECISION,
+    cost_usd DOUBLE PRECISION NOT NULL DEFAULT 0,
+    estimated BOOLEAN NOT NULL DEFAULT FALSE,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created_at ON llm_usage (created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_search_id ON llm_usage (search_id);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_city ON llm_usage (city);
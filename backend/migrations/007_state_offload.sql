@@ -0,0 +1,29 @@
+-- Large workflow payloads kept out of the LangGraph checkpoints (services/state_store.py)
+-- Content-addressed: blob_key is the SHA-256 of the JSON payload, identical payloads are stored once;
+-- payload is the zlib-compressed JSON, size_bytes its uncompressed size
+CREATE TABLE IF NOT EXISTS state_blobs (
+    blob_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload BYTEA NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_state_blobs_last_used_at ON state_blobs (last_used_at);
+
+-- Workflow progress messages, one row per message, appended by each node run
+-- (replaces the ever-growing `progress` list in the checkpointed state)
+CREATE TABLE IF NOT EXISTS workflow_events (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    thread_id TEXT,
+    search_id TEXT,
+    node TEXT,
+    kind TEXT NOT NULL DEFAULT 'progress',
+    message TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_workflow_events_search_id ON workflow_events (search_id, id);
+CREATE INDEX IF NOT EXISTS idx_workflow_events_thread_id ON workflow_events (thread_id);
+CREATE INDEX IF NOT EXISTS idx_workflow_events_created_at ON workflow_events (created_at);
@@ -0,0 +1,30 @@
+-- LangGraph threads and their status (set by services/workflow_service.py), so checkpoint retention
+-- (services/checkpoint_retention.py) can compact completed threads to their latest checkpoint
+CREATE TABLE IF NOT EXISTS workflow_threads (
+    thread_id TEXT PRIMARY KEY,
+    search_id TEXT,
+    city TEXT,
+    status TEXT NOT NULL DEFAULT 'running',  -- running / waiting_approval / completed
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    compacted_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_workflow_threads_status ON workflow_threads (status, compacted_at);
+CREATE INDEX IF NOT EXISTS idx_workflow_threads_updated_at ON workflow_threads (updated_at);
+
+-- One row per retention run: rows deleted per table and bytes reclaimed
+CREATE TABLE IF NOT EXISTS checkpoint_retention_runs (
+    id BIGSERIAL PRIMARY KEY,
+    started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    threads_compacted INTEGER NOT NULL DEFAULT 0,
+    threads_deleted INTEGER NOT NULL DEFAULT 0,
+    rows_deleted JSONB NOT NULL DEFAULT '{}'::jsonb,
+    bytes_reclaimed BIGINT NOT NULL DEFAULT 0,
+    error TEXT
+);
+
+-- Age-based pruning of the legacy checkpoint table
+CREATE INDEX IF NOT EXISTS idx_agent_checkpoints_created_at ON agent_checkpoints (created_at);
@@ -0,0 +1,4 @@
+"""
+Local stand-ins for Tavily, Firecrawl, Jina Reader and Azure OpenAI, for load tests.
+See mock_providers/server.py for usage.
+"""
@@ -0,0 +1,165 @@
+"""
+Deterministic mock content: search results, pages, embeddings and LLM replies.
+
+Everything is derived from a hash of the request (query, URL, text), so the same
+request always gets the same answer, across processes and server restarts.
+"""
+import hashlib
+import json
+import random
+import re
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+EMBEDDING_DIMENSIONS = 1536
+DOMAINS_PER_CITY = 48
+
+_SYLLABLES = ["lan", "var", "mon", "tel", "ros", "cas", "bel", "dor", "fio", "mar", "sar", "ten", "vel", "quin", "lor", "ber"]
+_MENSWEAR = re.compile(r"suit|tailor|bespoke|menswear|sartori|fato|abito|wool", re.IGNORECASE)
+_CANDIDATE_URL = re.compile(r"^URL: (\S+)$", re.MULTILINE)
+_MAX_BRANDS = re.compile(r"up to (\d+) brands")
+_TOPIC = np.random.default_rng(0).standard_normal(EMBEDDING_DIMENSIONS)
+
+
+def seeded(*parts: Any) -> random.Random:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _word(rng: random.Random) -> str:
+    return (rng.choice(_SYLLABLES) + rng.choice(_SYLLABLES)).capitalize()
+
+
+# ============================================================================
+# SEARCH & PAGES
+# ============================================================================
+
+def _site_kind(domain: str) -> str:
+    if domain.startswith(("yelp.", "tripadvisor.")):
+        return "directory"
+    roll = seeded("kind", domain).random()
+    return "tailor" if roll < 0.75 else "other"
+
+
+def city_domains(city: str) -> List[str]:
+    """The sites a city's searches can return (stable, so queries overlap like real ones)."""
+    rng = seeded("city", city)
+    slug = re.sub(r"[^a-z]", "", city.lower()) or "city"
+    domains = []
+    for i in range(DOMAINS_PER_CITY):
+        if i % 12 == 0:
+            domains.append(rng.choice(["yelp.com", "tripadvisor.com"]))
+        else:
+            domains.append(f"{_word(rng).lower()}{slug}{i}.example")
+    return domains
+
+
+def search_results(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+    query = query.strip()
+    if query.startswith("site:"):
+        domain = query.split()[0][len("site:"):]
+        return [{"url": f"https://{domain}/suits", "title": "Suits", "content": "Suits from the collection.", "score": 0.9}]
+
+    city = query.split()[0] if query else "city"
+    rng = seeded("search", query)
+    domains = city_domains(city)
+    picked = rng.sample(domains, min(max_results, len(domains)))
+    results = []
+    for domain in picked:
+        path = f"search?find_desc=tailor&find_loc={city}&n={rng.randint(0, 99)}" if _site_kind(domain) == "directory" else ""
+        results.append({
+            "url": f"https://www.{domain}/{path}",
+            "title": f"{domain.split('.')[0].title()} | {city.title()}",
+            "content": "Tailoring, suits and made to measure.",
+            "score": round(rng.uniform(0.4, 0.95), 3),
+        })
+    return results
+
+
+def page_markdown(url: str) -> str:
+    domain = re.sub(r"^https?://(www\.)?", "", url).split("/")[0]
+    kind = _site_kind(domain)
+    rng = seeded("page", url)
+    name = f"{domain.split('.')[0][:8].title()} Tailoring"
+    menu = "\n".join(f"* [{item}](https://{domain}/{item.lower()})" for item in ["Suits", "Jackets", "Stores", "About", "Cart"])
+    footer = "## Newsletter\n\nSubscribe to our newsletter.\n\nWe use cookies. Accept all. Privacy policy. © All rights reserved."
+
+    if kind == "directory":
+        entries = "\n".join(f"{i}. **{_word(rng)} Tailors** — suits and alterations ★★★★☆" for i in range(1, 11))
+        return f"# Best tailors\n\n{entries}\n\n{footer}"
+    if kind == "other":
+        text = "Seasonal menu, wine list and terrace. Book a table online. " * 8
+        return f"# {name.replace('Tailoring', 'Bistro')}\n\n{text}\n\n{footer}"
+
+    sections = [menu, f"# {name}", (
+        f"{name} has cut suits and jackets in its own workshop since {rng.randint(1920, 2015)}. "
+        "Made to measure service with fabrics from Vitale Barberis Canonico and Loro Piana. "
+    ) * 3]
+    if url.rstrip("/").endswith("/suits") or rng.random() < 0.6:
+        low = rng.choice([250, 450, 600, 800, 1100])
+        prices = "\n".join(f"* {rng.choice(['Two-piece', 'Three-piece', 'Flannel'])} suit, Super 120s wool — €{rng.randrange(low, low + 600, 5)}" for _ in range(8))
+        sections.append(f"## Suits\n\n{prices}")
+    else:
+        sections.append("## Collection\n\nSuits, blazers and overcoats in pure wool. Prices on request.")
+    sections.append(f"## Visit Us\n\nOur boutique is open Monday to Saturday, 10:00 - 19:00. {rng.randint(1, 12)} stores.")
+    sections.append(footer)
+    return "\n\n".join(sections)
+
+
+def page_text(url: str) -> str:
+    """Plain-text rendering (Tavily Extract raw_content)."""
+    return " ".join(line.strip("#*[]() ") for line in page_markdown(url).splitlines() if line.strip())
+
+
+# ============================================================================
+# AZURE OPENAI
+# ============================================================================
+
+def embedding(item: Union[str, List[int]]) -> List[float]:
+    """Hash-seeded unit vector; menswear texts (and tokenized inputs) lean towards a shared topic."""
+    key = item if isinstance(item, str) else json.dumps(item)
+    noise = np.random.default_rng(seeded("embedding", key).getrandbits(63)).standard_normal(EMBEDDING_DIMENSIONS)
+    topical = not isinstance(item, str) or _MENSWEAR.search(item)
+    vector = (1.5 if topical else 0.3) * _TOPIC + noise
+    return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+
+def _selection_pick(url: str, city: str) -> Dict[str, Any]:
+    rng = seeded("pick", url)
+    domain = re.sub(r"^https?://(www\.)?", "", url).split("/")[0]
+    priced = rng.random() < 0.7
+    return {
+        "name": f"{domain.split('.')[0][:8].title()} Tailoring",
+        "url": url,
+        "storeCount": rng.choice([1, 1, 2, 3, 5, 12]),
+        "isChain": False,
+        "avgPrice": rng.randrange(450, 1500, 5) if priced else 0,
+        "priceSource": "found" if priced else "not_public",
+        "priceNote": "Preço médio dos fatos",
+        "woolPercentage": rng.choice(["100% lã", "Super 120s"]),
+        "madeToMeasure": rng.random() < 0.75,
+        "brandStyle": rng.choice(["Clássico", "Contemporâneo", "Sartorial"]),
+        "businessModel": rng.choice(["Retalho", "Atelier"]),
+        "detailedDescription": "Alfaiataria com foco em fatos de lã.",
+        "storeLocations": [],
+        "whySelected": "Posicionamento premium e serviço por medida.",
+        "city": city,
+        "country": "Portugal",
+        "locationQuality": "standard",
+        "fitScore": rng.randint(40, 95),
+    }
+
+
+def chat_reply(prompt: str) -> str:
+    """Selection prompts get a JSON array of picks; anything else a short explanation."""
+    urls = _CANDIDATE_URL.findall(prompt)
+    if not urls:
+        return "Ambas são pequenas alfaiatarias premium com fatos 100% lã e serviço por medida."
+    city = re.search(r"CITY: Must have presence in (.+)\.", prompt)
+    limit = _MAX_BRANDS.search(prompt)
+    rng = seeded("selection", *urls)
+    picks = [_selection_pick(url, city.group(1) if city else "") for url in urls if rng.random() < 0.6]
+    picks = picks[:int(limit.group(1))] if limit else picks
+    payload = {"brands": picks} if "holding the array" in prompt else picks
+    return json.dumps(payload, ensure_ascii=False, indent=1)
@@ -0,0 +1,393 @@
+"""
+Mock Provider Server
+One aiohttp app that stands in for Tavily, Firecrawl, Jina Reader and Azure OpenAI,
+so the API can be load-tested at real concurrency without quotas or cost.
+
+- Latency per provider is drawn from a lognormal distribution (median + sigma);
+  chat completions stream with a first-token delay and a tokens/s rate
+- Error rates (HTTP 500), random 429s and per-provider rate limits (token bucket,
+  429 with Retry-After) are configurable per provider
+- Content is deterministic (mock_providers/content.py): the same query / URL / text
+  always gets the same results, page, embedding or selection
+- GET /_mock/stats shows requests, status codes and served latency percentiles;
+  POST /_mock/config changes settings at runtime; POST /_mock/reset clears stats
+
+Usage:
+    python -m mock_providers.server --port 8099
+    python -m mock_providers.server --set firecrawl.error_rate=0.1 --set chat.rps=5 --latency-scale 0.5
+    MOCK_PROVIDERS_URL=http://localhost:8099 uvicorn main:app --port 8000
+    python scripts/load_test.py --users 20 --duration 120
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+from aiohttp import web
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from mock_providers import content
+
+# Latency in ms (lognormal: median, sigma), error / throttle rates, rate limit (0 = none),
+# miss_rate = pages the provider cannot fetch
+DEFAULT_SETTINGS: Dict[str, Dict[str, float]] = {
+    "tavily_search": {"median_ms": 1200, "sigma": 0.4, "error_rate": 0.01, "throttle_rate": 0.0, "rps": 0},
+    "tavily_extract": {"median_ms": 2500, "sigma": 0.5, "error_rate": 0.01, "throttle_rate": 0.0, "rps": 0, "miss_rate": 0.3},
+    "firecrawl": {"median_ms": 2000, "sigma": 0.6, "error_rate": 0.02, "throttle_rate": 0.0, "rps": 0, "miss_rate": 0.2},
+    "jina": {"median_ms": 1500, "sigma": 0.5, "error_rate": 0.02, "throttle_rate": 0.0, "rps": 0, "miss_rate": 0.1},
+    "chat": {"median_ms": 900, "sigma": 0.4, "error_rate": 0.01, "throttle_rate": 0.0, "rps": 0, "tokens_per_s": 80},
+    "embeddings": {"median_ms": 120, "sigma": 0.3, "error_rate": 0.0, "throttle_rate": 0.0, "rps": 0},
+}
+
+# Characters per streamed chat chunk (~4 tokens)
+CHUNK_CHARS = 16
+CHARS_PER_TOKEN = 4
+# Served latencies kept per provider for /_mock/stats
+LATENCY_WINDOW = 5000
+
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class MockState:
+    def __init__(self, seed: int = 7, latency_scale: float = 1.0, overrides: Optional[Dict[str, Dict[str, float]]] = None):
+        self.settings = {name: dict(values) for name, values in DEFAULT_SETTINGS.items()}
+        self.latency_scale = latency_scale
+        self.rng = random.Random(seed)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.update(overrides or {})
+        self.reset()
+
+    def update(self, overrides: Dict[str, Dict[str, float]]):
+        for provider, values in overrides.items():
+            if provider not in self.settings:
+                raise ValueError(f"Unknown provider: {provider}")
+            self.settings[provider].update({key: float(value) for key, value in values.items()})
+        self.buckets = {
+            name: TokenBucket(values["rps"]) for name, values in self.settings.items() if values.get("rps", 0) > 0
+        }
+
+    def reset(self):
+        self.requests: Counter = Counter()
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.in_flight: Counter = Counter()
+        self.peak_in_flight: Counter = Counter()
+        self.started = time.time()
+
+    def delay(self, provider: str) -> float:
+        s = self.settings[provider]
+        ms = s["median_ms"] * math.exp(self.rng.gauss(0, s["sigma"])) if s["median_ms"] > 0 else 0
+        return ms * self.latency_scale / 1000
+
+    def chance(self, provider: str, key: str) -> bool:
+        return self.rng.random() < self.settings[provider].get(key, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        providers = {}
+        for name in self.settings:
+            served = sorted(self.latencies[name])
+            providers[name] = {
+                "requests": self.requests[name],
+                "statuses": dict(self.statuses[name]),
+                "in_flight": self.in_flight[name],
+                "peak_in_flight": self.peak_in_flight[name],
+                "latency_ms": {
+                    f"p{p}": round(served[min(len(served) - 1, int(len(served) * p / 100))], 1) for p in (50, 95, 99)
+                } if served else {},
+            }
+        return {"uptime_s": round(time.time() - self.started, 1), "providers": providers, "settings": self.settings}
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    return web.json_response({"error": {"code": str(status), "message": message}}, status=status, headers=headers)
+
+
+class ProviderCall:
+    """
+    Admission (rate limit, random 429 / 500) plus the provider latency and bookkeeping.
+        async with ProviderCall(state, "firecrawl") as call:
+            if call.rejection: return call.rejection
+    """
+
+    def __init__(self, state: MockState, provider: str, sleep: bool = True):
+        self.state = state
+        self.provider = provider
+        self.sleep = sleep
+        self.rejection: Optional[web.Response] = None
+        self.status = 200
+
+    async def __aenter__(self) -> "ProviderCall":
+        state, provider = self.state, self.provider
+        self.started = time.perf_counter()
+        state.requests[provider] += 1
+        state.in_flight[provider] += 1
+        state.peak_in_flight[provider] = max(state.peak_in_flight[provider], state.in_flight[provider])
+
+        bucket = state.buckets.get(provider)
+        if (bucket and not bucket.take()) or state.chance(provider, "throttle_rate"):
+            self.status = 429
+            self.rejection = _error(429, "Rate limit exceeded", {"Retry-After": "1"})
+            return self
+        if self.sleep:
+            await asyncio.sleep(state.delay(provider))
+        if state.chance(provider, "error_rate"):
+            self.status = 500
+            self.rejection = _error(500, "Internal server error (mock)")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        state = self.state
+        state.in_flight[self.provider] -= 1
+        state.statuses[self.provider][500 if exc_type else self.status] += 1
+        state.latencies[self.provider].append((time.perf_counter() - self.started) * 1000)
+
+
+# ============================================================================
+# TAVILY
+# ============================================================================
+
+async def tavily_search(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    async with ProviderCall(state, "tavily_search") as call:
+        if call.rejection:
+            return call.rejection
+        query = body.get("query", "")
+        results = content.search_results(query, int(body.get("max_results", 5)))
+        return web.json_response({"query": query, "results": results, "response_time": 0.0})
+
+
+async def tavily_extract(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    urls = body.get("urls") or []
+    urls = [urls] if isinstance(urls, str) else urls
+    async with ProviderCall(state, "tavily_extract") as call:
+        if call.rejection:
+            return call.rejection
+        results, failed = [], []
+        for url in urls:
+            if content.seeded("tavily_miss", url).random() < state.settings["tavily_extract"]["miss_rate"]:
+                failed.append({"url": url, "error": "Failed to fetch url"})
+            else:
+                results.append({"url": url, "raw_content": content.page_text(url)})
+        return web.json_response({"results": results, "failed_results": failed, "response_time": 0.0})
+
+
+# ============================================================================
+# FIRECRAWL & JINA
+# ============================================================================
+
+async def firecrawl_scrape(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    url = body.get("url", "")
+    async with ProviderCall(state, "firecrawl") as call:
+        if call.rejection:
+            return call.rejection
+        if content.seeded("firecrawl_miss", url).random() < state.settings["firecrawl"]["miss_rate"]:
+            call.status = 408
+            return web.json_response({"success": False, "error": "Request timed out"}, status=408)
+        return web.json_response({
+            "success": True,
+            "data": {"markdown": content.page_markdown(url), "metadata": {"sourceURL": url, "statusCode": 200}},
+        })
+
+
+async def jina_read(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    url = request.match_info["target"]
+    if request.query_string:
+        url = f"{url}?{request.query_string}"
+    async with ProviderCall(state, "jina") as call:
+        if call.rejection:
+            return call.rejection
+        if content.seeded("jina_miss", url).random() < state.settings["jina"]["miss_rate"]:
+            call.status = 422
+            return _error(422, "Failed to fetch target")
+        return web.Response(text=content.page_markdown(url), content_type="text/markdown")
+
+
+# ============================================================================
+# AZURE OPENAI
+# ============================================================================
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        text = message.get("content")
+        if isinstance(text, list):
+            text = " ".join(p.get("text", "") for p in text if isinstance(p, dict))
+        parts.append(text or "")
+    return "\n".join(parts)
+
+
+def _usage(prompt: str, completion: str) -> Dict[str, int]:
+    prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+    completion_tokens = len(completion) // CHARS_PER_TOKEN
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    deployment = request.match_info["deployment"]
+    prompt = _prompt_text(body)
+    reply = content.chat_reply(prompt)
+    completion_id = f"chatcmpl-mock{content.seeded(prompt).getrandbits(48):x}"
+
+    async with ProviderCall(state, "chat") as call:
+        if call.rejection:
+            return call.rejection
+        if not body.get("stream"):
+            return web.json_response({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": _usage(prompt, reply),
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        seconds_per_chunk = CHUNK_CHARS / CHARS_PER_TOKEN / max(1.0, state.settings["chat"]["tokens_per_s"]) * state.latency_scale
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, usage=None) -> bytes:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": deployment,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        await response.write(chunk({"role": "assistant", "content": ""}))
+        for i in range(0, len(reply), CHUNK_CHARS):
+            await asyncio.sleep(seconds_per_chunk)
+            await response.write(chunk({"content": reply[i:i + CHUNK_CHARS]}))
+        await response.write(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await response.write(chunk({}, usage=_usage(prompt, reply)))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+async def embeddings(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    body = await request.json()
+    inputs = body.get("input", [])
+    # A single string, a list of strings, one token array or a list of token arrays
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    async with ProviderCall(state, "embeddings") as call:
+        if call.rejection:
+            return call.rejection
+        data = []
+        for index, item in enumerate(inputs):
+            vector = content.embedding(item)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        tokens = sum(len(i) // CHARS_PER_TOKEN if isinstance(i, str) else len(i) for i in inputs)
+        return web.json_response({
+            "object": "list", "data": data, "model": request.match_info["deployment"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+
+# ============================================================================
+# ADMIN & APP
+# ============================================================================
+
+async def get_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app["state"].stats())
+
+
+async def post_config(request: web.Request) -> web.Response:
+    state: MockState = request.app["state"]
+    try:
+        state.update(await request.json())
+    except (ValueError, TypeError, AttributeError) as e:
+        return _error(400, str(e))
+    return web.json_response(state.settings)
+
+
+async def post_reset(request: web.Request) -> web.Response:
+    request.app["state"].reset()
+    return web.json_response({"status": "reset"})
+
+
+def create_app(state: Optional[MockState] = None) -> web.Application:
+    app = web.Application(client_max_size=32 * 1024 * 1024)
+    app["state"] = state or MockState()
+    app.router.add_post("/tavily/search", tavily_search)
+    app.router.add_post("/tavily/extract", tavily_extract)
+    app.router.add_post("/firecrawl/v1/scrape", firecrawl_scrape)
+    app.router.add_post("/firecrawl/v2/scrape", firecrawl_scrape)
+    app.router.add_get("/jina/{target:.+}", jina_read)
+    app.router.add_post("/azure/openai/deployments/{deployment}/chat/completions", chat_completions)
+    app.router.add_post("/azure/openai/deployments/{deployment}/embeddings", embeddings)
+    app.router.add_get("/_mock/stats", get_stats)
+    app.router.add_post("/_mock/config", post_config)
+    app.router.add_post("/_mock/reset", post_reset)
+    return app
+
+
+def parse_overrides(values) -> Dict[str, Dict[str, float]]:
+    """--set provider.key=value entries as {provider: {key: value}}."""
+    overrides: Dict[str, Dict[str, float]] = defaultdict(dict)
+    for value in values:
+        key, _, number = value.partition("=")
+        provider, _, setting = key.partition(".")
+        overrides[provider.strip()][setting.strip()] = float(number)
+    return dict(overrides)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock Tavily / Firecrawl / Jina / Azure OpenAI server for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=7, help="Seed of latency, error and throttle draws")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Multiply every latency")
+    parser.add_argument("--profile", help="JSON file of setting overrides, {provider: {key: value}}")
+    parser.add_argument("--set", action="append", default=[], metavar="PROVIDER.KEY=VALUE",
+                        help=f"Override one setting (providers: {', '.join(DEFAULT_SETTINGS)})")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    overrides: Dict[str, Dict[str, float]] = {}
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+    for provider, values in parse_overrides(args.set).items():
+        overrides.setdefault(provider, {}).update(values)
+
+    print(f"[MOCK] Providers on http://{args.host}:{args.port} (latency x{args.latency_scale})")
+    print(f"[MOCK] Point the API at it with MOCK_PROVIDERS_URL=http://{args.host}:{args.port}")
+    web.run_app(create_app(MockState(args.seed, args.latency_scale, overrides)), host=args.host, port=args.port, print=None)
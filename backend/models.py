@@ -46,6 +46,13 @@ class PriceRange(str, Enum):
     NO_PRICE = "no_price"
 
 
+class ExportFormat(str, Enum):
+    """Formats supported by the bulk prospect export"""
+    CSV = "csv"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
 class StoreSize(str, Enum):
     """Store size categories"""
     ALL = "all"
@@ -228,6 +235,7 @@ class ProspectorState(BaseModel):
     """State for the prospecting agent workflow"""
     target_city: str
     target_country: str = "USA"
+    search_id: Optional[str] = None  # One id per search run (LLM usage attribution)
     search_queries: List[str] = Field(default_factory=list)
     candidate_urls: List[str] = Field(default_factory=list)
     potential_brands: List[BrandLead] = Field(default_factory=list)
@@ -1 +1 @@
-from . import prospects, cities, analytics, workflow, email
+from . import prospects, cities, analytics, workflow, email, imports, jobs
@@ -1,8 +1,21 @@
 """
 Router for Analytics & Dashboards
 """
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Query
+from models import ProspectorConfig
 from services.database import get_dashboard_stats, get_price_analysis, get_prospects_filtered
+from services.what_if import simulate_scoring
+from services.relevance_filter import relevance_filter
+from services.content_condenser import get_condensation_stats
+from services.llm_cache import llm_cache
+from services.resilience import resilience
+from services.fetch_scheduler import fetch_scheduler
+from services.deep_crawler import get_deep_crawl_stats
+from services.direct_fetcher import direct_fetcher
+from services.state_store import state_store
+from services.checkpoint_retention import checkpoint_retention
+from services.llm_metrics import usage_recorder, get_search_usage, get_search_usage_detail, get_daily_usage
 
 router = APIRouter(prefix="/api", tags=["analytics"])
 
@@ -27,3 +40,82 @@ async def store_analytics():
             "medium": medium["total_count"]
         }
     }
+
+@router.post("/analytics/what-if")
+async def what_if_scoring(
+    config: ProspectorConfig,
+    top_n: int = Query(25, ge=1, le=500),
+):
+    """
+    Rescore all stored prospects in memory with an alternative config (nothing is written).
+    Only the fields sent in the body are applied, e.g. {"min_price_eur": 450, "ideal_max_stores": 6}.
+    """
+    return await simulate_scoring(config, top_n=top_n)
+
+@router.get("/analytics/relevance-filter")
+async def relevance_filter_stats():
+    """Per-keyword hit counts of the candidate pre-filter (since startup), for tuning."""
+    return relevance_filter.stats()
+
+@router.get("/analytics/condensation")
+async def condensation_stats():
+    """LLM input tokens saved by condensing candidate pages (since startup)."""
+    return get_condensation_stats()
+
+@router.get("/analytics/llm-cache")
+async def llm_cache_stats():
+    """LLM response cache: hit rate since startup and stored entries per call site."""
+    return await llm_cache.stats()
+
+@router.delete("/analytics/llm-cache")
+async def clear_llm_cache(call_site: Optional[str] = Query(None)):
+    """Drop cached LLM responses (all, or one call site)."""
+    return {"deleted": await llm_cache.clear(call_site)}
+
+@router.get("/analytics/providers")
+async def provider_stats():
+    """Per external provider: calls, 429s, failures, concurrency limit, circuit state and latency (since startup)."""
+    return resilience.stats()
+
+@router.get("/analytics/fetch-scheduler")
+async def fetch_scheduler_stats():
+    """Per-site fetch queue: URLs waiting for their domain, in flight, busiest domains, robots.txt delays."""
+    return fetch_scheduler.stats()
+
+@router.get("/analytics/direct-fetch")
+async def direct_fetch_stats():
+    """First-tier direct fetches: share served without a paid provider, outcomes, protocols (since startup)."""
+    return direct_fetcher.stats()
+
+@router.get("/analytics/state-store")
+async def state_store_stats():
+    """Workflow payloads kept out of the LangGraph checkpoints: blobs written / reused, event log size."""
+    return await state_store.stats()
+
+@router.get("/analytics/checkpoints")
+async def checkpoint_stats():
+    """LangGraph checkpoint tables: sizes, workflow threads per status and the latest retention runs."""
+    return await checkpoint_retention.stats()
+
+@router.get("/analytics/deep-crawl")
+async def deep_crawl_stats():
+    """Deep price discovery: pages per site, signals found (price / stores / fabric) and stop reasons."""
+    return get_deep_crawl_stats()
+
+@router.get("/analytics/llm-usage/searches")
+async def llm_usage_by_search(city: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    """Measured tokens, cost and latency per search (most recent first)."""
+    await usage_recorder.flush()
+    return await get_search_usage(city, limit)
+
+@router.get("/analytics/llm-usage/searches/{search_id}")
+async def llm_usage_for_search(search_id: str):
+    """One search broken down by graph node, call site and model."""
+    await usage_recorder.flush()
+    return await get_search_usage_detail(search_id)
+
+@router.get("/analytics/llm-usage/daily")
+async def llm_usage_by_day(days: int = Query(30, ge=1, le=365), by_city: bool = True):
+    """Measured tokens, cost and latency per day (and city)."""
+    await usage_recorder.flush()
+    return await get_daily_usage(days, by_city)
@@ -0,0 +1,51 @@
+"""
+Router for Bulk Prospect Imports
+"""
+from typing import Optional
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from services.import_service import (
+    SUPPORTED_FORMATS,
+    create_import_job,
+    detect_format,
+    get_import_job,
+    list_import_jobs,
+    save_upload,
+    start_import_job,
+)
+
+router = APIRouter(prefix="/api/imports", tags=["imports"])
+
+@router.post("")
+async def upload_import(
+    file: UploadFile = File(...),
+    city: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+):
+    fmt = format or detect_format(file.filename)
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato não suportado: {fmt}")
+    
+    path = await save_upload(file, file.filename)
+    job = await create_import_job(path, source_name=file.filename, fmt=fmt, default_city=city)
+    start_import_job(job["id"])
+    return {"success": True, "job": job}
+
+@router.get("")
+async def list_imports(limit: int = 20):
+    return {"jobs": await list_import_jobs(limit)}
+
+@router.get("/{job_id}")
+async def import_status(job_id: str):
+    job = await get_import_job(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return job
+
+@router.post("/{job_id}/resume")
+async def resume_import(job_id: str):
+    job = await get_import_job(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Importação não encontrada")
+    if job["status"] == "completed":
+        return {"success": True, "message": "Importação já concluída", "job": job}
+    if not start_import_job(job_id):
+        raise HTTPException(status_code=409, detail="Importação já em curso")
+    return {"success": True, "message": f"Importação retomada na linha {job['rows_read']}"}
@@ -0,0 +1,44 @@
+"""
+Router for Background Maintenance Jobs
+"""
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from services.rescoring import create_rescore_job, get_rescore_job, start_rescore_job, DEFAULT_CHUNK_SIZE
+from services.checkpoint_retention import checkpoint_retention
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+class RescoreRequest(BaseModel):
+    dry_run: bool = False
+    reembed: bool = Field(False, description="Recompute profile embeddings even when cached")
+    chunk_size: int = Field(DEFAULT_CHUNK_SIZE, ge=50, le=5000)
+
+@router.post("/rescore")
+async def start_rescore(request: RescoreRequest):
+    job = await create_rescore_job(request.dry_run, request.reembed, request.chunk_size)
+    start_rescore_job(job["id"])
+    return {"success": True, "job": job}
+
+@router.get("/rescore/{job_id}")
+async def rescore_status(job_id: str):
+    job = await get_rescore_job(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@router.post("/rescore/{job_id}/resume")
+async def resume_rescore(job_id: str):
+    job = await get_rescore_job(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job["status"] == "completed":
+        return {"success": True, "message": "Job já concluído", "job": job}
+    if not start_rescore_job(job_id):
+        raise HTTPException(status_code=409, detail="Job já em curso")
+    return {"success": True, "message": f"Job retomado após {job['rows_processed']} prospects"}
+
+@router.post("/checkpoint-retention")
+async def run_checkpoint_retention():
+    """Compact completed workflow threads and delete expired ones now (normally runs in the background)."""
+    report = await checkpoint_retention.run()
+    if report.get("skipped"):
+        raise HTTPException(status_code=409, detail="Limpeza de checkpoints já em curso")
+    return {"success": not report.get("error"), "report": report}
@@ -3,10 +3,11 @@ Router for Prospect Management
 """
 from typing import Optional, List, Dict
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from models import (
     ProspectFilters, ProspectStatus, SortField, SortOrder, 
-    PriceRange, StoreSize
+    PriceRange, StoreSize, ExportFormat
 )
 from services.database import (
     get_prospects_by_city,
@@ -16,6 +17,7 @@ from services.database import (
     get_prospects_filtered,
     get_filter_options,
 )
+from services.export_service import stream_prospects_export, is_format_available, MEDIA_TYPES
 
 router = APIRouter(prefix="/api/prospects", tags=["prospects"])
 
@@ -68,6 +70,16 @@ async def filter_prospects_post(filters: ProspectFilters):
         limit=filters.limit, offset=filters.offset
     )
 
+@router.post("/export")
+async def export_prospects(filters: ProspectFilters, format: ExportFormat = Query(ExportFormat.CSV)):
+    if not is_format_available(format):
+        raise HTTPException(status_code=400, detail="Exportação Parquet indisponível (pyarrow não instalado)")
+    return StreamingResponse(
+        stream_prospects_export(filters, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="prospects.{format.value}"'},
+    )
+
 @router.get("/filters/options")
 async def get_filter_options_endpoint():
     options = await get_filter_options()
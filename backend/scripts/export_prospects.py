@@ -0,0 +1,66 @@
+"""
+Export prospects to CSV, JSONL or Parquet from the command line.
+
+Usage:
+    python scripts/export_prospects.py --format parquet --output prospects.parquet --min-score 60
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from models import ExportFormat, ProspectFilters
+from services.postgres import PostgresManager
+from services.export_service import stream_prospects_export, is_format_available
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream a filtered prospect export to a file.")
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], default="csv")
+    parser.add_argument("--output", help="Output path (defaults to prospects.<format>)")
+    parser.add_argument("--city")
+    parser.add_argument("--country")
+    parser.add_argument("--country-code")
+    parser.add_argument("--status")
+    parser.add_argument("--min-stores", type=int)
+    parser.add_argument("--max-stores", type=int)
+    parser.add_argument("--min-price", type=float)
+    parser.add_argument("--max-price", type=float)
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--sort-by", default="final_score")
+    parser.add_argument("--sort-order", default="desc")
+    return parser.parse_args()
+
+
+async def export(args):
+    fmt = ExportFormat(args.format)
+    if not is_format_available(fmt):
+        print("❌ Parquet export requires pyarrow ('pip install pyarrow')")
+        return
+
+    filters = ProspectFilters(
+        city=args.city, country=args.country, country_code=args.country_code,
+        status=args.status, min_stores=args.min_stores, max_stores=args.max_stores,
+        min_price=args.min_price, max_price=args.max_price,
+        min_score=args.min_score, max_score=args.max_score,
+        sort_by=args.sort_by, sort_order=args.sort_order,
+    )
+    output = args.output or f"prospects.{fmt.value}"
+
+    written = 0
+    try:
+        with open(output, "wb") as f:
+            async for chunk in stream_prospects_export(filters, fmt):
+                f.write(chunk)
+                written += len(chunk)
+        print(f"✅ Wrote {written / 1024:.1f} KB to {output}")
+    finally:
+        await PostgresManager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(export(parse_args()))
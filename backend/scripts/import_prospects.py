@@ -0,0 +1,53 @@
+"""
+Import an external prospect list (CSV/JSONL) from the command line.
+
+Usage:
+    python scripts/import_prospects.py leads.csv --city lisbon
+    python scripts/import_prospects.py --resume <job_id>
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.postgres import PostgresManager
+from services.llm_metrics import llm_attribution, usage_recorder
+from services.database import init_database
+from services.import_service import create_import_job, run_import_job, SUPPORTED_FORMATS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk import prospects from CSV/JSONL.")
+    parser.add_argument("path", nargs="?", help="CSV or JSONL file to import")
+    parser.add_argument("--city", help="City for rows without a city column")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--resume", metavar="JOB_ID", help="Resume an interrupted import job")
+    return parser.parse_args()
+
+
+async def main(args):
+    try:
+        await init_database()
+        if args.resume:
+            job_id = args.resume
+        elif args.path:
+            job = await create_import_job(os.path.abspath(args.path), fmt=args.format, default_city=args.city)
+            job_id = job["id"]
+            print(f"📥 Created import job {job_id} (resume with --resume {job_id})")
+        else:
+            print("❌ Provide a file path or --resume JOB_ID")
+            return
+
+        with llm_attribution(node="import_job"):
+            job = await run_import_job(job_id)
+        print(f"✅ {job['rows_imported']} new, {job['rows_updated']} updated, {job['rows_skipped']} skipped")
+    finally:
+        await usage_recorder.flush()
+        await PostgresManager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,197 @@
+"""
+Load test for the API: concurrent prospect searches (SSE) plus prospect list reads.
+
+Run the API against the mock providers first (see mock_providers/server.py):
+    python -m mock_providers.server --port 8099
+    MOCK_PROVIDERS_URL=http://localhost:8099 uvicorn main:app --port 8000
+
+Each search user loops: POST /api/prospect (new city, force_refresh) until the
+workflow waits for approval, then (with --full) resumes discovery and persistence,
+reading every SSE event. Reader users call GET /api/prospects meanwhile; their
+latency under search load is what exposes event-loop blocking and pool exhaustion.
+
+Reports p50 / p90 / p95 / p99 / max latency per operation, error counts and, for
+SSE streams, time to first event and the longest gap between events.
+
+Usage:
+    python scripts/load_test.py --users 10 --readers 5 --duration 60
+    python scripts/load_test.py --users 30 --readers 10 --duration 180 --full --output load.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import aiohttp
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.started = time.perf_counter()
+
+    def ok(self, operation: str, seconds: float):
+        self.latencies[operation].append(seconds * 1000)
+
+    def error(self, operation: str, reason: str):
+        self.errors[operation][reason[:80]] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        elapsed = time.perf_counter() - self.started
+        result = {}
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[operation])
+            errors = sum(self.errors[operation].values())
+            row = {"count": len(values), "errors": errors, "per_s": round(len(values) / elapsed, 2) if elapsed else 0}
+            if values:
+                for p in PERCENTILES:
+                    row[f"p{p}_ms"] = round(values[min(len(values) - 1, int(len(values) * p / 100))], 1)
+                row["max_ms"] = round(values[-1], 1)
+            if errors:
+                row["error_reasons"] = dict(self.errors[operation].most_common(5))
+            result[operation] = row
+        return result
+
+
+def print_summary(summary: Dict[str, Dict], elapsed: float):
+    print("\n" + "=" * 110)
+    print(f"{'OPERATION':<34} {'COUNT':>7} {'ERR':>5} {'/s':>7} " + " ".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f" {'max':>9}")
+    print("-" * 110)
+    for operation, row in summary.items():
+        cells = " ".join(f"{row.get(f'p{p}_ms', 0):>9.0f}" for p in PERCENTILES)
+        print(f"{operation:<34} {row['count']:>7} {row['errors']:>5} {row['per_s']:>7} {cells} {row.get('max_ms', 0):>9.0f}")
+        for reason, count in row.get("error_reasons", {}).items():
+            print(f"{'':<36}{count}× {reason}")
+    print("=" * 110)
+    print(f"Latencies in ms, {elapsed:.0f}s run")
+
+
+# ============================================================================
+# SSE
+# ============================================================================
+
+async def stream_events(session: aiohttp.ClientSession, url: str, payload: Dict, recorder: Recorder, operation: str) -> Optional[Dict]:
+    """POST and read the SSE stream to the end. Returns the last event (complete / waiting_approval / error)."""
+    started = time.perf_counter()
+    last_event_at, max_gap, first, last, leads = started, 0.0, None, None, 0
+    try:
+        async with session.post(url, json=payload) as response:
+            if response.status != 200:
+                recorder.error(operation, f"HTTP {response.status}")
+                return None
+            async for raw in response.content:
+                line = raw.decode("utf-8", errors="replace").strip()
+                if not line.startswith("data: "):
+                    continue
+                now = time.perf_counter()
+                if first is None:
+                    first = now - started
+                else:
+                    max_gap = max(max_gap, now - last_event_at)
+                last_event_at = now
+                event = json.loads(line[len("data: "):])
+                if event.get("type") == "lead":
+                    leads += 1
+                    if leads == 1:
+                        recorder.ok(f"{operation}.first_lead", now - started)
+                last = event
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        recorder.error(operation, f"{type(e).__name__}: {e}")
+        return None
+
+    if first is not None:
+        recorder.ok(f"{operation}.first_event", first)
+        recorder.ok(f"{operation}.max_event_gap", max_gap)
+    if last is None or last.get("type") == "error":
+        recorder.error(operation, (last or {}).get("message", "stream ended without events"))
+        return last
+    recorder.ok(operation, time.perf_counter() - started)
+    return last
+
+
+# ============================================================================
+# USERS
+# ============================================================================
+
+async def search_user(user: int, args, session: aiohttp.ClientSession, recorder: Recorder, deadline: float):
+    iteration = 0
+    while time.perf_counter() < deadline:
+        iteration += 1
+        city = f"{args.city_prefix} {user}-{iteration}"
+        event = await stream_events(
+            session, f"{args.base_url}/api/prospect", {"city": city, "force_refresh": True}, recorder, "prospect.start"
+        )
+        for node in ("discovery", "persistence"):
+            if not args.full or not event or event.get("type") != "waiting_approval":
+                break
+            payload = {"thread_id": event["thread_id"], "action": "approve", "node": node, "data": {}}
+            event = await stream_events(session, f"{args.base_url}/api/prospect/resume", payload, recorder, f"prospect.{node}")
+        if args.think_time:
+            await asyncio.sleep(random.uniform(0, 2 * args.think_time))
+
+
+async def reader_user(args, session: aiohttp.ClientSession, recorder: Recorder, deadline: float):
+    sort_fields = ["final_score", "discovered_at", "avg_suit_price_eur", "store_count"]
+    while time.perf_counter() < deadline:
+        params = {"limit": 25, "offset": random.choice([0, 0, 25, 50]), "sort_by": random.choice(sort_fields)}
+        started = time.perf_counter()
+        try:
+            async with session.get(f"{args.base_url}/api/prospects", params=params) as response:
+                await response.read()
+                if response.status == 200:
+                    recorder.ok("prospects.list", time.perf_counter() - started)
+                else:
+                    recorder.error("prospects.list", f"HTTP {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            recorder.error("prospects.list", f"{type(e).__name__}: {e}")
+        await asyncio.sleep(args.read_interval)
+
+
+async def main(args) -> Dict:
+    recorder = Recorder()
+    timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+    connector = aiohttp.TCPConnector(limit=args.users + args.readers + 10)
+    # Large SSE events (complete with all brands) exceed the default line buffer
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector, read_bufsize=2 ** 22) as session:
+        deadline = time.perf_counter() + args.duration
+        tasks = []
+        for user in range(args.users):
+            tasks.append(asyncio.create_task(search_user(user, args, session, recorder, deadline)))
+            await asyncio.sleep(args.ramp_up / max(1, args.users))
+        tasks += [asyncio.create_task(reader_user(args, session, recorder, deadline)) for _ in range(args.readers)]
+        print(f"[LOAD] {args.users} search users, {args.readers} readers, {args.duration}s against {args.base_url}")
+        await asyncio.gather(*tasks)
+    return recorder.summary()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test /api/prospect (SSE) and /api/prospects.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent search users")
+    parser.add_argument("--readers", type=int, default=5, help="Concurrent prospect list readers")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds before users stop starting new requests")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which search users are started")
+    parser.add_argument("--full", action="store_true", help="Also resume discovery and persistence after each start")
+    parser.add_argument("--think-time", type=float, default=0, help="Mean pause between a user's searches (s)")
+    parser.add_argument("--read-interval", type=float, default=0.2, help="Pause between a reader's requests (s)")
+    parser.add_argument("--request-timeout", type=float, default=600)
+    parser.add_argument("--city-prefix", default="loadtest", help="Searched cities are '<prefix> <user>-<n>'")
+    parser.add_argument("--output", help="Write the summary as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    summary = asyncio.run(main(args))
+    print_summary(summary, time.perf_counter() - started)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "operations": summary}, f, indent=2)
+        print(f"[LOAD] Summary written to {args.output}")
@@ -0,0 +1,52 @@
+"""
+Recompute stored prospect scores (e.g. after changing thresholds in vector_db.py).
+
+Usage:
+    python scripts/rescore_prospects.py --dry-run
+    python scripts/rescore_prospects.py --chunk-size 1000
+    python scripts/rescore_prospects.py --resume <job_id>
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.postgres import PostgresManager
+from services.llm_metrics import llm_attribution, usage_recorder
+from services.database import init_database
+from services.rescoring import create_rescore_job, run_rescore_job, DEFAULT_CHUNK_SIZE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rescore all prospects in resumable chunks.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the score distribution diff without writing")
+    parser.add_argument("--reembed", action="store_true", help="Recompute cached profile embeddings")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--resume", metavar="JOB_ID", help="Resume an interrupted rescoring job")
+    return parser.parse_args()
+
+
+async def main(args):
+    try:
+        await init_database()
+        if args.resume:
+            job_id = args.resume
+        else:
+            job = await create_rescore_job(args.dry_run, args.reembed, args.chunk_size)
+            job_id = job["id"]
+            print(f"🔁 Created rescore job {job_id} (resume with --resume {job_id})")
+
+        with llm_attribution(node="rescore_job"):
+            job = await run_rescore_job(job_id)
+        print(json.dumps(job["summary"], indent=2))
+    finally:
+        await usage_recorder.flush()
+        await PostgresManager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
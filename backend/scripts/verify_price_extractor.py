@@ -0,0 +1,55 @@
+"""
+Regression check: price extraction on known page snippets, and has_price agreeing with it.
+
+Every case lists the expected average price in EUR (0 when no suit price should be found);
+has_price must be True exactly when extract_price_from_content finds a price.
+
+Usage:
+    python scripts/verify_price_extractor.py
+"""
+import os
+import sys
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from services.price_extractor import extract_price_from_content, has_price
+
+CASES = [
+    # Keyword mentions with the currency after / before the amount, thousands separators
+    ("Suits from 899€", 899),
+    ("Suit price: 1.250 EUR", 1250),
+    ("Our suits starting at 1,200 EUR", 1200),
+    ("Fatos a partir de €1.490", 1490),
+    ("Price: $1,080", 1000),
+    # Plain currency amounts
+    ("Two-piece suit 899 €", 899),
+    ("Tailored suit €1.299,00", 1299),
+    ("Wool suit £600", 702),
+    # No convertible suit price
+    ("Price: 899", 0),
+    ("Free shipping from 50€", 0),
+    ("Since 1985, from Lisbon", 0),
+    ("", 0),
+]
+
+
+def main() -> int:
+    failures = 0
+    for text, expected in CASES:
+        result = extract_price_from_content(text)
+        found = has_price(text)
+        ok = round(result["avg_price"]) == expected and found == (result["avg_price"] > 0)
+        if not ok:
+            failures += 1
+        print(f"{'✅' if ok else '❌'} {text!r}: avg_price={result['avg_price']:.0f} (expected {expected}), has_price={found}")
+
+    if failures:
+        print(f"❌ {failures} of {len(CASES)} cases failed")
+        return 1
+    print(f"✅ All {len(CASES)} cases pass")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Property check: the columnar scoring kernel must match vector_db.score_prospect exactly.
+
+Generates random prospects (including text prices/store counts, missing values and
+threshold edge cases) and compares every breakdown field and the final score.
+
+Usage:
+    python scripts/verify_scoring_kernel.py --cases 50000 --seed 7
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from data.lanca_clients import MARKET_STRENGTH_STATIC
+from services.vector_db import score_prospect
+from services.scoring_kernel import score_prospects
+
+EDGE_PRICES = [0, 374.99, 375, 499.99, 500, 799.99, 800, 1500]
+EDGE_STORES = [0, 1, 4, 5, 10, 11, 20, 21, 30, 31, 120]
+WOOL_VALUES = ["100% wool", "100% lã", "wool blend", "Lã merino", "cotton", "unknown", "", "80% Wool", None]
+MTM_VALUES = [True, False, None, "true", "False", "TRUE", "yes", 1, 0]
+
+
+def random_price(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.3:
+        return rng.choice(EDGE_PRICES)
+    if kind < 0.4:
+        return rng.choice(["650", "1200.50", "n/a", "", "1.299"])
+    if kind < 0.5:
+        return rng.randint(0, 3000)
+    return round(rng.uniform(0, 3000), rng.choice([0, 1, 2]))
+
+
+def random_stores(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.choice(EDGE_STORES)
+    if kind < 0.5:
+        return rng.choice(["3", "12", "many", "", "40"])
+    return rng.randint(0, 60)
+
+
+def random_prospect(rng: random.Random) -> dict:
+    return {
+        "name": "Prospect",
+        "avg_suit_price_eur": random_price(rng),
+        "store_count": random_stores(rng),
+        "wool_percentage": rng.choice(WOOL_VALUES),
+        "made_to_measure": rng.choice(MTM_VALUES),
+        "country_code": rng.choice(list(MARKET_STRENGTH_STATIC) + ["XX", "FR", None]),
+    }
+
+
+def random_similar_clients(rng: random.Random) -> list:
+    if rng.random() < 0.1:
+        return []
+    similarity = rng.choice([round(rng.uniform(0, 100), 2), 100.0, 99.99, 50.05])
+    return [{"name": "Client", "similarity": similarity}]
+
+
+def main(cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    prospects = [random_prospect(rng) for _ in range(cases)]
+    similar = [random_similar_clients(rng) for _ in range(cases)]
+
+    started = time.perf_counter()
+    expected = [score_prospect(p, s) for p, s in zip(prospects, similar)]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = score_prospects(prospects, [s[0]["similarity"] if s else None for s in similar])
+    kernel_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for i, scores in enumerate(expected):
+        checks = {
+            "final_score": (scores["final_score"], float(result["final_score"][i])),
+            "passes_hard_filters": (scores["passes_hard_filters"], bool(result["passes_hard_filters"][i])),
+            "rejection_reason": (scores["rejection_reason"], result["rejection_reason"][i]),
+        }
+        for key, value in scores["breakdown"].items():
+            checks[key] = (value, result[key][i].item())
+        for key, (want, got) in checks.items():
+            if want != got:
+                mismatches += 1
+                if mismatches <= 20:
+                    print(f"❌ case {i} {key}: scalar={want!r} kernel={got!r} input={prospects[i]} similar={similar[i]}")
+
+    print(f"Scalar: {scalar_seconds * 1000:.1f} ms | Kernel: {kernel_seconds * 1000:.1f} ms ({cases} prospects)")
+    if mismatches:
+        print(f"❌ {mismatches} mismatching fields")
+        return 1
+    print("✅ Kernel matches score_prospect on every case")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    sys.exit(main(args.cases, args.seed))
@@ -0,0 +1,100 @@
+"""
+Round-trip check: the what-if baseline must reproduce the stored final_score.
+
+Builds prospects the way agents/nodes/persistence.py does, scores them with
+vector_db.score_prospect, turns them into `prospects` rows with build_prospect_record
+and loads those rows into a what-if snapshot. The baseline must truncate to the
+stored final_score, and simulating with an empty ProspectorConfig must change nothing.
+
+Usage:
+    python scripts/verify_what_if.py --cases 20000 --seed 7
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+from data.lanca_clients import MARKET_STRENGTH_STATIC
+from models import ProspectorConfig
+from services.database import PROSPECT_COLUMNS, build_prospect_record
+from services.vector_db import score_prospect
+from services import what_if
+
+EDGE_PRICES_USD = [0, 300, 404.99, 405, 540, 863.99, 864, 1620]
+EDGE_STORES = [0, 1, 4, 5, 10, 11, 20, 21, 30, 31, 120]
+WOOL_VALUES = ["100% wool", "wool blend", "80% Wool", "cotton", None]
+
+
+def random_prospect_dict(rng: random.Random, index: int) -> dict:
+    """A prospect dict shaped like the one persistence.py scores and saves."""
+    wool = rng.choice(WOOL_VALUES)
+    price_usd = rng.choice(EDGE_PRICES_USD) if rng.random() < 0.4 else round(rng.uniform(0, 3000), 2)
+    return {
+        "name": f"Prospect {index}",
+        "website_url": f"https://prospect{index}.com",
+        "city": "Lisboa",
+        "country": "Portugal",
+        "country_code": rng.choice(list(MARKET_STRENGTH_STATIC) + ["XX", "FR"]),
+        "store_count": rng.choice(EDGE_STORES) if rng.random() < 0.5 else rng.randint(0, 60),
+        "avg_suit_price_eur": price_usd / 1.08,
+        "brand_style": "classic",
+        "business_model": "retail",
+        "description": "",
+        "detailed_description": "",
+        "store_locations": [],
+        "fit_score": 0,
+        "material_composition": [wool] if wool else [],
+        "made_to_measure": rng.choice([True, False]),
+    }
+
+
+def random_similar_clients(rng: random.Random) -> list:
+    if rng.random() < 0.1:
+        return []
+    return [{"name": "Client", "similarity": rng.choice([round(rng.uniform(0, 100), 2), 100.0, 99.99])}]
+
+
+def main(cases: int, seed: int) -> int:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(cases):
+        prospect = random_prospect_dict(rng, i)
+        scores = score_prospect(prospect, random_similar_clients(rng))
+        rows.append(dict(zip(PROSPECT_COLUMNS, build_prospect_record(f"p{i}", prospect, prospect["city"], scores))))
+
+    what_if._snapshot = what_if.build_snapshot(rows)
+    offsets = what_if._snapshot["offsets"]
+    drifted = np.flatnonzero(np.abs(offsets) >= 1)
+    for i in drifted[:20]:
+        print(f"❌ case {i}: stored={rows[i]['final_score']!r} offset={offsets[i]:.2f} row={rows[i]}")
+
+    result = asyncio.run(what_if.simulate_scoring(ProspectorConfig(), top_n=cases))
+    stored = {row["id"]: row["final_score"] for row in rows}
+    deltas = [
+        entry for entry in result["top"]
+        if entry["score_change"] or entry["rank_change"] or entry["score_after"] != stored[entry["id"]]
+    ]
+    bucket_diffs = {name: bucket["diff"] for name, bucket in result["buckets"].items() if bucket["diff"]}
+    changed = result["rank_changes"]["score_changed"] + result["rank_changes"]["moved"]
+    if deltas or bucket_diffs or changed:
+        print(f"❌ Empty simulation changed scores: {changed} rows, buckets {bucket_diffs}, e.g. {deltas[:3]}")
+
+    if len(drifted) or deltas or bucket_diffs or changed:
+        print(f"❌ {len(drifted)} prospects off by a point or more ({cases} prospects)")
+        return 1
+    print(f"✅ Kernel matches the stored final_score and an empty simulation changes nothing ({cases} prospects)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    sys.exit(main(args.cases, args.seed))
@@ -0,0 +1,335 @@
+"""
+Checkpoint Retention
+Keeps the LangGraph checkpoint tables (AsyncPostgresSaver: checkpoints,
+checkpoint_blobs, checkpoint_writes) from growing without bound: every step of
+every search adds a checkpoint and nothing deleted them.
+
+- Completed threads (marked in `workflow_threads` by the workflow service) are
+  compacted to their latest checkpoint: older checkpoints, their pending writes
+  and channel versions the latest one no longer references are deleted
+- Threads whose latest checkpoint is older than CHECKPOINT_RETENTION_DAYS are
+  deleted with their workflow_events; the legacy `agent_checkpoints` table and
+  workflow_threads / workflow_events rows are pruned by the same age
+- state_blobs (services/state_store.py) unused for that long and not referenced
+  by a remaining checkpoint are deleted
+- Deletes run CHECKPOINT_RETENTION_BATCH threads (or rows) at a time, one
+  transaction per batch, followed by VACUUM ANALYZE of the tables that shrank
+- Runs every CHECKPOINT_RETENTION_INTERVAL_H hours in the API process (one
+  process at a time, Postgres advisory lock) or on demand (POST /api/jobs/checkpoint-retention);
+  each run is recorded in `checkpoint_retention_runs` with rows deleted and bytes reclaimed
+"""
+import asyncio
+import contextlib
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from .postgres import PostgresManager
+
+CHECKPOINT_TABLES = ["checkpoint_writes", "checkpoint_blobs", "checkpoints"]
+THREAD_TABLES = CHECKPOINT_TABLES + ["workflow_events", "workflow_threads"]
+REPORTED_TABLES = CHECKPOINT_TABLES + ["workflow_events", "workflow_threads", "state_blobs", "agent_checkpoints"]
+
+# First background run after startup (seconds), so it never competes with the boot itself
+STARTUP_DELAY_S = 120
+ADVISORY_LOCK_KEY = "checkpoint_retention"
+
+# Checkpoints of a thread other than the latest one per namespace
+_COMPACT_CHECKPOINTS_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (thread_id, checkpoint_ns) thread_id, checkpoint_ns, checkpoint_id
+        FROM checkpoints
+        WHERE thread_id = ANY($1)
+        ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC
+    ), deleted AS (
+        DELETE FROM checkpoints c
+        WHERE c.thread_id = ANY($1)
+          AND NOT EXISTS (
+              SELECT 1 FROM latest l
+              WHERE l.thread_id = c.thread_id AND l.checkpoint_ns = c.checkpoint_ns AND l.checkpoint_id = c.checkpoint_id
+          )
+        RETURNING pg_column_size(c.*) AS size
+    )
+    SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+"""
+
+# Pending writes of checkpoints that no longer exist
+_COMPACT_WRITES_SQL = """
+    WITH deleted AS (
+        DELETE FROM checkpoint_writes w
+        WHERE w.thread_id = ANY($1)
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints c
+              WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns AND c.checkpoint_id = w.checkpoint_id
+          )
+        RETURNING pg_column_size(w.*) AS size
+    )
+    SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+"""
+
+# Channel value versions no remaining checkpoint points to
+_COMPACT_BLOBS_SQL = """
+    WITH deleted AS (
+        DELETE FROM checkpoint_blobs b
+        WHERE b.thread_id = ANY($1)
+          AND NOT EXISTS (
+              SELECT 1 FROM checkpoints c
+              WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+                AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+          )
+        RETURNING pg_column_size(b.*) AS size
+    )
+    SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+"""
+
+
+def _delete_sql(table: str, condition: str) -> str:
+    return f"""
+        WITH deleted AS (
+            DELETE FROM {table} t WHERE {condition}
+            RETURNING pg_column_size(t.*) AS size
+        )
+        SELECT COUNT(*) AS rows, COALESCE(SUM(size), 0) AS bytes FROM deleted
+    """
+
+
+class CheckpointRetention:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # THREAD STATUS
+    # ------------------------------------------------------------------
+
+    async def mark_thread(self, thread_id: str, status: str, search_id: Optional[str] = None, city: Optional[str] = None):
+        """Record a thread's status before and after a workflow run (only completed threads get compacted)."""
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO workflow_threads (thread_id, search_id, city, status, completed_at)
+                    VALUES ($1, $2, $3, $4, CASE WHEN $4 = 'completed' THEN CURRENT_TIMESTAMP END)
+                    ON CONFLICT (thread_id) DO UPDATE SET
+                        search_id = COALESCE(EXCLUDED.search_id, workflow_threads.search_id),
+                        city = COALESCE(EXCLUDED.city, workflow_threads.city),
+                        status = EXCLUDED.status,
+                        updated_at = CURRENT_TIMESTAMP,
+                        completed_at = COALESCE(EXCLUDED.completed_at, workflow_threads.completed_at)
+                """, thread_id, search_id, city, status)
+        except Exception as e:
+            print(f"[RETENTION] ⚠️ Could not mark thread {thread_id} as {status}: {e}")
+
+    # ------------------------------------------------------------------
+    # RUN
+    # ------------------------------------------------------------------
+
+    async def run(self) -> Dict[str, Any]:
+        """One retention pass. Returns the report (also stored in checkpoint_retention_runs)."""
+        if self._running:
+            return {"skipped": "already running"}
+        self._running = True
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", ADVISORY_LOCK_KEY):
+                    return {"skipped": "running in another process"}
+                try:
+                    return await self._run(conn)
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", ADVISORY_LOCK_KEY)
+        finally:
+            self._running = False
+
+    async def _run(self, conn) -> Dict[str, Any]:
+        started = time.monotonic()
+        run_id = await conn.fetchval("INSERT INTO checkpoint_retention_runs DEFAULT VALUES RETURNING id")
+        rows: Counter = Counter()
+        reclaimed = 0
+        compacted = deleted = 0
+        error = None
+
+        def add(table: str, result):
+            nonlocal reclaimed
+            rows[table] += result["rows"]
+            reclaimed += result["bytes"]
+
+        days, batch = Config.CHECKPOINT_RETENTION_DAYS, Config.CHECKPOINT_RETENTION_BATCH
+        try:
+            has_checkpoints = await conn.fetchval("SELECT to_regclass('checkpoints') IS NOT NULL")
+            if has_checkpoints:
+                # 1. Completed threads -> latest checkpoint only
+                while True:
+                    thread_ids = [r["thread_id"] for r in await conn.fetch("""
+                        SELECT thread_id FROM workflow_threads
+                        WHERE status = 'completed' AND (compacted_at IS NULL OR compacted_at < updated_at)
+                        ORDER BY updated_at
+                        LIMIT $1
+                    """, batch)]
+                    if not thread_ids:
+                        break
+                    async with conn.transaction():
+                        add("checkpoints", await conn.fetchrow(_COMPACT_CHECKPOINTS_SQL, thread_ids))
+                        add("checkpoint_writes", await conn.fetchrow(_COMPACT_WRITES_SQL, thread_ids))
+                        add("checkpoint_blobs", await conn.fetchrow(_COMPACT_BLOBS_SQL, thread_ids))
+                        await conn.execute("""
+                            UPDATE checkpoints SET parent_checkpoint_id = NULL
+                            WHERE thread_id = ANY($1) AND parent_checkpoint_id IS NOT NULL
+                        """, thread_ids)
+                        await conn.execute(
+                            "UPDATE workflow_threads SET compacted_at = CURRENT_TIMESTAMP WHERE thread_id = ANY($1)", thread_ids
+                        )
+                    compacted += len(thread_ids)
+                    if len(thread_ids) < batch:
+                        break
+
+                # 2. Threads idle for longer than the retention period -> deleted
+                while True:
+                    thread_ids = [r["thread_id"] for r in await conn.fetch("""
+                        SELECT thread_id FROM checkpoints
+                        GROUP BY thread_id
+                        HAVING MAX((checkpoint ->> 'ts')::timestamptz) < CURRENT_TIMESTAMP - make_interval(days => $1)
+                        LIMIT $2
+                    """, days, batch)]
+                    if not thread_ids:
+                        break
+                    async with conn.transaction():
+                        for table in THREAD_TABLES:
+                            add(table, await conn.fetchrow(_delete_sql(table, "t.thread_id = ANY($1)"), thread_ids))
+                    deleted += len(thread_ids)
+                    if len(thread_ids) < batch:
+                        break
+
+            # 3. Rows older than the retention period that belong to no remaining checkpoint
+            for table, condition in (
+                ("workflow_threads", "t.updated_at < CURRENT_TIMESTAMP - make_interval(days => $1)"),
+                ("workflow_events", "t.created_at < CURRENT_TIMESTAMP - make_interval(days => $1)"),
+                ("agent_checkpoints", "t.created_at < CURRENT_TIMESTAMP - make_interval(days => $1)"),
+            ):
+                await self._delete_batched(conn, table, condition, days, batch, add)
+
+            referenced = await self._referenced_blobs(conn) if has_checkpoints else []
+            await self._delete_batched(
+                conn,
+                "state_blobs",
+                "t.last_used_at < CURRENT_TIMESTAMP - make_interval(days => $1) AND t.blob_key <> ALL($3::text[])",
+                days, batch, add, referenced,
+            )
+
+            for table in [t for t in REPORTED_TABLES if rows[t]]:
+                await conn.execute(f"VACUUM (ANALYZE) {table}")
+        except Exception as e:
+            error = str(e)
+            print(f"[RETENTION] ❌ Run failed: {e}")
+
+        report = {
+            "run_id": run_id,
+            "duration_s": round(time.monotonic() - started, 2),
+            "threads_compacted": compacted,
+            "threads_deleted": deleted,
+            "rows_deleted": {t: rows[t] for t in REPORTED_TABLES if rows[t]},
+            "mb_reclaimed": round(reclaimed / 1e6, 3),
+            "error": error,
+        }
+        await conn.execute("""
+            UPDATE checkpoint_retention_runs
+            SET finished_at = CURRENT_TIMESTAMP, threads_compacted = $2, threads_deleted = $3,
+                rows_deleted = $4::jsonb, bytes_reclaimed = $5, error = $6
+            WHERE id = $1
+        """, run_id, compacted, deleted, json.dumps(report["rows_deleted"]), reclaimed, error)
+        self.last_report = report
+        print(f"[RETENTION] {compacted} threads compacted, {deleted} deleted, "
+              f"{sum(rows.values())} rows / {report['mb_reclaimed']} MB reclaimed in {report['duration_s']}s")
+        return report
+
+    async def _delete_batched(self, conn, table: str, condition: str, days: int, batch: int, add, *args):
+        """Delete matching rows `batch` at a time (one short transaction each)."""
+        sql = _delete_sql(table, f"t.ctid = ANY(ARRAY(SELECT ctid FROM {table} t WHERE {condition} LIMIT $2))")
+        while True:
+            result = await conn.fetchrow(sql, days, batch, *args)
+            add(table, result)
+            if result["rows"] < batch:
+                break
+
+    async def _referenced_blobs(self, conn) -> List[str]:
+        """state_blobs keys held by a remaining checkpoint (the "<field>_ref" channels, stored inline)."""
+        rows = await conn.fetch("""
+            SELECT DISTINCT v.value AS blob_key
+            FROM checkpoints c
+            CROSS JOIN LATERAL jsonb_each_text(c.checkpoint -> 'channel_values') AS v
+            WHERE right(v.key, 4) = '_ref' AND v.value IS NOT NULL
+        """)
+        return [r["blob_key"] for r in rows]
+
+    # ------------------------------------------------------------------
+    # BACKGROUND TASK
+    # ------------------------------------------------------------------
+
+    async def _run_periodically(self):
+        await asyncio.sleep(STARTUP_DELAY_S)
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"[RETENTION] ❌ {e}")
+            await asyncio.sleep(Config.CHECKPOINT_RETENTION_INTERVAL_H * 3600)
+
+    def start(self):
+        """Start the periodic retention job (API lifespan)."""
+        if not Config.CHECKPOINT_RETENTION_ENABLED:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    # ------------------------------------------------------------------
+    # STATS
+    # ------------------------------------------------------------------
+
+    async def stats(self) -> Dict[str, Any]:
+        """Table sizes, threads per status and the latest runs."""
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            sizes = await conn.fetch("""
+                SELECT relname, pg_total_relation_size(oid) AS bytes, reltuples::bigint AS approx_rows
+                FROM pg_class
+                WHERE relname = ANY($1) AND relkind = 'r'
+            """, REPORTED_TABLES)
+            threads = await conn.fetch("SELECT status, COUNT(*) AS n FROM workflow_threads GROUP BY status")
+            runs = await conn.fetch("""
+                SELECT id, started_at, finished_at, threads_compacted, threads_deleted, rows_deleted, bytes_reclaimed, error
+                FROM checkpoint_retention_runs
+                ORDER BY id DESC
+                LIMIT 10
+            """)
+        return {
+            "enabled": Config.CHECKPOINT_RETENTION_ENABLED,
+            "retention_days": Config.CHECKPOINT_RETENTION_DAYS,
+            "interval_hours": Config.CHECKPOINT_RETENTION_INTERVAL_H,
+            "tables": {
+                r["relname"]: {"mb": round(r["bytes"] / 1e6, 3), "approx_rows": max(r["approx_rows"], 0)} for r in sizes
+            },
+            "threads": {r["status"]: r["n"] for r in threads},
+            "runs": [
+                {
+                    **dict(r),
+                    "rows_deleted": json.loads(r["rows_deleted"]) if isinstance(r["rows_deleted"], str) else r["rows_deleted"],
+                    "started_at": r["started_at"].isoformat() if r["started_at"] else None,
+                    "finished_at": r["finished_at"].isoformat() if r["finished_at"] else None,
+                }
+                for r in runs
+            ],
+        }
+
+
+# Singleton instance
+checkpoint_retention = CheckpointRetention()
@@ -0,0 +1,237 @@
+"""
+Content Condenser
+Shrinks scraped pages to compact digests before they reach the selection LLM.
+
+Scraped markdown is mostly navigation, footers and cookie banners. Pages are
+split into blocks (paragraphs under their heading), each block is scored with
+cheap heuristics (suit / fabric / price / store / about vocabulary, minus
+boilerplate and link-heavy menus) and the best blocks are kept, in reading
+order, until the token budget is used.
+
+Token counts are estimated as characters / CHARS_PER_TOKEN.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from models import ExtractedContent
+from .price_extractor import has_price
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 1200
+
+# Blocks longer than this are clipped so one section cannot take the whole budget
+MAX_BLOCK_CHARS = 1200
+# Plain-text pages (no blank lines) are re-chunked into blocks of about this size
+FALLBACK_BLOCK_CHARS = 500
+# The first non-menu block (brand name, tagline) is always kept, up to this size
+INTRO_CHARS = 300
+
+SECTION_TERMS: Dict[str, Tuple[int, List[str]]] = {
+    "suit": (3, ["suit", "fato", "traje", "abito", "anzug", "costume", "tailor", "bespoke", "made to measure",
+                 "made-to-measure", "medida", "su misura", "sur mesure", "blazer", "jacket", "tuxedo"]),
+    "fabric": (3, ["wool", "lã", "lana", "laine", "cashmere", "super 1", "fabric", "tecido", "tessuto", "cloth",
+                   "loro piana", "vitale barberis", "zegna", "holland & sherry", "canvas"]),
+    "store": (2, ["store", "boutique", "showroom", "loja", "tienda", "negozio", "atelier", "address", "visit us",
+                  "opening hours", "located"]),
+    "about": (2, ["about", "our story", "history", "heritage", "founded", "since 1", "since 2", "family",
+                  "craftsmanship", "sobre nós", "quem somos", "atelier"]),
+}
+PRICE_WEIGHT = 4
+
+BOILERPLATE_TERMS = [
+    "cookie", "privacy", "newsletter", "subscribe", "sign in", "log in", "login", "my account", "cart",
+    "checkout", "wishlist", "terms", "conditions", "all rights reserved", "©", "follow us", "shipping",
+    "returns", "javascript", "accept all",
+]
+BOILERPLATE_WEIGHT = 3
+
+_SECTION_PATTERNS = {
+    name: (weight, re.compile("|".join(re.escape(term) for term in terms)))
+    for name, (weight, terms) in SECTION_TERMS.items()
+}
+_BOILERPLATE = re.compile("|".join(re.escape(term) for term in BOILERPLATE_TERMS))
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_HEADING = re.compile(r"^\s{0,3}#{1,6}\s")
+
+# Process-wide totals (see get_condensation_stats)
+_stats: Counter = Counter()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+# ============================================================================
+# SEGMENTATION & SCORING
+# ============================================================================
+
+def split_blocks(content: str) -> List[Tuple[Optional[str], str]]:
+    """Split markdown into (heading, block) pairs; blocks are blank-line separated paragraphs."""
+    blocks, heading, paragraph = [], None, []
+
+    def flush():
+        text = "\n".join(paragraph).strip()
+        if text:
+            blocks.append((heading, text))
+        paragraph.clear()
+
+    for line in content.splitlines():
+        if _HEADING.match(line):
+            flush()
+            heading = line.strip()
+        elif not line.strip():
+            flush()
+        else:
+            paragraph.append(line)
+    flush()
+
+    # Plain text without paragraph breaks: chunk it so it can still be ranked
+    if len(blocks) < 3 and len(content) > 2 * FALLBACK_BLOCK_CHARS:
+        blocks = []
+        chunk = ""
+        # Sentences, so single-line pages (e.g. Tavily raw_content) are chunked too
+        for piece in re.split(r"(?<=[.!?])\s+|\n", content):
+            chunk = f"{chunk} {piece}" if chunk else piece
+            if len(chunk) >= FALLBACK_BLOCK_CHARS:
+                blocks.append((None, chunk.strip()))
+                chunk = ""
+        if chunk.strip():
+            blocks.append((None, chunk.strip()))
+    return blocks
+
+
+def _link_ratio(text: str) -> float:
+    link_chars = sum(len(m.group(0)) for m in _MARKDOWN_LINK.finditer(text))
+    return link_chars / len(text) if text else 0.0
+
+
+def score_block(heading: Optional[str], text: str) -> float:
+    """Relevance of one block: section vocabulary and prices up, boilerplate and menus down."""
+    visible = _MARKDOWN_LINK.sub(r"\1", text)
+    lowered = f"{heading or ''}\n{visible}".lower()
+
+    score = 0.0
+    for weight, pattern in _SECTION_PATTERNS.values():
+        if pattern.search(lowered):
+            score += weight
+    if has_price(visible):
+        score += PRICE_WEIGHT
+    score -= BOILERPLATE_WEIGHT * min(len(_BOILERPLATE.findall(lowered)), 3)
+
+    # Navigation menus: mostly link text, or many very short lines
+    if _link_ratio(text) > 0.5:
+        score -= 4
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) >= 5 and sum(len(line) for line in lines) / len(lines) < 25:
+        score -= 2
+    return score
+
+
+# ============================================================================
+# CONDENSATION
+# ============================================================================
+
+def condense_content(content: str, token_budget: int = DEFAULT_TOKEN_BUDGET) -> Dict:
+    """
+    Build a digest of `content` within `token_budget` tokens.
+
+    Returns:
+        {"digest", "original_tokens", "digest_tokens", "blocks_kept", "blocks_total"}
+    """
+    content = content or ""
+    original_tokens = estimate_tokens(content)
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    if len(content) <= budget_chars:
+        return {"digest": content, "original_tokens": original_tokens, "digest_tokens": original_tokens,
+                "blocks_kept": None, "blocks_total": None}
+
+    blocks = split_blocks(content)
+    seen_texts, candidates = set(), []
+    for index, (heading, text) in enumerate(blocks):
+        key = re.sub(r"\s+", " ", text.lower())
+        if key in seen_texts:
+            continue  # Repeated menus/footers
+        seen_texts.add(key)
+        candidates.append((score_block(heading, text), index, heading, text[:MAX_BLOCK_CHARS]))
+
+    intro_index = next((index for _, index, _, text in candidates if _link_ratio(text) <= 0.5), None)
+    intro = ""
+    if intro_index is not None:
+        heading, text = blocks[intro_index]
+        intro = "\n".join(part for part in (heading, text) if part)[:INTRO_CHARS]
+    used = len(intro)
+    chosen = []
+    for score, index, heading, text in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        if score <= 0:
+            break
+        if index == intro_index:
+            continue
+        cost = len(text) + (len(heading) + 1 if heading else 0) + 2
+        if used + cost > budget_chars:
+            continue
+        chosen.append((index, heading, text))
+        used += cost
+
+    # Reading order, each heading printed once
+    parts, last_heading = [intro] if intro else [], None
+    for index, heading, text in sorted(chosen):
+        if heading and heading != last_heading:
+            parts.append(heading)
+            last_heading = heading
+        parts.append(text)
+    digest = "\n\n".join(parts)[:budget_chars]
+
+    return {
+        "digest": digest,
+        "original_tokens": original_tokens,
+        "digest_tokens": estimate_tokens(digest),
+        "blocks_kept": len(chosen),
+        "blocks_total": len(blocks),
+    }
+
+
+def condense_contents(
+    contents: List[ExtractedContent],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    baseline_chars: Optional[int] = None,
+) -> Tuple[List[ExtractedContent], Dict]:
+    """
+    Condense every candidate page. Returns the digests (same order and URLs) and
+    the token savings for this batch; totals accumulate in get_condensation_stats().
+
+    `baseline_chars` is how much of each page would be sent without condensation
+    (savings are measured against that, not against the full page).
+    """
+    digests = []
+    batch = Counter()
+    for item in contents:
+        if not item.content:
+            digests.append(item)
+            continue
+        result = condense_content(item.content, token_budget)
+        digests.append(ExtractedContent(url=item.url, content=result["digest"]))
+        batch["pages"] += 1
+        batch["original_tokens"] += (
+            estimate_tokens(item.content[:baseline_chars]) if baseline_chars else result["original_tokens"]
+        )
+        batch["digest_tokens"] += result["digest_tokens"]
+
+    _stats.update(batch)
+    return digests, _summarize(batch)
+
+
+def _summarize(counts: Counter) -> Dict:
+    original, digest = counts["original_tokens"], counts["digest_tokens"]
+    return {
+        "pages": counts["pages"],
+        "original_tokens": original,
+        "digest_tokens": digest,
+        "saved_tokens": original - digest,
+        "saved_ratio": round(1 - digest / original, 3) if original else 0.0,
+    }
+
+
+def get_condensation_stats() -> Dict:
+    """Token savings since startup."""
+    return _summarize(_stats)
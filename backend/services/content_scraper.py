@@ -1,31 +1,55 @@
 """
 Content Scraper Service
-Handles batch extraction from URLs with Jina Reader fallback and Deep Price Discovery.
+Handles batch extraction from URLs with Jina Reader fallback and Deep Price Discovery
+(link ranking and the multi-page crawl live in services/deep_crawler.py).
 """
 import asyncio
-import re
 from typing import List, Optional, Dict
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from config import Config
 from models import ExtractedContent
 from services.jina_reader import extract_with_jina
 from services.firecrawl_service import firecrawl_service
-from agents.nodes.utils import get_tavily_client, normalize_url, get_domain_from_url
+from services.direct_fetcher import direct_fetcher
+from services.price_extractor import has_price
+from services.tracing import span
+from services.resilience import resilience
+from services.fetch_scheduler import fetch_scheduler
+from services.deep_crawler import crawl_sites, rank_links
+from services.url_utils import normalize_url, get_domain_from_url
 
-async def batch_extract_content(urls: List[str]) -> List[ExtractedContent]:
+async def batch_extract_content(urls: List[str], relevance_filter=None) -> List[ExtractedContent]:
     """
     Batch extract content from multiple URLs.
     PRIORITY:
+    0. Direct fetch (free: our own HTTP client + HTML to markdown, static pages only)
     1. Firecrawl (High quality Markdown, JS rendering)
     2. Tavily Extract (Fast, good coverage)
     3. Jina Reader (Reliable fallback for specific URLs)
+    
+    With a relevance_filter, Jina downloads (streamed) stop early on irrelevant pages.
+    Providers whose circuit is open are skipped (services/resilience.py).
     """
     if not urls:
         return []
 
-    # 1. Try Firecrawl first for ALL urls
-    print(f"[SCRAPER] Trying Firecrawl for {len(urls)} URLs...")
-    results = await firecrawl_service.batch_extract(urls)
+    # 0. Direct fetch: server-rendered pages need no paid provider
+    results = [ExtractedContent(url=url, content=None) for url in urls]
+    if Config.DIRECT_FETCH_ENABLED:
+        with span("scrape.direct", urls=len(urls)):
+            direct_contents = await fetch_scheduler.map(urls, direct_fetcher.fetch)
+        results = [ExtractedContent(url=url, content=content) for url, content in zip(urls, direct_contents)]
+    pending = [i for i, r in enumerate(results) if not r.content or len(r.content) < 500]
+    if Config.DIRECT_FETCH_ENABLED:
+        print(f"[SCRAPER] Direct fetch got {len(urls) - len(pending)}/{len(urls)} URLs")
+    if not pending:
+        return results
+
+    # 1. Try Firecrawl for the rest
+    print(f"[SCRAPER] Trying Firecrawl for {len(pending)} URLs...")
+    firecrawl_results = await firecrawl_service.batch_extract([urls[i] for i in pending])
+    for i, extracted in zip(pending, firecrawl_results):
+        if extracted.content and len(extracted.content) > len(results[i].content or ""):
+            results[i] = extracted
     
     # Check what failed (None or very short content)
     failed_urls = [r.url for r in results if not r.content or len(r.content) < 500]
@@ -33,101 +57,108 @@ async def batch_extract_content(urls: List[str]) -> List[ExtractedContent]:
     if not failed_urls:
         return results
 
-    # 2. Try Tavily Extract for failures
-    print(f"[SCRAPER] Firecrawl missed/short on {len(failed_urls)} URLs. Trying Tavily Extract fallback...")
-    client = get_tavily_client()
-    BATCH_SIZE = 18
-    url_batches = [failed_urls[i:i + BATCH_SIZE] for i in range(0, len(failed_urls), BATCH_SIZE)]
-    
-    for batch_urls in url_batches:
-        try:
-            extraction = client.extract(urls=batch_urls)
-            if extraction.get("results"):
-                for result in extraction["results"]:
-                    raw_content = result.get("raw_content", "")
-                    url = result.get("url", "")
-                    if raw_content and len(raw_content) > 500:
-                        # Find the index in original results to overwrite
-                        for idx, orig in enumerate(results):
-                            if orig.url == url:
-                                results[idx] = ExtractedContent(url=url, content=raw_content[:12000])
-                                break
-        except Exception as e:
-            print(f"[SCRAPER] Tavily fallback error: {e}")
-
-    # 3. Final Jina Fallback for anything still missing
-    final_failures = [r.url for r in results if not r.content or len(r.content) < 500]
-    if final_failures:
-        print(f"[SCRAPER] Final fallback to Jina for {len(final_failures)} URLs...")
-        for url in final_failures:
+    # 2. Try Tavily Extract for failures (batches run concurrently, limited by the resilience layer)
+    if resilience.is_open("tavily_extract"):
+        print(f"[SCRAPER] Tavily Extract circuit open, skipping to Jina for {len(failed_urls)} URLs...")
+    else:
+        print(f"[SCRAPER] Firecrawl missed/short on {len(failed_urls)} URLs. Trying Tavily Extract fallback...")
+        from agents.nodes.utils import get_tavily_client  # agents imports this module
+        client = get_tavily_client()
+        BATCH_SIZE = 18
+        url_batches = [failed_urls[i:i + BATCH_SIZE] for i in range(0, len(failed_urls), BATCH_SIZE)]
+
+        async def extract_batch(batch_urls: List[str]) -> Dict:
             try:
-                jina_result = await extract_with_jina(url)
-                if jina_result["success"]:
+                with span("scrape.tavily_extract", urls=len(batch_urls)):
+                    return await resilience.run_sync("tavily_extract", client.extract, urls=batch_urls)
+            except Exception as e:
+                print(f"[SCRAPER] Tavily fallback error: {e}")
+                return {}
+
+        for extraction in await asyncio.gather(*(extract_batch(b) for b in url_batches)):
+            for result in extraction.get("results") or []:
+                raw_content = result.get("raw_content", "")
+                url = result.get("url", "")
+                if raw_content and len(raw_content) > 500:
+                    # Find the index in original results to overwrite
                     for idx, orig in enumerate(results):
                         if orig.url == url:
-                            results[idx] = ExtractedContent(url=url, content=jina_result["content"][:12000])
+                            results[idx] = ExtractedContent(url=url, content=raw_content[:12000])
                             break
+
+    # 3. Final Jina Fallback for anything still missing (concurrent per-site politeness; the "jina" rate limit paces it)
+    final_failures = [r.url for r in results if not r.content or len(r.content) < 500]
+    if final_failures and resilience.is_open("jina"):
+        print(f"[SCRAPER] Jina circuit open, {len(final_failures)} URLs left without content")
+    elif final_failures:
+        print(f"[SCRAPER] Final fallback to Jina for {len(final_failures)} URLs...")
+
+        async def extract_one(url: str) -> Dict:
+            try:
+                with span("scrape.jina", url=url):
+                    return await extract_with_jina(url, relevance_filter=relevance_filter)
             except Exception:
-                pass
+                return {"success": False}
+
+        jina_results = await fetch_scheduler.map(final_failures, extract_one)
+        for url, jina_result in zip(final_failures, jina_results):
+            if jina_result["success"]:
+                for idx, orig in enumerate(results):
+                    if orig.url == url:
+                        results[idx] = ExtractedContent(url=url, content=jina_result["content"][:12000])
+                        break
 
     return results
 
+async def site_search_link(url: str) -> Optional[str]:
+    """A suits/price page of the URL's site from a Tavily site search (None if nothing new)."""
+    from agents.nodes.utils import get_tavily_client  # agents imports this module
+    try:
+        domain = get_domain_from_url(url)
+        found = await resilience.run_sync(
+            "tavily_search", get_tavily_client().search,
+            query=f'site:{domain} "suits" price', search_depth="basic", max_results=1,
+        )
+        if found.get("results"):
+            found_url = found["results"][0]["url"]
+            if normalize_url(found_url) != normalize_url(url):
+                return found_url
+    except Exception:
+        pass
+    return None
+
 async def enrich_content_with_prices(contents: List[ExtractedContent]) -> List[ExtractedContent]:
     """
     Deep Price Discovery (Smart Semantic Navigation):
     If prices aren't on homepage, it finds "Suits/Shop" links or does a targeted site search.
+    
+    Config.PRICE_DISCOVERY_MODE:
+    - "deep_crawl": bounded breadth-first crawl per site for prices, store count and
+      fabric (services/deep_crawler.py)
+    - "single_link": the best suit/shop link of pages without prices only
     """
+    if Config.PRICE_DISCOVERY_MODE == "deep_crawl":
+        return await crawl_sites(contents, batch_extract_content, site_search_link)
+
     enriched_results = []
     urls_to_fetch_secondary = []
     indices_to_update = []
     
-    price_pattern = r'(?:[\$€£]\s?\d{1,3}(?:[,.\s]?\d{3})*(?:[.,]\d{2})?|\d{1,3}(?:[,.\s]?\d{3})*(?:[.,]\d{2})?\s?[\$€£]|(?:price|prix|preço|preis|precio|from|starting\s+at|a\s+partir\s+de)\s*[:=]?\s*[\$€£]?\d+(?:[.,]\d{2})?)'
-    
     for idx, item in enumerate(contents):
         if not item.content:
             enriched_results.append(item)
             continue
             
-        if re.search(price_pattern, item.content, re.IGNORECASE):
+        if has_price(item.content):
             enriched_results.append(item)
         else:
             # Smart Navigation
-            shop_link = None
-            try:
-                soup = BeautifulSoup(item.content, 'html.parser')
-                suit_keywords = ['suit', 'fatos', 'fato', 'traje', 'abito', 'tailoring', 'sartorial', 'ceremony', 'wedding']
-                shop_keywords = ['shop', 'store', 'collection', 'loja', 'comprar', 'boutique', 'catalog']
-                
-                best_link, best_score = None, 0
-                for link in soup.find_all('a', href=True):
-                    href, text = link['href'].lower().strip(), link.get_text(separator=' ', strip=True).lower()
-                    if not href or href.startswith('#') or href.startswith('javascript'): continue
-                    
-                    score = (10 if any(kw in text for kw in suit_keywords) else 0) + \
-                            (5 if any(kw in href for kw in suit_keywords) else 0) + \
-                            (2 if any(kw in text for kw in shop_keywords) else 0) + \
-                            (1 if any(kw in href for kw in shop_keywords) else 0)
-                    if any(kw in href for kw in ['login', 'account', 'cart', 'basket', 'checkout']): score -= 50
-                    
-                    if score > best_score:
-                        best_score, best_link = score, link['href']
-                
-                if best_link and best_score >= 2:
-                    shop_link = urljoin(item.url, best_link)
-            except Exception:
-                pass
+            ranked = rank_links(item.content, item.url, wanted=("price",))
+            shop_link = ranked[0][1] if ranked else None
             
             # Fallback: Site Search
             if not shop_link:
-                try:
-                    domain = get_domain_from_url(item.url)
-                    found = get_tavily_client().search(query=f'site:{domain} "suits" price', search_depth="basic", max_results=1)
-                    if found.get("results"):
-                        found_url = found["results"][0]["url"]
-                        if normalize_url(found_url) != normalize_url(item.url):
-                            shop_link = found_url
-                except Exception:
-                    pass
+                shop_link = await site_search_link(item.url)
 
             if shop_link and normalize_url(shop_link) != normalize_url(item.url):
                 urls_to_fetch_secondary.append(shop_link)
@@ -15,8 +15,9 @@ import os
 import json
 import asyncio
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, AsyncIterator, Sequence
 from .postgres import PostgresManager
+from .suppression import suppression_list
 
 # ============================================================================
 # DATABASE UTILITIES
@@ -31,19 +32,22 @@ async def get_db_conn():
 async def init_database():
     """
     Initialize the PostgreSQL database with required tables.
+    Applies every migration in `migrations/` in filename order (all are idempotent).
     """
-    schema_path = os.path.join(os.path.dirname(__file__), "..", "migrations", "001_initial_schema.sql")
+    migrations_dir = os.path.join(os.path.dirname(__file__), "..", "migrations")
+    schema_path = os.path.join(migrations_dir, "001_initial_schema.sql")
     if not os.path.exists(schema_path):
         print(f"❌ Schema file not found at {schema_path}")
         return
 
-    with open(schema_path, "r") as f:
-        schema_sql = f.read()
+    migration_files = sorted(f for f in os.listdir(migrations_dir) if f.endswith(".sql"))
 
     try:
         pool = await PostgresManager.get_pool()
         async with pool.acquire() as conn:
-            await conn.execute(schema_sql)
+            for filename in migration_files:
+                with open(os.path.join(migrations_dir, filename), "r") as f:
+                    await conn.execute(f.read())
         print("[DATABASE] ✅ PostgreSQL database initialized")
     except Exception as e:
         print(f"[DATABASE] ❌ Initialization failed: {e}")
@@ -112,6 +116,64 @@ async def check_prospect_exists(website_url: str, city: str) -> bool:
         return row is not None
 
 
+PROSPECT_COLUMNS = [
+    "id", "name", "website_url", "domain", "city", "country", "country_code",
+    "store_count", "avg_suit_price_eur", "brand_style", "business_model", "company_overview",
+    "detailed_description", "store_locations",
+    "material_composition", "sustainability_certs", "made_to_measure",
+    "heritage_brand", "quality_score", "similarity_score", "location_score", "location_quality",
+    "final_score", "fit_score", "most_similar_client", "similarity_explanation", "status", "discovered_at",
+]
+
+
+def build_prospect_record(prospect_id: str, prospect: Dict, city: str, scores: Dict) -> tuple:
+    """Build the `prospects` row (in PROSPECT_COLUMNS order) for a scored prospect."""
+    website_url = prospect.get("website_url", "")
+    return (
+        prospect_id,
+        str(prospect.get("name", "Unknown")),
+        str(website_url),
+        extract_domain(website_url),
+        normalize_city(city),
+        str(prospect.get("country", "Unknown")),
+        str(prospect.get("country_code", "XX")),
+        int(prospect.get("store_count", 0)),
+        float(prospect.get("avg_suit_price_eur", 0)),
+        str(prospect.get("brand_style", "unknown")),
+        str(prospect.get("business_model", "unknown")),
+        str(prospect.get("description", "")),
+        str(prospect.get("detailed_description", "")),
+        json.dumps(prospect.get("store_locations", [])),
+        json.dumps(prospect.get("material_composition", [])),
+        json.dumps(prospect.get("sustainability_certs", [])),
+        bool(prospect.get("made_to_measure", False)),
+        bool(prospect.get("heritage_brand", False)),
+        int(scores.get("breakdown", {}).get("quality_score", 0)),
+        int(scores.get("breakdown", {}).get("similarity_score", 0)),
+        int(scores.get("breakdown", {}).get("location_score", 0)),
+        str(prospect.get("location_quality", "standard")),
+        int(scores.get("final_score", 0)),
+        int(prospect.get("fit_score", 0)),
+        scores.get("explanation", {}).get("most_similar_client", "N/A"),
+        scores.get("explanation", {}).get("similarity_explanation", ""),
+        "new",
+        datetime.now()
+    )
+
+
+
+# Internal columns never returned to API callers (see migrations/004_rescoring.sql)
+INTERNAL_PROSPECT_COLUMNS = ("profile_embedding",)
+
+
+def prospect_row_to_dict(row) -> Dict:
+    """Convert a prospects row to a dict without internal columns."""
+    prospect = dict(row)
+    for col in INTERNAL_PROSPECT_COLUMNS:
+        prospect.pop(col, None)
+    return prospect
+
+
 async def save_prospect(
     prospect: Dict, 
     city: str, 
@@ -123,7 +185,6 @@ async def save_prospect(
     """
     website_url = prospect.get("website_url", "")
     normalized_url = normalize_url(website_url)
-    domain = extract_domain(website_url)
     normalized_city = normalize_city(city)
     
     # Check for duplicate
@@ -136,51 +197,127 @@ async def save_prospect(
     
     pool = await PostgresManager.get_pool()
     async with pool.acquire() as conn:
-        await conn.execute("""
-            INSERT INTO prospects (
-                id, name, website_url, domain, city, country, country_code,
-                store_count, avg_suit_price_eur, brand_style, business_model, company_overview,
-                detailed_description, store_locations,
-                material_composition, sustainability_certs, made_to_measure,
-                heritage_brand, quality_score, similarity_score, location_score, location_quality,
-                final_score, fit_score, most_similar_client, similarity_explanation, status, discovered_at
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24, $25, $26, $27, $28)
-        """,
-            prospect_id,
-            str(prospect.get("name", "Unknown")),
-            str(website_url),
-            domain,
-            normalized_city,
-            str(prospect.get("country", "Unknown")),
-            str(prospect.get("country_code", "XX")),
-            int(prospect.get("store_count", 0)),
-            float(prospect.get("avg_suit_price_eur", 0)),
-            str(prospect.get("brand_style", "unknown")),
-            str(prospect.get("business_model", "unknown")),
-            str(prospect.get("description", "")),
-            str(prospect.get("detailed_description", "")),
-            json.dumps(prospect.get("store_locations", [])),
-            json.dumps(prospect.get("material_composition", [])),
-            json.dumps(prospect.get("sustainability_certs", [])),
-            bool(prospect.get("made_to_measure", False)),
-            bool(prospect.get("heritage_brand", False)),
-            int(scores.get("breakdown", {}).get("quality_score", 0)),
-            int(scores.get("breakdown", {}).get("similarity_score", 0)),
-            int(scores.get("breakdown", {}).get("location_score", 0)),
-            str(prospect.get("location_quality", "standard")),
-            int(scores.get("final_score", 0)),
-            int(prospect.get("fit_score", 0)),
-            scores.get("explanation", {}).get("most_similar_client", "N/A"),
-            scores.get("explanation", {}).get("similarity_explanation", ""),
-            "new",
-            datetime.now()
-        )
+        await conn.execute(f"""
+            INSERT INTO prospects ({", ".join(PROSPECT_COLUMNS)})
+            VALUES ({", ".join(f"${i}" for i in range(1, len(PROSPECT_COLUMNS) + 1))})
+        """, *build_prospect_record(prospect_id, prospect, city, scores))
         
         print(f"[DATABASE] ✅ Saved to Postgres: {prospect.get('name')} ({city}) - Score: {scores.get('final_score', 0):.1f}")
     
     return {"status": "saved", "id": prospect_id, "prospect": prospect}
 
 
+# Values build_prospect_record writes for data a prospect does not have (column -> SQL literals).
+# bulk_upsert_prospects never overwrites a stored value with one of these.
+EMPTY_PROSPECT_VALUES = {
+    "country": ("''", "'Unknown'"),
+    "country_code": ("''", "'XX'"),
+    "store_count": ("0",),
+    "avg_suit_price_eur": ("0",),
+    "brand_style": ("''", "'unknown'"),
+    "business_model": ("''", "'unknown'"),
+    "company_overview": ("''",),
+    "detailed_description": ("''",),
+    "store_locations": ("'[]'::jsonb",),
+    "material_composition": ("'[]'::jsonb",),
+    "sustainability_certs": ("'[]'::jsonb",),
+    "heritage_brand": ("FALSE",),
+    "quality_score": ("0",),
+    "location_score": ("0",),
+    "location_quality": ("'standard'",),
+    "fit_score": ("0",),
+}
+
+def _upsert_assignment(column: str) -> str:
+    """SET clause of bulk_upsert_prospects for one column."""
+    if column in EMPTY_PROSPECT_VALUES:
+        empty = ", ".join(EMPTY_PROSPECT_VALUES[column])
+        return f"{column} = CASE WHEN EXCLUDED.{column} IS NULL OR EXCLUDED.{column} IN ({empty}) THEN prospects.{column} ELSE EXCLUDED.{column} END"
+    if column == "name":
+        # Rows without a name are named after their domain
+        return "name = CASE WHEN EXCLUDED.name = EXCLUDED.domain THEN prospects.name ELSE EXCLUDED.name END"
+    if column == "similarity_explanation":
+        # An explanation of the same client match is kept (discovery writes LLM text, imports a template)
+        return ("similarity_explanation = CASE WHEN prospects.most_similar_client = EXCLUDED.most_similar_client "
+                "AND COALESCE(prospects.similarity_explanation, '') <> '' "
+                "THEN prospects.similarity_explanation ELSE EXCLUDED.similarity_explanation END")
+    return f"{column} = EXCLUDED.{column}"
+
+
+async def get_prospects_by_domain_city(keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+    """Stored prospects for (domain, normalized city) keys, the oldest row per key."""
+    if not keys:
+        return {}
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT DISTINCT ON (p.domain, p.city)
+                   p.id, p.domain, p.city, p.name, p.country, p.country_code, p.store_count,
+                   p.avg_suit_price_eur, p.material_composition, p.made_to_measure
+            FROM prospects p
+            JOIN unnest($1::text[], $2::text[]) AS k(domain, city)
+              ON p.domain = k.domain AND p.city = k.city
+            ORDER BY p.domain, p.city, p.discovered_at
+        """, [k[0] for k in keys], [k[1] for k in keys])
+    return {(row["domain"], row["city"]): dict(row) for row in rows}
+
+
+async def bulk_upsert_prospects(items: List[Tuple[Dict, str, Dict]]) -> Dict:
+    """
+    Upsert many scored prospects at once: COPY into a temp table, then a single
+    INSERT ... ON CONFLICT. Items are (prospect, city, scores) tuples.
+    
+    Rows are keyed by (domain, city) like save_prospect: an existing prospect for the
+    same domain keeps its id, status, notes and discovery date. Its score columns are
+    replaced; other columns only take values that are not empty (EMPTY_PROSPECT_VALUES),
+    so a sparse import does not erase what discovery stored. Score the prospects on
+    their merged data (see import_service.merge_stored_prospect).
+    """
+    # Deduplicate within the batch (ON CONFLICT cannot touch the same row twice)
+    unique: Dict[Tuple[str, str], Tuple[Dict, str, Dict]] = {}
+    for prospect, city, scores in items:
+        key = (extract_domain(prospect.get("website_url", "")), normalize_city(city))
+        if key[0] and key not in unique:
+            unique[key] = (prospect, city, scores)
+    if not unique:
+        return {"inserted": 0, "updated": 0}
+    
+    update_columns = [c for c in PROSPECT_COLUMNS if c not in ("id", "status", "discovered_at")]
+    
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            existing = await conn.fetch("""
+                SELECT DISTINCT ON (p.domain, p.city) p.id, p.domain, p.city
+                FROM prospects p
+                JOIN unnest($1::text[], $2::text[]) AS k(domain, city)
+                  ON p.domain = k.domain AND p.city = k.city
+                ORDER BY p.domain, p.city, p.discovered_at
+            """, [k[0] for k in unique], [k[1] for k in unique])
+            existing_ids = {(row["domain"], row["city"]): row["id"] for row in existing}
+            
+            records = []
+            for key, (prospect, city, scores) in unique.items():
+                prospect_id = existing_ids.get(key) or generate_prospect_id(
+                    normalize_url(prospect.get("website_url", "")), key[1]
+                )
+                records.append(build_prospect_record(prospect_id, prospect, city, scores))
+            
+            await conn.execute(
+                "CREATE TEMP TABLE prospects_staging (LIKE prospects INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table("prospects_staging", records=records, columns=PROSPECT_COLUMNS)
+            await conn.execute(f"""
+                INSERT INTO prospects ({", ".join(PROSPECT_COLUMNS)})
+                SELECT {", ".join(PROSPECT_COLUMNS)} FROM prospects_staging
+                ON CONFLICT (id) DO UPDATE SET
+                    {", ".join(_upsert_assignment(c) for c in update_columns)},
+                    updated_at = CURRENT_TIMESTAMP
+            """)
+    
+    return {"inserted": len(records) - len(existing_ids), "updated": len(existing_ids)}
+
+
 async def get_prospects_by_city(city: str, limit: int = 25) -> List[Dict]:
     """
     Get all prospects for a specific city, ordered by score.
@@ -196,7 +333,7 @@ async def get_prospects_by_city(city: str, limit: int = 25) -> List[Dict]:
             LIMIT $2
         """, normalized_city, limit)
         
-        return [dict(row) for row in rows]
+        return [prospect_row_to_dict(row) for row in rows]
 
 
 async def city_has_results(city: str) -> bool:
@@ -225,14 +362,14 @@ async def get_all_prospects(limit: int = 100) -> List[Dict]:
             ORDER BY domain, final_score DESC
             LIMIT $1
         """, limit)
-        return [dict(row) for row in rows]
+        return [prospect_row_to_dict(row) for row in rows]
 
 
 # ============================================================================
 # ADVANCED FILTERING SYSTEM
 # ============================================================================
 
-async def get_prospects_filtered(
+def build_prospect_where_clause(
     # Location filters
     city: Optional[str] = None,
     country: Optional[str] = None,
@@ -263,17 +400,9 @@ async def get_prospects_filtered(
     # Text search
     search_name: Optional[str] = None,
     similar_to_client: Optional[str] = None,
-    
-    # Sorting
-    sort_by: str = "final_score",
-    sort_order: str = "desc",
-    
-    # Pagination
-    limit: int = 25,
-    offset: int = 0,
-) -> Dict:
+) -> Tuple[str, List[Any]]:
     """
-    Advanced filtering for prospects with multiple criteria.
+    Build the WHERE clause (and its positional params) shared by listing and export queries.
     """
     conditions = []
     params = []
@@ -361,7 +490,11 @@ async def get_prospects_filtered(
         conditions.append(f"LOWER(most_similar_client) LIKE ${len(params)}")
     
     where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
-    
+    return where_clause, params
+
+
+def resolve_prospect_sort(sort_by: str, sort_order: str) -> Tuple[str, str]:
+    """Validate sort column/direction against the allowed set."""
     valid_sort_columns = [
         "final_score", "store_count", "avg_suit_price_eur", 
         "discovered_at", "name", "quality_score", "similarity_score"
@@ -370,6 +503,64 @@ async def get_prospects_filtered(
         sort_by = "final_score"
     
     sort_direction = "DESC" if sort_order.lower() == "desc" else "ASC"
+    return sort_by, sort_direction
+
+
+async def get_prospects_filtered(
+    # Location filters
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    country_code: Optional[str] = None,
+    
+    # Store count filters
+    min_stores: Optional[int] = None,
+    max_stores: Optional[int] = None,
+    
+    # Price filters (EUR)
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    
+    # Score filters
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    min_quality_score: Optional[float] = None,
+    min_similarity_score: Optional[float] = None,
+    
+    # Categorical filters
+    status: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    brand_style: Optional[str] = None,
+    brand_styles: Optional[List[str]] = None,
+    business_model: Optional[str] = None,
+    made_to_measure: Optional[str] = None,
+    
+    # Text search
+    search_name: Optional[str] = None,
+    similar_to_client: Optional[str] = None,
+    
+    # Sorting
+    sort_by: str = "final_score",
+    sort_order: str = "desc",
+    
+    # Pagination
+    limit: int = 25,
+    offset: int = 0,
+) -> Dict:
+    """
+    Advanced filtering for prospects with multiple criteria.
+    """
+    where_clause, params = build_prospect_where_clause(
+        city=city, country=country, country_code=country_code,
+        min_stores=min_stores, max_stores=max_stores,
+        min_price=min_price, max_price=max_price,
+        min_score=min_score, max_score=max_score,
+        min_quality_score=min_quality_score, min_similarity_score=min_similarity_score,
+        status=status, statuses=statuses,
+        brand_style=brand_style, brand_styles=brand_styles,
+        business_model=business_model, made_to_measure=made_to_measure,
+        search_name=search_name, similar_to_client=similar_to_client,
+    )
+    sort_by, sort_direction = resolve_prospect_sort(sort_by, sort_order)
     
     pool = await PostgresManager.get_pool()
     async with pool.acquire() as conn:
@@ -385,7 +576,7 @@ async def get_prospects_filtered(
             LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
         """
         rows = await conn.fetch(query, *params, limit, offset)
-        prospects = [dict(row) for row in rows]
+        prospects = [prospect_row_to_dict(row) for row in rows]
         
         count_query = f"SELECT COUNT(DISTINCT domain) FROM prospects {where_clause}"
         total_count = await conn.fetchval(count_query, *params)
@@ -402,6 +593,41 @@ async def get_prospects_filtered(
     }
 
 
+async def iter_prospects_filtered(
+    sort_by: str = "final_score",
+    sort_order: str = "desc",
+    prefetch: int = 500,
+    columns: Optional[Sequence[str]] = None,
+    **filters,
+) -> AsyncIterator[Dict]:
+    """
+    Stream every prospect matching the filters through a server-side cursor.
+    Same filters and domain deduplication as get_prospects_filtered but without
+    pagination; only `prefetch` rows are held in memory at a time.
+    `columns` limits the SELECT (domain, id and the sort key are always added), so
+    callers that don't need profile_embedding don't pull it over the wire.
+    """
+    where_clause, params = build_prospect_where_clause(**filters)
+    sort_by, sort_direction = resolve_prospect_sort(sort_by, sort_order)
+    selected = ", ".join(dict.fromkeys([*columns, "domain", "id", sort_by])) if columns else "*"
+    
+    query = f"""
+        SELECT * FROM (
+            SELECT DISTINCT ON (domain) {selected} FROM prospects
+            {where_clause}
+            ORDER BY domain, {sort_by} {sort_direction}
+        ) sub
+        ORDER BY {sort_by} {sort_direction}, id
+    """
+    
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        # asyncpg cursors only live inside a transaction
+        async with conn.transaction(readonly=True):
+            async for row in conn.cursor(query, *params, prefetch=prefetch):
+                yield prospect_row_to_dict(row)
+
+
 # ============================================================================
 # AGGREGATION & ANALYTICS
 # ============================================================================
@@ -614,7 +840,7 @@ async def get_prospect_by_id(prospect_id: str) -> Optional[Dict]:
     pool = await PostgresManager.get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow("SELECT * FROM prospects WHERE id = $1", prospect_id)
-        return dict(row) if row else None
+        return prospect_row_to_dict(row) if row else None
 
 
 async def delete_prospect(prospect_id: str):
@@ -631,14 +857,12 @@ async def delete_prospect(prospect_id: str):
 # ============================================================================
 
 async def is_domain_suppressed(domain: str) -> bool:
-    """Check if a domain is in the suppression list."""
-    pool = await PostgresManager.get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "SELECT 1 FROM suppression_list WHERE domain = $1",
-            domain.lower().strip()
-        )
-        return row is not None
+    """Check if a domain is in the suppression list (served from the in-memory mirror)."""
+    return await suppression_list.is_suppressed(domain)
+
+async def filter_suppressed(domains: List[str]) -> List[str]:
+    """Return only the domains that are NOT in the suppression list."""
+    return await suppression_list.filter_suppressed(domains)
 
 async def add_to_suppression_list(domain: str, reason: str = "Unsubscribed"):
     """Add a domain to the suppression list."""
@@ -648,6 +872,7 @@ async def add_to_suppression_list(domain: str, reason: str = "Unsubscribed"):
             "INSERT INTO suppression_list (domain, reason) VALUES ($1, $2) ON CONFLICT (domain) DO NOTHING",
             domain.lower().strip(), reason
         )
+    suppression_list.add_local(domain)
 
 
 async def process_and_save_prospects(
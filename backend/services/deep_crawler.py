@@ -0,0 +1,253 @@
+"""
+Deep Crawler
+Bounded breadth-first crawl of a brand's site for what its homepage lacks: suit
+prices, store count (store locator) and fabric (product / fabric pages).
+
+- Links are ranked with the suit/shop keyword scorer (score_link); store and
+  fabric vocabulary only counts while that signal is still missing, and
+  login/cart/checkout links are never followed; links come from the HTML or
+  the markdown the providers return (services/link_extractor.py)
+- Only same-site links; each level fetches the best DEEP_CRAWL_PER_LEVEL
+  unvisited links concurrently (provider fallbacks and per-domain politeness
+  come from the fetch function, normally batch_extract_content)
+- Per-site budget: DEEP_CRAWL_MAX_PAGES pages, DEEP_CRAWL_MAX_DEPTH levels,
+  DEEP_CRAWL_MAX_CHARS characters of content and DEEP_CRAWL_TIME_BUDGET_S seconds
+- Stops early once price, store count and fabric have all been found
+- Pages that contributed a signal are appended to the homepage content as
+  "=== DEEP DIVE: ... ===" sections (the format price extraction and the
+  selection prompt already read)
+"""
+import asyncio
+import re
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from config import Config
+from models import ExtractedContent
+from services.price_extractor import has_price
+from services.link_extractor import scored_links
+from services.url_utils import normalize_url
+
+SIGNALS = ("price", "stores", "fabric")
+
+# Link vocabulary per signal: "strong" words score 10 in the link text / 5 in the
+# href, "weak" ones 2 / 1 (the original suit/shop scorer is the "price" entry)
+LINK_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "price": {
+        "strong": ['suit', 'fatos', 'fato', 'traje', 'abito', 'tailoring', 'sartorial', 'ceremony', 'wedding'],
+        "weak": ['shop', 'store', 'collection', 'loja', 'comprar', 'boutique', 'catalog'],
+    },
+    "stores": {
+        "strong": ['stores', 'store locator', 'store-locator', 'find a store', 'our shops', 'lojas', 'tiendas',
+                   'negozi', 'boutiques', 'locations', 'showrooms'],
+        "weak": ['contact', 'contacto', 'contatti', 'visit', 'about', 'sobre'],
+    },
+    "fabric": {
+        "strong": ['fabric', 'fabrics', 'tecidos', 'tessuti', 'telas', 'cloth', 'wool', 'materials'],
+        "weak": ['made-to-measure', 'made to measure', 'bespoke', 'medida', 'misura', 'product'],
+    },
+}
+NEGATIVE_LINK_KEYWORDS = ['login', 'account', 'cart', 'basket', 'checkout']
+MIN_LINK_SCORE = 2
+
+
+def _any_of(keywords: List[str]) -> "re.Pattern":
+    """One regex matching wherever any of the keywords is a substring."""
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+
+_LINK_PATTERNS = {signal: {k: _any_of(v) for k, v in keywords.items()} for signal, keywords in LINK_KEYWORDS.items()}
+_NEGATIVE_LINK = _any_of(NEGATIVE_LINK_KEYWORDS)
+
+# A stated number of stores; store locator pages are recognized by their URL instead
+# ("Our stores" alone is usually just a menu link)
+_STORE_COUNT = re.compile(
+    r"\b\d{1,3}\s+(?:stores|shops|boutiques|showrooms|locations|lojas|tiendas|negozi|filiais)\b",
+    re.IGNORECASE,
+)
+_FABRIC = re.compile(
+    r"\b\d{2,3}\s?%\s?(?:wool|lã|lana|laine|wolle|cashmere)\b|\bsuper\s?1[0-9]0'?s\b|\bpure (?:new )?wool\b"
+    r"|\b(?:loro piana|vitale barberis|ermenegildo zegna|dormeuil|holland & sherry|scabal|reda|cerruti|drapers)\b",
+    re.IGNORECASE,
+)
+
+STORE_PAGE_PATHS = ('store-locator', 'storelocator', 'stores', 'boutiques', 'lojas', 'tiendas', 'negozi', 'locations')
+
+DEEP_DIVE_LABELS = {"price": "SUITS PAGE", "stores": "STORES PAGE", "fabric": "FABRIC PAGE"}
+
+# Process-wide totals (see get_deep_crawl_stats)
+_stats: Counter = Counter()
+
+Fetch = Callable[[List[str]], Awaitable[List[ExtractedContent]]]
+SiteSearch = Callable[[str], Awaitable[Optional[str]]]
+
+
+# ============================================================================
+# SIGNALS & LINK RANKING
+# ============================================================================
+
+def found_signals(url: str, content: Optional[str]) -> Set[str]:
+    """Which of price / stores / fabric a page provides."""
+    if not content:
+        return set()
+    found = set()
+    if has_price(content):
+        found.add("price")
+    path = urlparse(url).path.lower()
+    if _STORE_COUNT.search(content) or any(k in path for k in STORE_PAGE_PATHS):
+        found.add("stores")
+    if _FABRIC.search(content):
+        found.add("fabric")
+    return found
+
+
+def score_link(href: str, text: str, wanted: Tuple[str, ...] = ("price",)) -> int:
+    """Keyword score of a link for the wanted signals (negative for account/cart links)."""
+    href, text = href.lower(), text.lower()
+    score = 0
+    for signal in wanted:
+        strong, weak = _LINK_PATTERNS[signal]["strong"], _LINK_PATTERNS[signal]["weak"]
+        score += (10 if strong.search(text) else 0) + (5 if strong.search(href) else 0) + \
+                 (2 if weak.search(text) else 0) + (1 if weak.search(href) else 0)
+    if _NEGATIVE_LINK.search(href):
+        score -= 50
+    return score
+
+
+def rank_links(content: str, base_url: str, wanted: Tuple[str, ...] = ("price",)) -> List[Tuple[int, str]]:
+    """(score, absolute URL) of same-site links scoring at least MIN_LINK_SCORE, best first."""
+    return scored_links(content, base_url, lambda href, text: score_link(href, text, wanted), MIN_LINK_SCORE)
+
+
+# ============================================================================
+# CRAWL
+# ============================================================================
+
+def _budget() -> Dict[str, float]:
+    return {
+        "pages": Config.DEEP_CRAWL_MAX_PAGES,
+        "per_level": Config.DEEP_CRAWL_PER_LEVEL,
+        "depth": Config.DEEP_CRAWL_MAX_DEPTH,
+        "chars": Config.DEEP_CRAWL_MAX_CHARS,
+        "seconds": Config.DEEP_CRAWL_TIME_BUDGET_S,
+    }
+
+
+async def deep_crawl(item: ExtractedContent, fetch: Fetch, site_search: Optional[SiteSearch] = None) -> Dict:
+    """
+    Crawl one site from its homepage content.
+    Returns {"item": ExtractedContent (homepage + deep dive sections), "signals": [...],
+             "pages": n fetched, "chars": n, "stopped": complete / exhausted / depth / pages / chars / time}.
+    """
+    budget = _budget()
+    started = time.monotonic()
+    signals = found_signals(item.url, item.content)
+    visited = {normalize_url(item.url)}
+    sections: List[str] = []
+    pages = chars = 0
+
+    def missing() -> Tuple[str, ...]:
+        return tuple(s for s in SIGNALS if s not in signals)
+
+    frontier = [url for _, url in rank_links(item.content, item.url, missing())]
+    if not frontier and "price" in missing() and site_search is not None:
+        found = await site_search(item.url)
+        if found:
+            frontier = [found]
+
+    stopped = "complete" if not missing() else "exhausted"
+    depth = 0
+    while missing() and frontier:
+        depth += 1
+        if depth > budget["depth"]:
+            stopped = "depth"
+            break
+        if pages >= budget["pages"]:
+            stopped = "pages"
+            break
+        time_left = budget["seconds"] - (time.monotonic() - started)
+        if time_left <= 0:
+            stopped = "time"
+            break
+
+        batch = []
+        for url in frontier:
+            key = normalize_url(url)
+            if key not in visited and len(batch) < min(budget["per_level"], budget["pages"] - pages):
+                visited.add(key)
+                batch.append(url)
+        if not batch:
+            break
+        try:
+            results = await asyncio.wait_for(fetch(batch), timeout=time_left)
+        except asyncio.TimeoutError:
+            stopped = "time"
+            break
+        pages += len(batch)
+
+        next_level: Dict[str, int] = {}
+        for page in results:
+            if not page.content:
+                continue
+            chars += len(page.content)
+            new = found_signals(page.url, page.content) - signals
+            if new:
+                signals |= new
+                label = " + ".join(DEEP_DIVE_LABELS[s] for s in SIGNALS if s in new)
+                sections.append(f"{'='*40}\n=== DEEP DIVE: {label} ===\nURL: {page.url}\n{page.content}")
+            for score, url in rank_links(page.content, page.url, missing()):
+                next_level[url] = max(score, next_level.get(url, 0))
+            if chars >= budget["chars"]:
+                break
+        if chars >= budget["chars"]:
+            stopped = "chars"
+            break
+        frontier = sorted(next_level, key=next_level.get, reverse=True)
+        stopped = "complete" if not missing() else "exhausted"
+
+    _stats["sites"] += 1
+    _stats["pages"] += pages
+    _stats[f"stopped_{stopped}"] += 1
+    for signal in signals:
+        _stats[f"found_{signal}"] += 1
+
+    content = "\n\n".join([item.content] + sections) if sections else item.content
+    return {
+        "item": ExtractedContent(url=item.url, content=content),
+        "signals": [s for s in SIGNALS if s in signals],
+        "pages": pages,
+        "chars": chars,
+        "stopped": stopped,
+        "elapsed_s": round(time.monotonic() - started, 2),
+    }
+
+
+async def crawl_sites(contents: List[ExtractedContent], fetch: Fetch, site_search: Optional[SiteSearch] = None) -> List[ExtractedContent]:
+    """Deep crawl every page missing price, store or fabric data, all sites concurrently (order kept)."""
+    async def crawl(item: ExtractedContent) -> ExtractedContent:
+        if not item.content:
+            return item
+        try:
+            result = await deep_crawl(item, fetch, site_search)
+        except Exception as e:
+            print(f"[DEEP-CRAWL] ❌ {item.url}: {e}")
+            return item
+        if result["pages"]:
+            print(f"[DEEP-CRAWL] {item.url}: {result['pages']} pages, found {', '.join(result['signals']) or 'nothing'} ({result['stopped']})")
+        return result["item"]
+
+    return list(await asyncio.gather(*(crawl(item) for item in contents)))
+
+
+def get_deep_crawl_stats() -> Dict:
+    """Pages fetched, signals found and stop reasons since startup."""
+    sites = _stats["sites"]
+    return {
+        "sites": sites,
+        "pages": _stats["pages"],
+        "pages_per_site": round(_stats["pages"] / sites, 2) if sites else 0,
+        "found": {s: _stats[f"found_{s}"] for s in SIGNALS},
+        "stopped": {k[len("stopped_"):]: v for k, v in _stats.items() if k.startswith("stopped_")},
+    }
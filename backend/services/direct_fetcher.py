@@ -0,0 +1,274 @@
+"""
+Direct Fetcher
+Zero-cost first tier of page extraction: fetch the site ourselves and convert
+the HTML to markdown, before paying Firecrawl / Tavily / Jina.
+
+- One pooled httpx.AsyncClient (keep-alive, HTTP/2 when the h2 package is
+  installed, gzip/deflate/br as supported by httpx), redirects followed
+- Conditional requests: ETag / Last-Modified of fetched pages are kept
+  (DIRECT_FETCH_CACHE_ENTRIES, LRU) and a 304 reuses the stored markdown
+- Bodies are read up to DIRECT_FETCH_MAX_BYTES; non-HTML responses are skipped
+- html_to_markdown(): drops scripts, styles, forms and cookie banners and keeps
+  headings, paragraphs, list items, table rows and links (absolute URLs, so the
+  deep crawler can follow them)
+- Pages with less than DIRECT_FETCH_MIN_CHARS of text outside links (JS-rendered
+  shells, bot walls) return None and escalate to the paid providers
+
+Outcome counters (ok, not_modified, js_rendered, too_short, http_4xx, ...):
+direct_fetcher.stats()
+"""
+import asyncio
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+from bs4 import BeautifulSoup, Comment, Declaration, Doctype, NavigableString, ProcessingInstruction
+
+from config import Config
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:  # Optional dependency (httpx[http2])
+    HTTP2 = False
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # Optional dependency
+    HTML_PARSER = "html.parser"
+
+USER_AGENT = "Mozilla/5.0 (compatible; Confecos-Lanca-Prospector/1.0)"
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+DROP_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "form", "button", "select",
+             "input", "textarea", "object", "embed"]
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "header", "footer", "aside", "nav", "ul", "ol", "table",
+              "thead", "tbody", "tr", "blockquote", "pre", "figure", "figcaption", "dl", "dt", "dd", "address"}
+HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+CONSENT_MAX_CHARS = 3000
+_CONSENT = re.compile(r"cookie|consent|gdpr|onetrust|cookiebot", re.IGNORECASE)
+_JS_SHELL = re.compile(
+    r"""id=["'](?:root|app|__next|__nuxt)["']|data-reactroot|ng-version|enable javascript|requires javascript""",
+    re.IGNORECASE,
+)
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_SPACES = re.compile(r"[ \t\r\f\v\u00a0]+")
+_SKIPPED_STRINGS = (Comment, Declaration, Doctype, ProcessingInstruction)
+
+
+# ============================================================================
+# HTML -> MARKDOWN
+# ============================================================================
+
+class _MarkdownWriter:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.blocks: List[str] = []
+        self.inline: List[str] = []
+
+    def flush(self, prefix: str = ""):
+        line = _SPACES.sub(" ", "".join(self.inline).replace("\n", " ")).strip(" |")
+        self.inline = []
+        if line:
+            self.blocks.append(prefix + line)
+
+    def walk(self, node):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, _SKIPPED_STRINGS):
+                    self.inline.append(str(child))
+                continue
+            name = child.name
+            if name in HEADINGS:
+                self.flush()
+                text = _SPACES.sub(" ", child.get_text(" ", strip=True))
+                if text:
+                    self.blocks.append(f"{'#' * HEADINGS[name]} {text}")
+            elif name == "a":
+                text = _SPACES.sub(" ", child.get_text(" ", strip=True))
+                href = (child.get("href") or "").strip()
+                if text and href and not href.startswith("#") and not href.lower().startswith(("javascript", "mailto:", "tel:")):
+                    self.inline.append(f" [{text}]({urljoin(self.base_url, href)}) ")
+                elif text:
+                    self.inline.append(f" {text} ")
+            elif name == "br":
+                self.flush()
+            elif name == "img":
+                continue
+            elif name == "li":
+                self.flush()
+                self.walk(child)
+                self.flush("* ")
+            elif name in ("td", "th"):
+                self.walk(child)
+                self.inline.append(" | ")
+            elif name in BLOCK_TAGS:
+                self.flush()
+                self.walk(child)
+                self.flush()
+            else:
+                self.walk(child)
+
+    def markdown(self) -> str:
+        self.flush()
+        parts = []
+        for i, block in enumerate(self.blocks):
+            if i:
+                list_run = block.startswith("* ") and self.blocks[i - 1].startswith("* ")
+                parts.append("\n" if list_run else "\n\n")
+            parts.append(block)
+        return "".join(parts)
+
+
+def html_to_markdown(html, base_url: str, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """(markdown, title) of an HTML document (bytes or str)."""
+    soup = BeautifulSoup(html, HTML_PARSER, from_encoding=encoding if isinstance(html, bytes) else None)
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    for tag in soup(DROP_TAGS):
+        tag.decompose()
+    # Cookie banners (small elements only: a page wrapper may carry a "cookie-..." class)
+    for tag in soup.find_all(id=_CONSENT) + soup.find_all(class_=_CONSENT):
+        if not tag.decomposed and tag.name not in ("html", "body") and len(tag.get_text()) < CONSENT_MAX_CHARS:
+            tag.decompose()
+
+    writer = _MarkdownWriter(base_url)
+    root = soup.body or soup
+    try:
+        writer.walk(root)
+        markdown = writer.markdown()
+    except RecursionError:  # Pathologically nested markup
+        markdown = _SPACES.sub(" ", root.get_text("\n", strip=True))
+    if title and not markdown.startswith("# "):
+        markdown = f"# {title}\n\n{markdown}"
+    return markdown, title
+
+
+def text_chars(markdown: str) -> int:
+    """Characters of text outside link markup (menus alone do not count as content)."""
+    return len(_SPACES.sub(" ", _MARKDOWN_LINK.sub("", markdown)).strip())
+
+
+# ============================================================================
+# FETCHER
+# ============================================================================
+
+class DirectFetcher:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._validators: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stats: Counter = Counter()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """One pooled client per event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                http2=HTTP2,
+                follow_redirects=True,
+                max_redirects=5,
+                timeout=httpx.Timeout(Config.DIRECT_FETCH_TIMEOUT_S, connect=5.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+                    "Accept-Language": "en,pt;q=0.8,es;q=0.6,it;q=0.6,fr;q=0.5",
+                },
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except RuntimeError:  # Client of a loop that is already closed
+                pass
+            self._client = None
+
+    def _remember(self, url: str, response: httpx.Response, markdown: str):
+        etag, modified = response.headers.get("etag"), response.headers.get("last-modified")
+        if not etag and not modified:
+            return
+        self._validators[url] = {"etag": etag, "last_modified": modified, "markdown": markdown}
+        self._validators.move_to_end(url)
+        while len(self._validators) > Config.DIRECT_FETCH_CACHE_ENTRIES:
+            self._validators.popitem(last=False)
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Markdown of the page, or None when it should go to the paid providers."""
+        if not Config.DIRECT_FETCH_ENABLED:
+            return None
+        started = time.perf_counter()
+        outcome, markdown = await self._fetch(url)
+        self._stats[outcome] += 1
+        self._stats["ms"] += round((time.perf_counter() - started) * 1000)
+        if markdown is None:
+            print(f"[DIRECT] ⏭️ {outcome}: {url}")
+        return markdown
+
+    async def _fetch(self, url: str) -> Tuple[str, Optional[str]]:
+        headers = {}
+        cached = self._validators.get(url)
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            async with self._get_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    self._validators.move_to_end(url)
+                    return "not_modified", cached["markdown"]
+                if response.status_code != 200:
+                    return f"http_{response.status_code // 100}xx", None
+                content_type = response.headers.get("content-type", "").lower()
+                if content_type and not content_type.startswith(HTML_TYPES):
+                    return "not_html", None
+
+                body, truncated = bytearray(), False
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= Config.DIRECT_FETCH_MAX_BYTES:
+                        truncated = True
+                        break
+                self._stats["bytes"] += len(body)
+                self._stats["truncated"] += truncated
+                self._stats[f"http/{response.http_version}"] += 1
+                encoding = response.charset_encoding
+        except httpx.TimeoutException:
+            return "timeout", None
+        except (httpx.HTTPError, ValueError) as e:
+            return f"error_{type(e).__name__}", None
+
+        head = bytes(body[:20000]).decode("utf-8", errors="ignore")
+        markdown, _ = await asyncio.to_thread(html_to_markdown, bytes(body), str(response.url), encoding)
+        if text_chars(markdown) < Config.DIRECT_FETCH_MIN_CHARS:
+            return ("js_rendered" if _JS_SHELL.search(head) else "too_short"), None
+        self._remember(url, response, markdown)
+        return "ok", markdown
+
+    def stats(self) -> Dict[str, Any]:
+        fetched = sum(v for k, v in self._stats.items() if k not in ("bytes", "ms", "truncated") and not k.startswith("http/"))
+        served = self._stats["ok"] + self._stats["not_modified"]
+        return {
+            "enabled": Config.DIRECT_FETCH_ENABLED,
+            "http2_available": HTTP2,
+            "fetched": fetched,
+            "served": served,
+            "served_ratio": round(served / fetched, 3) if fetched else 0,
+            "avg_ms": round(self._stats["ms"] / fetched, 1) if fetched else 0,
+            "mb_downloaded": round(self._stats["bytes"] / 1e6, 2),
+            "outcomes": {k: v for k, v in self._stats.items() if k not in ("bytes", "ms") and not k.startswith("http/")},
+            "protocols": {k[len("http/"):]: v for k, v in self._stats.items() if k.startswith("http/")},
+            "conditional_cache_entries": len(self._validators),
+        }
+
+
+# Singleton instance
+direct_fetcher = DirectFetcher()
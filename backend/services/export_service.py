@@ -0,0 +1,282 @@
+"""
+Prospect Export Service
+Streams filtered prospects as CSV, JSONL or Parquet with constant memory.
+
+Rows are read through a server-side cursor (see database.iter_prospects_filtered)
+and encoded in small chunks / Parquet row-groups as they arrive.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+from models import ExportFormat, PriceRange, ProspectFilters, StoreSize
+from .database import iter_prospects_filtered
+
+# Columns written to every export (internal columns such as embeddings are left out)
+EXPORT_COLUMNS = [
+    "id", "name", "website_url", "domain", "city", "country", "country_code",
+    "store_count", "avg_suit_price_eur", "brand_style", "business_model",
+    "company_overview", "detailed_description", "store_locations",
+    "material_composition", "sustainability_certs", "made_to_measure",
+    "heritage_brand", "quality_score", "similarity_score", "location_score",
+    "location_quality", "final_score", "fit_score", "most_similar_client",
+    "similarity_explanation", "status", "notes", "discovered_at", "updated_at",
+]
+
+JSON_LIST_COLUMNS = {"store_locations", "material_composition", "sustainability_certs"}
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.JSONL: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+CSV_FLUSH_ROWS = 500
+PARQUET_ROW_GROUP_SIZE = 5000
+
+STORE_SIZE_RANGES = {
+    StoreSize.BOUTIQUE: (1, 5),
+    StoreSize.MEDIUM: (6, 20),
+    StoreSize.LARGE: (21, None),
+}
+
+PRICE_RANGES = {
+    PriceRange.UNDER_500: (None, 499.99),
+    PriceRange.RANGE_500_1000: (500, 1000),
+    PriceRange.RANGE_1000_2000: (1000, 2000),
+    PriceRange.OVER_2000: (2000, None),
+    PriceRange.NO_PRICE: (None, 0),
+}
+
+
+# ============================================================================
+# FILTERS
+# ============================================================================
+
+def filters_to_query_kwargs(filters: ProspectFilters) -> Dict[str, Any]:
+    """
+    Translate a ProspectFilters model into database filter kwargs.
+    Presets (store_size, price_range) only apply when explicit bounds are not given.
+    """
+    min_stores, max_stores = filters.min_stores, filters.max_stores
+    if filters.store_size in STORE_SIZE_RANGES and min_stores is None and max_stores is None:
+        min_stores, max_stores = STORE_SIZE_RANGES[filters.store_size]
+
+    min_price, max_price = filters.min_price, filters.max_price
+    if filters.price_range in PRICE_RANGES and min_price is None and max_price is None:
+        min_price, max_price = PRICE_RANGES[filters.price_range]
+
+    return {
+        "city": filters.city,
+        "country": filters.country,
+        "country_code": filters.country_code,
+        "min_stores": min_stores,
+        "max_stores": max_stores,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_score": filters.min_score,
+        "max_score": filters.max_score,
+        "min_quality_score": filters.min_quality_score,
+        "min_similarity_score": filters.min_similarity_score,
+        "status": filters.status.value if filters.status else None,
+        "statuses": [s.value for s in filters.statuses] if filters.statuses else None,
+        "brand_style": filters.brand_style,
+        "brand_styles": filters.brand_styles,
+        "business_model": filters.business_model,
+        "made_to_measure": filters.made_to_measure,
+        "search_name": filters.search_name,
+        "similar_to_client": filters.similar_to_client,
+    }
+
+
+# ============================================================================
+# ROW NORMALIZATION
+# ============================================================================
+
+def _parse_json_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [value]
+    return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+
+
+def normalize_export_row(row: Dict) -> Dict:
+    """Project a prospects row onto EXPORT_COLUMNS with JSON lists decoded."""
+    out = {}
+    for col in EXPORT_COLUMNS:
+        value = row.get(col)
+        if col in JSON_LIST_COLUMNS:
+            value = _parse_json_list(value)
+        out[col] = value
+    return out
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# ============================================================================
+# ENCODERS
+# ============================================================================
+
+async def _encode_csv(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    async for row in rows:
+        values = []
+        for col in EXPORT_COLUMNS:
+            value = row[col]
+            if col in JSON_LIST_COLUMNS:
+                value = json.dumps(value, ensure_ascii=False)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append("" if value is None else value)
+        writer.writerow(values)
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+async def _encode_jsonl(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=_json_default))
+        if len(lines) >= CSV_FLUSH_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the stream."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    string_list = pa.list_(pa.string())
+    types = {
+        "store_count": pa.int64(),
+        "avg_suit_price_eur": pa.float64(),
+        "store_locations": string_list,
+        "material_composition": string_list,
+        "sustainability_certs": string_list,
+        "made_to_measure": pa.bool_(),
+        "heritage_brand": pa.bool_(),
+        "quality_score": pa.int64(),
+        "similarity_score": pa.int64(),
+        "location_score": pa.int64(),
+        "final_score": pa.int64(),
+        "fit_score": pa.int64(),
+        "discovered_at": pa.timestamp("us", tz="UTC"),
+        "updated_at": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(col, types.get(col, pa.string())) for col in EXPORT_COLUMNS])
+
+
+async def _encode_parquet(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        batch: List[Dict] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    ExportFormat.CSV: _encode_csv,
+    ExportFormat.JSONL: _encode_jsonl,
+    ExportFormat.PARQUET: _encode_parquet,
+}
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def is_format_available(fmt: ExportFormat) -> bool:
+    """Parquet needs pyarrow; CSV/JSONL are always available."""
+    if fmt != ExportFormat.PARQUET:
+        return True
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+async def _normalized_rows(filters: ProspectFilters) -> AsyncIterator[Dict]:
+    async for row in iter_prospects_filtered(
+        sort_by=filters.sort_by.value,
+        sort_order=filters.sort_order.value,
+        columns=EXPORT_COLUMNS,
+        **filters_to_query_kwargs(filters),
+    ):
+        yield normalize_export_row(row)
+
+
+async def stream_prospects_export(filters: ProspectFilters, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Stream every prospect matching `filters` encoded as `fmt`.
+    Pagination fields (limit/offset) are ignored: exports always cover the full result set.
+    """
+    count = 0
+
+    async def counted_rows():
+        nonlocal count
+        async for row in _normalized_rows(filters):
+            count += 1
+            yield row
+
+    async for chunk in ENCODERS[fmt](counted_rows()):
+        if chunk:
+            yield chunk
+    print(f"[EXPORT] ✅ Exported {count} prospects as {fmt.value}")
@@ -0,0 +1,224 @@
+"""
+Fetch Scheduler
+Per-domain politeness for page fetches (Firecrawl scrapes, Jina fallbacks, deep
+price discovery): boutique sites often run on fragile shared hosting.
+
+- Each domain gets at most FETCH_DOMAIN_CONCURRENCY fetches in flight, and their
+  starts are at least FETCH_DOMAIN_DELAY_S apart (or the site's robots.txt
+  Crawl-delay / Request-rate, honoured up to FETCH_MAX_CRAWL_DELAY_S)
+- robots.txt is fetched once per domain and cached for ROBOTS_TTL_S (failures too)
+- map() interleaves URLs across domains (round-robin), and a URL waiting for its
+  domain holds no provider slot (services/resilience.py), so other domains keep
+  the providers busy
+- Queue depth, in-flight fetches and politeness wait: fetch_scheduler.stats()
+
+Usage:
+    contents = await fetch_scheduler.map(urls, firecrawl_service.extract_content)
+"""
+import asyncio
+import contextlib
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from config import Config
+
+USER_AGENT = "Confecos-Lanca-Prospector/1.0"
+ROBOTS_TTL_S = 24 * 3600
+ROBOTS_TIMEOUT_S = 5
+ROBOTS_MAX_BYTES = 512 * 1024
+MAX_ROBOTS_ENTRIES = 5000
+
+# urllib.robotparser only accepts whole seconds; fractional delays are rounded up
+_FRACTIONAL_DELAY = re.compile(r"^(\s*crawl-delay\s*:\s*)(\d*\.\d+)", re.IGNORECASE | re.MULTILINE)
+
+
+def _domain(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def interleave(urls: List[str]) -> List[int]:
+    """Indices of `urls` in round-robin order across domains (first-seen domain order)."""
+    by_domain: Dict[str, List[int]] = defaultdict(list)
+    for index, url in enumerate(urls):
+        by_domain[_domain(url)].append(index)
+    queues = list(by_domain.values())
+    order = []
+    for rank in range(max((len(q) for q in queues), default=0)):
+        order.extend(q[rank] for q in queues if rank < len(q))
+    return order
+
+
+class DomainState:
+    __slots__ = ("semaphore", "lock", "next_start", "waiting", "in_flight")
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+        self.waiting = 0
+        self.in_flight = 0
+
+
+class FetchScheduler:
+    def __init__(self):
+        self._domains: Dict[str, DomainState] = {}
+        self._robots: Dict[str, tuple] = {}  # domain -> (fetched_at, crawl delay or None)
+        self._robots_pending: Dict[str, asyncio.Task] = {}
+        self._loop = None
+        self._counters: Counter = Counter()
+        self.max_queued = 0
+
+    def _bind(self):
+        """asyncio primitives belong to one event loop; start over on a new one (robots cache is kept)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._domains, self._robots_pending = {}, {}
+
+    # ------------------------------------------------------------------
+    # ROBOTS.TXT
+    # ------------------------------------------------------------------
+
+    async def _fetch_robots(self, url: str) -> Optional[float]:
+        parsed = urlparse(url)
+        text = ""
+        try:
+            timeout = aiohttp.ClientTimeout(total=ROBOTS_TIMEOUT_S)
+            async with aiohttp.ClientSession(timeout=timeout, headers={"User-Agent": USER_AGENT}) as session:
+                async with session.get(f"{parsed.scheme or 'https'}://{parsed.netloc}/robots.txt") as response:
+                    if response.status == 200:
+                        text = (await response.content.read(ROBOTS_MAX_BYTES)).decode("utf-8", errors="replace")
+        except Exception:
+            self._counters["robots_errors"] += 1
+        self._counters["robots_fetched"] += 1
+
+        parser = RobotFileParser()
+        parser.parse(_FRACTIONAL_DELAY.sub(lambda m: f"{m.group(1)}{math.ceil(float(m.group(2)))}", text).splitlines())
+        delay = parser.crawl_delay(USER_AGENT)
+        rate = parser.request_rate(USER_AGENT)
+        if rate and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        if delay and delay > Config.FETCH_MAX_CRAWL_DELAY_S:
+            print(f"[FETCH] {parsed.netloc} asks for a {delay:g}s crawl delay, using {Config.FETCH_MAX_CRAWL_DELAY_S:g}s")
+            delay = Config.FETCH_MAX_CRAWL_DELAY_S
+        return float(delay) if delay else None
+
+    async def robots_delay(self, url: str) -> Optional[float]:
+        """The domain's robots.txt crawl delay in seconds, capped (None if unset or unavailable)."""
+        if not Config.FETCH_ROBOTS_TXT:
+            return None
+        domain = _domain(url)
+        cached = self._robots.get(domain)
+        if cached and time.monotonic() - cached[0] < ROBOTS_TTL_S:
+            return cached[1]
+
+        task = self._robots_pending.get(domain)
+        if task is None:
+            task = asyncio.create_task(self._fetch_robots(url))
+            self._robots_pending[domain] = task
+        try:
+            delay = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._robots_pending.pop(domain, None)
+        if len(self._robots) >= MAX_ROBOTS_ENTRIES:
+            self._robots.clear()
+        self._robots[domain] = (time.monotonic(), delay)
+        return delay
+
+    async def domain_delay(self, url: str) -> float:
+        """Minimum seconds between request starts on the URL's domain."""
+        return max(Config.FETCH_DOMAIN_DELAY_S, await self.robots_delay(url) or 0.0)
+
+    # ------------------------------------------------------------------
+    # SCHEDULING
+    # ------------------------------------------------------------------
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """async with: wait for the domain's concurrency limit and request spacing, then fetch."""
+        self._bind()
+        domain = _domain(url)
+        state = self._domains.get(domain)
+        if state is None:
+            state = self._domains[domain] = DomainState(Config.FETCH_DOMAIN_CONCURRENCY)
+        state.waiting += 1
+        self.max_queued = max(self.max_queued, sum(s.waiting for s in self._domains.values()))
+        queued_at = time.monotonic()
+        try:
+            delay = await self.domain_delay(url)
+            await state.semaphore.acquire()
+            try:
+                async with state.lock:
+                    now = time.monotonic()
+                    start = max(now, state.next_start)
+                    state.next_start = start + delay
+                if start > now:
+                    await asyncio.sleep(start - now)
+            except BaseException:
+                state.semaphore.release()
+                raise
+        finally:
+            state.waiting -= 1
+
+        self._counters["fetches"] += 1
+        self._counters["wait_ms"] += round((time.monotonic() - queued_at) * 1000)
+        state.in_flight += 1
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+            state.semaphore.release()
+
+    async def map(self, urls: List[str], fetch: Callable[[str], Awaitable[Any]]) -> List[Any]:
+        """fetch(url) for every URL under the per-domain limits; results in input order."""
+        async def run(url: str):
+            async with self.slot(url):
+                return await fetch(url)
+
+        order = interleave(urls)
+        values = await asyncio.gather(*(run(urls[i]) for i in order))
+        results: List[Any] = [None] * len(urls)
+        for index, value in zip(order, values):
+            results[index] = value
+        self._prune()
+        return results
+
+    def _prune(self):
+        """Drop idle domains whose spacing has elapsed."""
+        now = time.monotonic()
+        for domain in [d for d, s in self._domains.items() if not s.waiting and not s.in_flight and s.next_start <= now]:
+            del self._domains[domain]
+
+    def stats(self) -> Dict[str, Any]:
+        active = {d: s for d, s in self._domains.items() if s.waiting or s.in_flight}
+        busiest = sorted(active.items(), key=lambda item: (item[1].waiting, item[1].in_flight), reverse=True)[:10]
+        delays = [delay for _, delay in self._robots.values() if delay]
+        return {
+            "queued": sum(s.waiting for s in active.values()),
+            "in_flight": sum(s.in_flight for s in active.values()),
+            "active_domains": len(active),
+            "max_queued": self.max_queued,
+            "fetches": self._counters["fetches"],
+            "avg_wait_ms": round(self._counters["wait_ms"] / self._counters["fetches"], 1) if self._counters["fetches"] else 0,
+            "robots": {
+                "cached": len(self._robots),
+                "fetched": self._counters["robots_fetched"],
+                "errors": self._counters["robots_errors"],
+                "with_crawl_delay": len(delays),
+                "max_crawl_delay_s": max(delays, default=None),
+            },
+            "busiest_domains": [{"domain": d, "queued": s.waiting, "in_flight": s.in_flight} for d, s in busiest],
+        }
+
+
+# Singleton instance
+fetch_scheduler = FetchScheduler()
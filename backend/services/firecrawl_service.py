@@ -1,21 +1,41 @@
 """
 Firecrawl Service
-High-quality web scraping with Markdown conversion and rate limiting.
+High-quality web scraping with Markdown conversion.
+Rate limits, concurrency and the circuit breaker come from services/resilience.py ("firecrawl").
 """
 import asyncio
 from typing import List, Optional, Dict
-from firecrawl import FirecrawlApp
+from firecrawl import FirecrawlApp, FirecrawlError, DNSResolutionError, TLSError
 from config import Config
 from models import ExtractedContent
+from services.tracing import span
+from services.resilience import resilience, CircuitOpenError
+from services.fetch_scheduler import fetch_scheduler
+
+# Statuses that mean Firecrawl itself is struggling (timeout, rate limit); any 5xx too
+PROVIDER_ERROR_STATUSES = {408, 429}
+
+
+def is_target_site_error(error: FirecrawlError) -> bool:
+    """
+    True when Firecrawl answered but the target site can't be scraped (blocked,
+    unsupported, bad URL, DNS/TLS on the boutique's side). These must not count
+    against the Firecrawl breaker, like non-5xx answers in jina_reader.
+    """
+    if isinstance(error, (DNSResolutionError, TLSError)):
+        return True
+    status = error.status_code
+    return status is not None and status < 500 and status not in PROVIDER_ERROR_STATUSES
+
 
 class FirecrawlService:
     _instance = None
-    _semaphore = asyncio.Semaphore(5) # Limit concurrency to 5 sites at a time
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(FirecrawlService, cls).__new__(cls)
-            cls._instance.app = FirecrawlApp(api_key=Config.FIRECRAWL_API_KEY)
+            options = {"api_url": Config.FIRECRAWL_API_URL} if Config.FIRECRAWL_API_URL else {}
+            cls._instance.app = FirecrawlApp(api_key=Config.FIRECRAWL_API_KEY, **options)
         return cls._instance
 
     async def extract_content(self, url: str) -> Optional[str]:
@@ -27,46 +47,58 @@ class FirecrawlService:
             print("[FIRECRAWL] ⚠️ API Key missing, skipping...")
             return None
 
-        async with self._semaphore:
-            try:
+        try:
+            async with resilience.guard("firecrawl"):
                 print(f"[FIRECRAWL] Extracting: {url}")
-                # firecrawl-py 1.x uses scrape_url (sync but we can run in thread)
-                # Note: Newer SDKs might have async support, check docs if needed
-                # For now using it safely.
-                
+                # firecrawl-py is sync: the scrape runs in a worker thread
                 # Perform the scrape using the specific keyword arguments required by firecrawl-py v2
-                scrape_result = await asyncio.to_thread(
-                    self.app.scrape, 
-                    url=url, 
-                    formats=['markdown']
-                )
-                
-                if not scrape_result:
-                    return None
+                with span("scrape.firecrawl", url=url):
+                    try:
+                        scrape_result = await asyncio.to_thread(
+                            self.app.scrape,
+                            url=url,
+                            formats=['markdown']
+                        )
+                    except FirecrawlError as e:
+                        # 5xx, timeouts and 429s propagate to the guard; connection
+                        # errors from requests are not FirecrawlError and propagate too
+                        if not is_target_site_error(e):
+                            raise
+                        print(f"[FIRECRAWL] ⚠️ Target site error {e.status_code} for {url}: {str(e)[:100]}")
+                        return None
+        
+            if not scrape_result:
+                return None
 
-                # Handle Document object from v2 SDK
-                if hasattr(scrape_result, 'markdown') and scrape_result.markdown:
-                    return scrape_result.markdown
-                if hasattr(scrape_result, 'content') and getattr(scrape_result, 'content'):
-                    return getattr(scrape_result, 'content')
+            # Handle Document object from v2 SDK
+            if hasattr(scrape_result, 'markdown') and scrape_result.markdown:
+                return scrape_result.markdown
+            if hasattr(scrape_result, 'content') and getattr(scrape_result, 'content'):
+                return getattr(scrape_result, 'content')
 
-                # Fallback for dict-style response (v1 or different SDK versions)
-                if isinstance(scrape_result, dict):
-                    data = scrape_result.get('data', scrape_result)
-                    if isinstance(data, dict):
-                        return data.get('markdown') or data.get('content') or scrape_result.get('markdown')
-                
-                return None
-            except Exception as e:
-                print(f"[FIRECRAWL] ❌ Error scraping {url}: {e}")
-                return None
+            # Fallback for dict-style response (v1 or different SDK versions)
+            if isinstance(scrape_result, dict):
+                data = scrape_result.get('data', scrape_result)
+                if isinstance(data, dict):
+                    return data.get('markdown') or data.get('content') or scrape_result.get('markdown')
+            
+            return None
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            print(f"[FIRECRAWL] ❌ Error scraping {url}: {e}")
+            return None
 
     async def batch_extract(self, urls: List[str]) -> List[ExtractedContent]:
         """
-        Extract content from multiple URLs concurrently with rate limiting.
+        Extract content from multiple URLs concurrently with rate limiting,
+        interleaved across domains with per-site politeness (services/fetch_scheduler.py).
+        While the Firecrawl circuit is open every URL is returned empty (callers fall back).
         """
-        tasks = [self.extract_content(url) for url in urls]
-        contents = await asyncio.gather(*tasks)
+        if resilience.is_open("firecrawl"):
+            print(f"[FIRECRAWL] ⏭️ Circuit open, skipping {len(urls)} URLs")
+            return [ExtractedContent(url=url, content=None) for url in urls]
+        contents = await fetch_scheduler.map(urls, self.extract_content)
         
         results = []
         for url, content in zip(urls, contents):
@@ -0,0 +1,377 @@
+"""
+Prospect Import Service
+Bulk ingestion of externally sourced prospect lists (trade fairs, agents) from CSV/JSONL.
+
+Pipeline per batch:
+1. Read rows incrementally from the uploaded file (never the whole file in memory)
+2. Normalize URLs/domains (same rules as the rest of the database layer)
+3. Fill fields the row does not supply from an already stored prospect (same
+   domain and city)
+4. Score with the calculate_prospect_score rules, using batched embeddings
+   and the columnar scoring kernel
+5. COPY-upsert into `prospects` (stored values are never replaced by empty ones)
+
+Progress is checkpointed in `import_jobs` after every batch, so an interrupted
+job resumes from the last committed row.
+"""
+import asyncio
+import csv
+import json
+import os
+import re
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+from .postgres import PostgresManager
+from .llm_metrics import llm_attribution
+from .database import bulk_upsert_prospects, extract_domain, get_prospects_by_domain_city, normalize_city
+from .price_extractor import parse_amount
+from .vector_db import (
+    generate_client_profile_text,
+    find_similar_clients_batch,
+    fallback_similarity_explanation,
+)
+from .scoring_kernel import score_prospects, row_scores, top_similarity
+from .what_if import invalidate_snapshot
+
+IMPORT_BATCH_SIZE = 200
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+SUPPORTED_FORMATS = ("csv", "jsonl")
+
+# Canonical field -> accepted header names (compared after normalize_header)
+COLUMN_ALIASES: Dict[str, List[str]] = {
+    "name": ["name", "brand", "brand_name", "company", "company_name"],
+    "website_url": ["website_url", "websiteurl", "website", "url", "site", "domain"],
+    "city": ["city", "cidade", "ciudad"],
+    "country": ["country", "pais", "país", "origincountry", "origin_country"],
+    "country_code": ["country_code", "countrycode", "iso", "iso_code"],
+    "store_count": ["store_count", "storecount", "stores", "lojas"],
+    "avg_suit_price_eur": ["avg_suit_price_eur", "price", "price_eur", "avgprice", "avg_price", "suit_price"],
+    "wool_percentage": ["wool_percentage", "woolpercentage", "wool", "material"],
+    "made_to_measure": ["made_to_measure", "madetomeasure", "mtm"],
+    "brand_style": ["brand_style", "brandstyle", "style"],
+    "business_model": ["business_model", "businessmodel"],
+    "description": ["description", "company_overview", "companyoverview", "notes"],
+}
+
+TRUE_VALUES = {"true", "yes", "y", "1", "sim", "si", "sí"}
+FALSE_VALUES = {"false", "no", "n", "0", "não", "nao"}
+
+# Background tasks started from the API (kept referenced so they are not garbage-collected)
+_running_jobs: Dict[str, asyncio.Task] = {}
+
+
+# ============================================================================
+# ROW NORMALIZATION
+# ============================================================================
+
+def normalize_header(header: str) -> str:
+    return re.sub(r"[\s\-]+", "_", (header or "").strip().lower())
+
+
+_ALIAS_LOOKUP = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+
+def _parse_int(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    digits = re.sub(r"[^\d.]", "", str(value or ""))
+    try:
+        return int(float(digits)) if digits else 0
+    except ValueError:
+        return 0
+
+
+def _parse_price(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_amount(str(value or ""))
+
+
+def _parse_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    text = str(value or "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None  # Unknown
+
+
+def normalize_import_row(raw: Dict, default_city: Optional[str] = None) -> Optional[Dict]:
+    """
+    Map a raw CSV/JSONL record onto the prospect dict used by scoring and persistence.
+    Returns None when the row has no usable website or city.
+    """
+    fields: Dict[str, Any] = {}
+    for key, value in raw.items():
+        field = _ALIAS_LOOKUP.get(normalize_header(key))
+        if field and field not in fields and value not in (None, ""):
+            fields[field] = value.strip() if isinstance(value, str) else value
+
+    url = str(fields.get("website_url", "")).strip()
+    if not url:
+        return None
+    if not re.match(r"^https?://", url, re.IGNORECASE):
+        url = f"https://{url}"
+    domain = extract_domain(url)
+    if not domain or "." not in domain:
+        return None
+
+    city = fields.get("city") or default_city
+    if not city:
+        return None
+
+    wool = fields.get("wool_percentage")
+    return {
+        "name": fields.get("name") or domain,
+        "website_url": url,
+        "city": str(city),
+        "country": fields.get("country", "Unknown"),
+        "country_code": str(fields.get("country_code", "XX")).upper(),
+        "store_count": _parse_int(fields.get("store_count")),
+        "avg_suit_price_eur": _parse_price(fields.get("avg_suit_price_eur")),
+        # Stored like persistence does; scoring reads no wool_percentage (see agents/nodes/persistence.py)
+        "material_composition": [wool] if wool else [],
+        "made_to_measure": _parse_bool(fields.get("made_to_measure")),
+        "brand_style": fields.get("brand_style", "unknown"),
+        "business_model": fields.get("business_model", "unknown"),
+        "description": fields.get("description", ""),
+    }
+
+
+def merge_stored_prospect(prospect: Dict, stored: Dict) -> Dict:
+    """
+    Fill the scoring inputs a row does not supply from the prospect already stored for its
+    domain and city, so the recomputed scores describe the data the upsert keeps.
+    """
+    merged = dict(prospect)
+    if prospect["name"] == extract_domain(prospect["website_url"]) and stored.get("name"):
+        merged["name"] = stored["name"]
+    for field, empty in (("country", "Unknown"), ("country_code", "XX"), ("store_count", 0), ("avg_suit_price_eur", 0)):
+        if prospect[field] in (empty, "", None) and stored.get(field):
+            merged[field] = stored[field]
+    if prospect["made_to_measure"] is None and stored.get("made_to_measure") is not None:
+        merged["made_to_measure"] = stored["made_to_measure"]
+    if not prospect["material_composition"]:
+        materials = stored.get("material_composition") or []
+        merged["material_composition"] = json.loads(materials) if isinstance(materials, str) else materials
+    return merged
+
+
+async def merge_stored_prospects(prospects: List[Dict]) -> List[Dict]:
+    """merge_stored_prospect for a batch (one query)."""
+    keys = [(extract_domain(p["website_url"]), normalize_city(p["city"])) for p in prospects]
+    stored = await get_prospects_by_domain_city(list(set(keys)))
+    return [merge_stored_prospect(p, stored[key]) if key in stored else p for p, key in zip(prospects, keys)]
+
+
+# ============================================================================
+# INCREMENTAL READERS
+# ============================================================================
+
+def detect_format(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    return "jsonl" if ext in ("jsonl", "ndjson", "json") else "csv"
+
+
+def _iter_jsonl(f) -> Iterator[Optional[Dict]]:
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield record if isinstance(record, dict) else None
+        except ValueError:
+            yield None  # Counted as skipped, keeps row numbering stable for resume
+
+
+def _open_reader(path: str, fmt: str) -> Tuple[Any, Iterator[Optional[Dict]]]:
+    f = open(path, "r", newline="", encoding="utf-8-sig")
+    if fmt == "jsonl":
+        return f, _iter_jsonl(f)
+    return f, iter(csv.DictReader(f))
+
+
+# ============================================================================
+# JOB STATE
+# ============================================================================
+
+async def save_upload(upload, filename: str) -> str:
+    """Stream an uploaded file (anything with `async read(n)`) to the import directory."""
+    os.makedirs(Config.IMPORT_UPLOAD_DIR, exist_ok=True)
+    ext = os.path.splitext(filename or "")[1] or ".csv"
+    path = os.path.join(Config.IMPORT_UPLOAD_DIR, f"{uuid.uuid4().hex}{ext}")
+    with open(path, "wb") as f:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+    return path
+
+
+async def create_import_job(
+    source_path: str,
+    source_name: Optional[str] = None,
+    fmt: Optional[str] = None,
+    default_city: Optional[str] = None,
+) -> Dict:
+    fmt = fmt or detect_format(source_name or source_path)
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    job_id = uuid.uuid4().hex[:16]
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            INSERT INTO import_jobs (id, source_path, source_name, format, default_city)
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING *
+        """, job_id, source_path, source_name or os.path.basename(source_path), fmt, default_city)
+    return dict(row)
+
+
+async def get_import_job(job_id: str) -> Optional[Dict]:
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT * FROM import_jobs WHERE id = $1", job_id)
+    if not row:
+        return None
+    job = dict(row)
+    job["is_running"] = job_id in _running_jobs
+    return job
+
+
+async def list_import_jobs(limit: int = 20) -> List[Dict]:
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT * FROM import_jobs ORDER BY created_at DESC LIMIT $1", limit)
+    return [dict(row) for row in rows]
+
+
+async def _update_job(job_id: str, **fields):
+    assignments = ", ".join(f"{key} = ${i}" for i, key in enumerate(fields, start=2))
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            f"UPDATE import_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = $1",
+            job_id, *fields.values()
+        )
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+async def score_prospects_batch(prospects: List[Dict]) -> List[Tuple[Dict, str, Dict]]:
+    """
+    Score a batch with the calculate_prospect_score rules using one embeddings call.
+    Similarity explanations use the template text (no per-row LLM call).
+    """
+    descriptions = [generate_client_profile_text(p) for p in prospects]
+    similar_batches = await find_similar_clients_batch(descriptions, n_results=5)
+
+    result = score_prospects(prospects, [top_similarity(similar) for similar in similar_batches])
+
+    items = []
+    for i, (prospect, similar_clients) in enumerate(zip(prospects, similar_batches)):
+        scores = row_scores(result, i)
+        most_similar = similar_clients[0] if similar_clients else None
+        scores["explanation"] = {
+            "most_similar_client": most_similar["name"] if most_similar else "N/A",
+            "similarity_explanation": fallback_similarity_explanation(most_similar) if most_similar else None,
+        }
+        items.append((prospect, prospect["city"], scores))
+    return items
+
+
+async def run_import_job(job_id: str, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Run (or resume) an import job until the file is exhausted.
+    Rows before `rows_read` were committed by a previous run and are skipped.
+    """
+    job = await get_import_job(job_id)
+    if not job:
+        raise ValueError(f"Import job {job_id} not found")
+    if job["status"] == "completed":
+        return job
+
+    counters = {
+        "rows_read": job["rows_read"],
+        "rows_imported": job["rows_imported"],
+        "rows_updated": job["rows_updated"],
+        "rows_skipped": job["rows_skipped"],
+    }
+    await _update_job(job_id, status="running", error=None)
+    print(f"[IMPORT] ▶️ Job {job_id}: {job['source_name']} (resuming at row {counters['rows_read']})")
+
+    f = None
+    try:
+        f, reader = await asyncio.to_thread(_open_reader, job["source_path"], job["format"])
+        if counters["rows_read"]:
+            await asyncio.to_thread(lambda: sum(1 for _ in islice(reader, counters["rows_read"])))
+
+        while True:
+            raw_rows = await asyncio.to_thread(lambda: list(islice(reader, IMPORT_BATCH_SIZE)))
+            if not raw_rows:
+                break
+
+            prospects = []
+            for raw in raw_rows:
+                prospect = normalize_import_row(raw, job["default_city"]) if raw else None
+                if prospect:
+                    prospects.append(prospect)
+            skipped = len(raw_rows) - len(prospects)
+
+            if prospects:
+                prospects = await merge_stored_prospects(prospects)
+                items = await score_prospects_batch(prospects)
+                result = await bulk_upsert_prospects(items)
+                counters["rows_imported"] += result["inserted"]
+                counters["rows_updated"] += result["updated"]
+                skipped += len(prospects) - result["inserted"] - result["updated"]
+
+            counters["rows_read"] += len(raw_rows)
+            counters["rows_skipped"] += skipped
+            # Checkpoint only after the batch is committed
+            await _update_job(job_id, **counters)
+
+            print(f"[IMPORT] Job {job_id}: {counters['rows_read']} rows read, "
+                  f"{counters['rows_imported']} new, {counters['rows_updated']} updated, {counters['rows_skipped']} skipped")
+            if on_progress:
+                on_progress(dict(counters))
+
+        await _update_job(job_id, status="completed")
+        invalidate_snapshot()
+        print(f"[IMPORT] ✅ Job {job_id} completed")
+    except Exception as e:
+        print(f"[IMPORT] ❌ Job {job_id} failed at row {counters['rows_read']}: {e}")
+        await _update_job(job_id, status="failed", error=str(e))
+        raise
+    finally:
+        if f:
+            f.close()
+
+    return await get_import_job(job_id)
+
+
+def start_import_job(job_id: str) -> bool:
+    """Run an import job in the background. Returns False if it is already running."""
+    if job_id in _running_jobs:
+        return False
+
+    async def runner():
+        try:
+            with llm_attribution(node="import_job"):
+                await run_import_job(job_id)
+        except Exception:
+            pass  # Failure is recorded on the job row
+        finally:
+            _running_jobs.pop(job_id, None)
+
+    _running_jobs[job_id] = asyncio.create_task(runner())
+    return True
@@ -13,23 +13,48 @@ Usage:
 
 import aiohttp
 import asyncio
+import codecs
 from typing import Optional, Dict
-import os
 
-# Jina Reader base URL
-JINA_READER_URL = "https://r.jina.ai/"
+from config import Config
+from services.resilience import resilience, CircuitOpenError
+
+# Jina Reader base URL (Config.JINA_READER_URL, e.g. the load-test mock server)
+JINA_READER_URL = Config.JINA_READER_URL
 
 # Optional API key for higher rate limits
-JINA_API_KEY = os.getenv("JINA_API_KEY")
+JINA_API_KEY = Config.JINA_API_KEY
+
+# Rate limiting (20 rpm, 200 with a key) is enforced by services/resilience.py ("jina")
+
 
-# Rate limiting
-JINA_REQUESTS_PER_MINUTE = 20
+async def _read_streaming(response: aiohttp.ClientResponse, max_length: int, relevance_stream) -> Optional[str]:
+    """
+    Read the body chunk by chunk, stopping at max_length characters.
+    Returns None as soon as the relevance stream rejects the page.
+    """
+    decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+    parts, length = [], 0
+    async for raw in response.content.iter_chunked(16 * 1024):
+        text = decoder.decode(raw)
+        parts.append(text)
+        length += len(text)
+        if relevance_stream.feed(text) is False:
+            return None
+        if length > max_length:
+            break
+    else:
+        parts.append(decoder.decode(b"", final=True))
+        if relevance_stream.finish() is False:
+            return None
+    return "".join(parts)
 
 
 async def extract_with_jina(
     url: str, 
     timeout: int = 30,
-    max_length: int = 15000
+    max_length: int = 15000,
+    relevance_filter=None,
 ) -> Dict[str, any]:
     """
     Extract content from a URL using Jina Reader.
@@ -41,6 +66,8 @@ async def extract_with_jina(
         url: URL to extract content from
         timeout: Request timeout in seconds
         max_length: Maximum characters to return
+        relevance_filter: Optional RelevanceFilter; irrelevant pages are
+            abandoned mid-download (error "irrelevant")
         
     Returns:
         Dict with:
@@ -62,14 +89,25 @@ async def extract_with_jina(
         if JINA_API_KEY:
             headers["Authorization"] = f"Bearer {JINA_API_KEY}"
         
-        async with aiohttp.ClientSession() as session:
+        async with resilience.guard("jina") as call, aiohttp.ClientSession() as session:
             async with session.get(
                 jina_url, 
                 headers=headers, 
                 timeout=aiohttp.ClientTimeout(total=timeout)
             ) as response:
                 if response.status == 200:
-                    content = await response.text()
+                    if relevance_filter is not None:
+                        content = await _read_streaming(response, max_length, relevance_filter.stream(url))
+                        if content is None:
+                            print(f"[JINA] ⏭️ Irrelevant page, stopped download: {url}")
+                            return {
+                                "success": False,
+                                "content": "",
+                                "error": "irrelevant",
+                                "url": url,
+                            }
+                    else:
+                        content = await response.text()
                     
                     # Truncate if too long
                     if len(content) > max_length:
@@ -93,6 +131,7 @@ async def extract_with_jina(
                     }
                     
                 elif response.status == 429:
+                    call.rate_limited()
                     print(f"[JINA] ⚠️ Rate limited for {url}")
                     return {
                         "success": False,
@@ -101,6 +140,8 @@ async def extract_with_jina(
                         "url": url,
                     }
                 else:
+                    if response.status >= 500:
+                        call.failed(f"http_{response.status}")
                     error_text = await response.text()
                     print(f"[JINA] ❌ Error {response.status} for {url}: {error_text[:100]}")
                     return {
@@ -110,6 +151,13 @@ async def extract_with_jina(
                         "url": url,
                     }
                     
+    except CircuitOpenError:
+        return {
+            "success": False,
+            "content": "",
+            "error": "circuit_open",
+            "url": url,
+        }
     except asyncio.TimeoutError:
         print(f"[JINA] ⏱️ Timeout for {url}")
         return {
@@ -0,0 +1,121 @@
+"""
+Link Extractor
+One-pass link discovery for page content in whatever format the provider returned.
+
+- Markdown (Firecrawl, Tavily, Jina, direct fetch): [text](url) links and <url>
+  autolinks via regex; images (![alt](src)) are skipped and linked images keep
+  their alt text. <a href> tags embedded in markdown are picked up too
+- HTML documents: selectolax (lexbor) when installed, else lxml, else
+  BeautifulSoup's html.parser
+- scored_links(): extraction, scoring, same-site filter and dedup in a single
+  pass over the links (the deep crawler's ranking)
+"""
+import re
+from typing import Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urljoin
+
+from services.url_utils import normalize_url, get_domain_from_url
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HTML_BACKEND = "selectolax"
+except ImportError:  # Optional dependency
+    try:
+        import lxml.html
+        HTML_BACKEND = "lxml"
+    except ImportError:  # Optional dependency
+        from bs4 import BeautifulSoup
+        HTML_BACKEND = "html.parser"
+
+SKIPPED_SCHEMES = ('javascript', 'mailto:', 'tel:', 'data:')
+
+# [text](url "title"), text may hold one level of brackets (linked images), url one level of parentheses
+_MARKDOWN_LINK = re.compile(
+    r"""(?<!!)\[((?:[^\[\]]|\[[^\[\]]*\])*)\]\(\s*<?((?:[^()\s<>]|\([^()\s]*\))+)>?(?:\s+["'][^"']*["'])?\s*\)"""
+)
+_AUTOLINK = re.compile(r"<(https?://[^\s<>]+)>")
+_MARKDOWN_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_ANCHOR = re.compile(r"""<a\s[^>]*?href\s*=\s*["']([^"']*)["'][^>]*>(.*?)</a\s*>""", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_HTML_DOCUMENT = re.compile(r"^\s*(?:<!--.*?-->\s*)*<(?:!doctype\s+html|html|head|body)\b", re.IGNORECASE | re.DOTALL)
+_MARKUP = re.compile(r"[*_`#]+")
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+# ============================================================================
+# FORMAT DETECTION & EXTRACTION
+# ============================================================================
+
+def detect_format(content: str) -> str:
+    """"html" for a full HTML document, "markdown" otherwise (plain text included)."""
+    return "html" if _HTML_DOCUMENT.match(content[:4096]) else "markdown"
+
+
+def _markdown_links(content: str) -> Iterator[Tuple[str, str]]:
+    for match in _MARKDOWN_LINK.finditer(content):
+        text = _MARKDOWN_IMAGE.sub(lambda m: m.group(1), match.group(1))
+        yield match.group(2), _clean(_MARKUP.sub(" ", text))
+    for match in _AUTOLINK.finditer(content):
+        yield match.group(1), ""
+    if "<a" in content or "<A" in content:
+        for match in _ANCHOR.finditer(content):
+            yield match.group(1), _clean(_TAG.sub(" ", match.group(2)))
+
+
+def _html_links(content: str) -> Iterator[Tuple[str, str]]:
+    if HTML_BACKEND == "selectolax":
+        for node in LexborHTMLParser(content).css("a[href]"):
+            yield node.attributes.get("href") or "", _clean(node.text(separator=" ", strip=True))
+    elif HTML_BACKEND == "lxml":
+        for node in lxml.html.document_fromstring(content).iter("a"):
+            href = node.get("href")
+            if href is not None:
+                yield href, _clean(node.text_content())
+    else:
+        for node in BeautifulSoup(content, "html.parser").find_all("a", href=True):
+            yield node["href"], _clean(node.get_text(separator=" ", strip=True))
+
+
+def iter_links(content: str) -> Iterator[Tuple[str, str]]:
+    """(href, text) of every link in the page, HTML or markdown, lazily."""
+    if not content:
+        return iter(())
+    return _html_links(content) if detect_format(content) == "html" else _markdown_links(content)
+
+
+def extract_links(content: str) -> List[Tuple[str, str]]:
+    """(href, text) of every link in the page, HTML or markdown."""
+    try:
+        return [(href.strip(), text) for href, text in iter_links(content)]
+    except Exception:
+        return []
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+
+def scored_links(content: str, base_url: str, score: Callable[[str, str], int], min_score: int = 1) -> List[Tuple[int, str]]:
+    """(score, absolute URL) of same-site links scoring at least min_score, best first, one entry per page."""
+    domain = get_domain_from_url(base_url)
+    best: Dict[str, Tuple[int, str]] = {}
+    try:
+        for href, text in iter_links(content):
+            href = href.strip()
+            if not href or href.startswith('#') or href.lower().startswith(SKIPPED_SCHEMES):
+                continue
+            value = score(href, text)
+            if value < min_score:
+                continue
+            url = urljoin(base_url, href)
+            if get_domain_from_url(url) != domain:
+                continue
+            key = normalize_url(url)
+            if key not in best or value > best[key][0]:
+                best[key] = (value, url)
+    except Exception as e:
+        print(f"[LINKS] ⚠️ Link extraction failed for {base_url}: {e}")
+    return sorted(best.values(), key=lambda item: item[0], reverse=True)
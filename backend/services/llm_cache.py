@@ -0,0 +1,200 @@
+"""
+LLM Response Cache
+Stores LLM completions in PostgreSQL (`llm_cache` table) so re-evaluating the same
+inputs (resume after an interrupt, force_refresh on an unchanged city) costs nothing.
+
+- Keys are semantic fingerprints: deployment + temperature + the normalized inputs
+  of the prompt (e.g. candidate URLs and content hashes), not the raw prompt text,
+  so cosmetic prompt differences (sampled client examples) still hit
+- Entries expire after the call site's TTL; each call site keeps at most
+  `max_entries` rows, least recently used first out
+- Per call site settings in CALL_SITE_DEFAULTS, overridable with
+  LLM_CACHE_SETTINGS (JSON), e.g. {"selection": {"ttl_hours": 24}}
+- Cache failures never fail the LLM call: errors are counted and the call proceeds
+"""
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config import Config
+from .postgres import PostgresManager
+
+CALL_SITE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "selection": {"enabled": True, "ttl_hours": 72, "max_entries": 5000},
+    "similarity_explanation": {"enabled": True, "ttl_hours": 24 * 30, "max_entries": 50000},
+}
+FALLBACK_SETTINGS = {"enabled": True, "ttl_hours": 24, "max_entries": 1000}
+
+# LRU eviction runs once every EVICT_EVERY writes per call site
+EVICT_EVERY = 50
+
+
+def content_hash(text: str) -> str:
+    """Short stable hash of a text, for use in cache key parts."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _load_overrides() -> Dict[str, Dict[str, Any]]:
+    if not Config.LLM_CACHE_SETTINGS:
+        return {}
+    try:
+        overrides = json.loads(Config.LLM_CACHE_SETTINGS)
+        return {site: dict(values) for site, values in overrides.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[LLM-CACHE] Ignoring invalid LLM_CACHE_SETTINGS: {e}")
+        return {}
+
+
+class LLMCache:
+    def __init__(self):
+        self._overrides = _load_overrides()
+        self._stats: Counter = Counter()
+        self._writes: Counter = Counter()
+
+    def settings(self, call_site: str) -> Dict[str, Any]:
+        settings = dict(CALL_SITE_DEFAULTS.get(call_site, FALLBACK_SETTINGS))
+        settings.update(self._overrides.get(call_site, {}))
+        settings["enabled"] = bool(settings["enabled"]) and Config.LLM_CACHE_ENABLED
+        return settings
+
+    def make_key(self, call_site: str, parts: Dict[str, Any], temperature: float) -> str:
+        """Fingerprint of the model settings and the normalized prompt inputs."""
+        payload = json.dumps(
+            {
+                "call_site": call_site,
+                "deployment": Config.AZURE_OPENAI_DEPLOYMENT,
+                "temperature": temperature,
+                "parts": parts,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # READ / WRITE
+    # ------------------------------------------------------------------
+
+    async def get(self, call_site: str, key: str) -> Optional[str]:
+        if not self.settings(call_site)["enabled"]:
+            return None
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                response = await conn.fetchval("""
+                    UPDATE llm_cache
+                    SET hit_count = hit_count + 1, last_used_at = CURRENT_TIMESTAMP
+                    WHERE cache_key = $1 AND expires_at > CURRENT_TIMESTAMP
+                    RETURNING response
+                """, key)
+        except Exception as e:
+            self._stats[(call_site, "errors")] += 1
+            print(f"[LLM-CACHE] Read failed ({call_site}): {e}")
+            return None
+
+        self._stats[(call_site, "hits" if response is not None else "misses")] += 1
+        return response
+
+    async def put(self, call_site: str, key: str, response: str):
+        settings = self.settings(call_site)
+        if not settings["enabled"] or not response:
+            return
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO llm_cache (cache_key, call_site, response, expires_at)
+                    VALUES ($1, $2, $3, CURRENT_TIMESTAMP + make_interval(hours => $4))
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        response = EXCLUDED.response,
+                        created_at = CURRENT_TIMESTAMP,
+                        last_used_at = CURRENT_TIMESTAMP,
+                        expires_at = EXCLUDED.expires_at
+                """, key, call_site, response, int(settings["ttl_hours"]))
+
+                self._writes[call_site] += 1
+                if self._writes[call_site] % EVICT_EVERY == 1:
+                    await self._evict(conn, call_site, int(settings["max_entries"]))
+            self._stats[(call_site, "writes")] += 1
+        except Exception as e:
+            self._stats[(call_site, "errors")] += 1
+            print(f"[LLM-CACHE] Write failed ({call_site}): {e}")
+
+    async def _evict(self, conn, call_site: str, max_entries: int):
+        expired = await conn.execute("DELETE FROM llm_cache WHERE expires_at <= CURRENT_TIMESTAMP")
+        evicted = await conn.execute("""
+            DELETE FROM llm_cache
+            WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache
+                WHERE call_site = $1
+                ORDER BY last_used_at DESC
+                OFFSET $2
+            )
+        """, call_site, max_entries)
+        removed = int(expired.split()[-1]) + int(evicted.split()[-1])
+        if removed:
+            print(f"[LLM-CACHE] Evicted {removed} entries ({call_site})")
+
+    async def cached(
+        self,
+        call_site: str,
+        parts: Dict[str, Any],
+        temperature: float,
+        produce: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Return the cached response for `parts`, or await `produce()` and store its result."""
+        key = self.make_key(call_site, parts, temperature)
+        response = await self.get(call_site, key)
+        if response is not None:
+            return response
+        response = await produce()
+        await self.put(call_site, key, response)
+        return response
+
+    # ------------------------------------------------------------------
+    # ADMIN
+    # ------------------------------------------------------------------
+
+    async def clear(self, call_site: Optional[str] = None) -> int:
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            if call_site:
+                status = await conn.execute("DELETE FROM llm_cache WHERE call_site = $1", call_site)
+            else:
+                status = await conn.execute("DELETE FROM llm_cache")
+        return int(status.split()[-1])
+
+    async def stats(self) -> Dict:
+        """Hit/miss counters since startup plus stored entries per call site."""
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT call_site, COUNT(*) AS entries, COALESCE(SUM(hit_count), 0) AS total_hits,
+                       COUNT(*) FILTER (WHERE expires_at <= CURRENT_TIMESTAMP) AS expired
+                FROM llm_cache
+                GROUP BY call_site
+            """)
+        stored = {row["call_site"]: dict(row) for row in rows}
+
+        call_sites = sorted(set(CALL_SITE_DEFAULTS) | set(stored) | {site for site, _ in self._stats})
+        result = {}
+        for site in call_sites:
+            hits, misses = self._stats[(site, "hits")], self._stats[(site, "misses")]
+            result[site] = {
+                "settings": self.settings(site),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "writes": self._stats[(site, "writes")],
+                "errors": self._stats[(site, "errors")],
+                "entries": stored.get(site, {}).get("entries", 0),
+                "expired_entries": stored.get(site, {}).get("expired", 0),
+                "total_hits": stored.get(site, {}).get("total_hits", 0),
+            }
+        return result
+
+
+# Singleton instance
+llm_cache = LLMCache()
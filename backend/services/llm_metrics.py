@@ -0,0 +1,407 @@
+"""
+LLM Usage Metrics
+Records measured tokens, latency, model and cost of every LLM and embedding call
+into the `llm_usage` table, attributed to city, search, thread and graph node.
+
+- Chat models: UsageCallbackHandler (attached in get_llm and vector_db)
+- Embeddings: InstrumentedEmbeddings wraps the embeddings client
+- Attribution: llm_attribution(city=..., search_id=..., node=...) sets a context
+  for everything awaited inside it; thread id and node also come from the
+  LangGraph run config when available
+- Rows are buffered in memory and written in batches (FLUSH_SIZE rows or every
+  FLUSH_INTERVAL_SECONDS), so instrumentation adds no round-trip to LLM calls
+
+When the provider returns no token usage (e.g. streamed completions) tokens are
+estimated from text length and the row is flagged `estimated`.
+"""
+import asyncio
+import contextlib
+import json
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import Config
+from .postgres import PostgresManager
+from .tracing import span
+from .resilience import resilience
+
+try:
+    from langgraph.config import get_config
+except ImportError:  # Older langgraph
+    get_config = None
+
+CHARS_PER_TOKEN = 4
+FLUSH_SIZE = 50
+FLUSH_INTERVAL_SECONDS = 5
+# Rows kept in memory while the database is unreachable
+MAX_BUFFERED_ROWS = 10000
+
+# USD per 1M tokens, matched by model name prefix (longest first).
+# Approximate list prices; override with LLM_PRICING (JSON, same shape).
+DEFAULT_PRICING: Dict[str, Dict[str, float]] = {
+    "gpt-5.1": {"input": 5.0, "output": 15.0},
+    "gpt-4-turbo": {"input": 10.0, "output": 30.0},
+    "gpt-4": {"input": 30.0, "output": 60.0},
+    "gpt-35-turbo": {"input": 1.5, "output": 2.0},
+    "gpt-3.5-turbo": {"input": 1.5, "output": 2.0},
+    "text-embedding-3-small": {"input": 0.02, "output": 0.0},
+}
+
+USAGE_COLUMNS = [
+    "kind", "call_site", "model", "city", "search_id", "thread_id", "node",
+    "prompt_tokens", "completion_tokens", "latency_ms", "cost_usd", "estimated", "error",
+]
+
+_attribution: ContextVar[Dict[str, Any]] = ContextVar("llm_attribution", default={})
+
+
+# ============================================================================
+# ATTRIBUTION
+# ============================================================================
+
+@contextlib.contextmanager
+def llm_attribution(**fields):
+    """Attribute LLM/embedding calls made inside this block (city, search_id, node, ...)."""
+    token = _attribution.set({**_attribution.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _attribution.reset(token)
+
+
+def current_attribution(metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Context fields, completed with the LangGraph thread id / node of the current run."""
+    attribution = {}
+    run_metadata = dict(metadata or {})
+    if get_config is not None and not run_metadata.get("thread_id"):
+        try:
+            config = get_config()
+            run_metadata = {**config.get("metadata", {}), **config.get("configurable", {}), **run_metadata}
+        except Exception:
+            pass
+    if run_metadata.get("thread_id"):
+        attribution["thread_id"] = str(run_metadata["thread_id"])
+    if run_metadata.get("langgraph_node"):
+        attribution["node"] = run_metadata["langgraph_node"]
+    attribution.update(_attribution.get())
+    return attribution
+
+
+# ============================================================================
+# PRICING
+# ============================================================================
+
+def _load_pricing() -> Dict[str, Dict[str, float]]:
+    pricing = dict(DEFAULT_PRICING)
+    if Config.LLM_PRICING:
+        try:
+            pricing.update({model.lower(): dict(prices) for model, prices in json.loads(Config.LLM_PRICING).items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"[LLM-METRICS] Ignoring invalid LLM_PRICING: {e}")
+    return pricing
+
+
+_PRICING = _load_pricing()
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of a call (0 for unknown models)."""
+    name = (model or "").lower()
+    for prefix in sorted(_PRICING, key=len, reverse=True):
+        if name.startswith(prefix):
+            prices = _PRICING[prefix]
+            return (prompt_tokens * prices.get("input", 0) + completion_tokens * prices.get("output", 0)) / 1_000_000
+    return 0.0
+
+
+def tokens_for_chars(chars: int) -> int:
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_tokens(text: str) -> int:
+    return tokens_for_chars(len(text or ""))
+
+
+# ============================================================================
+# RECORDER
+# ============================================================================
+
+class UsageRecorder:
+    def __init__(self):
+        self._buffer: List[tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        kind: str,
+        call_site: str,
+        model: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int = 0,
+        latency_ms: Optional[float] = None,
+        estimated: bool = False,
+        error: Optional[str] = None,
+        attribution: Optional[Dict[str, Any]] = None,
+    ):
+        attribution = attribution if attribution is not None else current_attribution()
+        row = {
+            "kind": kind,
+            "call_site": call_site,
+            "model": model,
+            "city": (attribution.get("city") or "").lower().strip() or None,
+            "search_id": attribution.get("search_id"),
+            "thread_id": attribution.get("thread_id"),
+            "node": attribution.get("node"),
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "cost_usd": estimate_cost(model, prompt_tokens or 0, completion_tokens or 0),
+            "estimated": estimated,
+            "error": error[:500] if error else None,
+        }
+        self._buffer.append(tuple(row[column] for column in USAGE_COLUMNS))
+        if len(self._buffer) > MAX_BUFFERED_ROWS:
+            del self._buffer[:len(self._buffer) - MAX_BUFFERED_ROWS]
+        if len(self._buffer) >= FLUSH_SIZE and not self._flush_lock.locked():
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            pass  # No loop (sync caller): the periodic flusher or stop() writes the rows
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                pool = await PostgresManager.get_pool()
+                async with pool.acquire() as conn:
+                    await conn.copy_records_to_table("llm_usage", records=rows, columns=USAGE_COLUMNS)
+                return len(rows)
+            except Exception as e:
+                print(f"[LLM-METRICS] Flush failed, keeping {len(rows)} rows: {e}")
+                self._buffer[:0] = rows
+                return 0
+
+    async def _run_flusher(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            await self.flush()
+
+    def start(self):
+        """Start the periodic flush (API lifespan). CLI scripts call flush() themselves."""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run_flusher())
+
+    async def stop(self):
+        if self._flusher:
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        await self.flush()
+
+
+# Singleton instance
+usage_recorder = UsageRecorder()
+
+
+# ============================================================================
+# CHAT MODELS (LangChain callbacks)
+# ============================================================================
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Records one llm_usage row per chat completion (streamed or not)."""
+
+    # Run in the caller's task so the attribution context is visible
+    run_inline = True
+
+    def __init__(self, call_site: str, model: Optional[str] = None):
+        self.call_site = call_site
+        self.model = model
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def _start(self, run_id: UUID, prompt_chars: int, metadata: Optional[Dict[str, Any]]):
+        self._runs[run_id] = {
+            "started": time.perf_counter(),
+            "prompt_chars": prompt_chars,
+            "attribution": current_attribution(metadata),
+        }
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs):
+        chars = sum(len(str(m.content)) for batch in messages for m in batch)
+        self._start(run_id, chars, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs):
+        self._start(run_id, sum(len(p) for p in prompts), metadata)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        llm_output = response.llm_output or {}
+        generations = [g for batch in response.generations for g in batch]
+        message = getattr(generations[0], "message", None) if generations else None
+
+        usage = getattr(message, "usage_metadata", None) or {}
+        token_usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("input_tokens") or token_usage.get("prompt_tokens")
+        completion_tokens = usage.get("output_tokens") or token_usage.get("completion_tokens")
+        estimated = prompt_tokens is None
+        if estimated:
+            prompt_tokens = tokens_for_chars(run["prompt_chars"])
+            completion_tokens = sum(estimate_tokens(g.text) for g in generations)
+
+        response_metadata = getattr(message, "response_metadata", None) or {}
+        usage_recorder.record(
+            kind="chat",
+            call_site=self.call_site,
+            model=llm_output.get("model_name") or response_metadata.get("model_name") or self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens or 0,
+            latency_ms=(time.perf_counter() - run["started"]) * 1000,
+            estimated=estimated,
+            attribution=run["attribution"],
+        )
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        usage_recorder.record(
+            kind="chat",
+            call_site=self.call_site,
+            model=self.model,
+            prompt_tokens=tokens_for_chars(run["prompt_chars"]),
+            latency_ms=(time.perf_counter() - run["started"]) * 1000,
+            estimated=True,
+            error=str(error) or type(error).__name__,
+            attribution=run["attribution"],
+        )
+
+
+# ============================================================================
+# EMBEDDINGS
+# ============================================================================
+
+class InstrumentedEmbeddings:
+    """
+    Wraps an embeddings client; the API reports no usage, so tokens are estimated.
+    Calls go through the "azure_embeddings" resilience guard.
+    """
+
+    def __init__(self, embeddings, model: str, call_site: str = "embedding"):
+        self._embeddings = embeddings
+        self.model = model
+        self.call_site = call_site
+
+    def _record(self, texts: List[str], started: float, error: Optional[Exception] = None):
+        usage_recorder.record(
+            kind="embedding",
+            call_site=self.call_site,
+            model=self.model,
+            prompt_tokens=sum(estimate_tokens(t) for t in texts),
+            latency_ms=(time.perf_counter() - started) * 1000,
+            estimated=True,
+            error=str(error) if error else None,
+        )
+
+    async def aembed_query(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        try:
+            async with resilience.guard("azure_embeddings"):
+                with span("embedding.query"):
+                    result = await self._embeddings.aembed_query(text)
+        except Exception as e:
+            self._record([text], started, e)
+            raise
+        self._record([text], started)
+        return result
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        try:
+            async with resilience.guard("azure_embeddings"):
+                with span("embedding.documents", texts=len(texts)):
+                    result = await self._embeddings.aembed_documents(texts)
+        except Exception as e:
+            self._record(texts, started, e)
+            raise
+        self._record(texts, started)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._embeddings, name)
+
+
+# ============================================================================
+# ROLLUPS
+# ============================================================================
+
+_ROLLUP_COLUMNS = """
+    COUNT(*) FILTER (WHERE kind = 'chat') AS llm_calls,
+    COUNT(*) FILTER (WHERE kind = 'embedding') AS embedding_calls,
+    COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+    COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+    ROUND(COALESCE(SUM(cost_usd), 0)::numeric, 6)::float AS cost_usd,
+    ROUND(COALESCE(AVG(latency_ms) FILTER (WHERE kind = 'chat'), 0)::numeric, 1)::float AS avg_llm_latency_ms,
+    ROUND(COALESCE(SUM(latency_ms), 0)::numeric, 1)::float AS total_latency_ms,
+    COUNT(*) FILTER (WHERE error IS NOT NULL) AS errors,
+    BOOL_OR(estimated) AS includes_estimates
+"""
+
+
+async def get_search_usage(city: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    """Per-search totals (most recent first)."""
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT search_id, MAX(city) AS city, MAX(thread_id) AS thread_id,
+                   MIN(created_at) AS started_at, MAX(created_at) AS finished_at,
+                   {_ROLLUP_COLUMNS}
+            FROM llm_usage
+            WHERE search_id IS NOT NULL AND ($1::text IS NULL OR city = $1)
+            GROUP BY search_id
+            ORDER BY MAX(created_at) DESC
+            LIMIT $2
+        """, city.lower().strip() if city else None, limit)
+    return [dict(row) for row in rows]
+
+
+async def get_search_usage_detail(search_id: str) -> List[Dict]:
+    """One search broken down by node, call site and model."""
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT node, call_site, model, {_ROLLUP_COLUMNS}
+            FROM llm_usage
+            WHERE search_id = $1
+            GROUP BY node, call_site, model
+            ORDER BY cost_usd DESC
+        """, search_id)
+    return [dict(row) for row in rows]
+
+
+async def get_daily_usage(days: int = 30, by_city: bool = True) -> List[Dict]:
+    """Per-day totals (optionally per city) for the last `days` days."""
+    group = "day, city" if by_city else "day"
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(f"""
+            SELECT DATE(created_at) AS day, {"city," if by_city else ""}
+                   COUNT(DISTINCT search_id) AS searches,
+                   {_ROLLUP_COLUMNS}
+            FROM llm_usage
+            WHERE created_at >= CURRENT_DATE - make_interval(days => $1)
+            GROUP BY {group}
+            ORDER BY day DESC, cost_usd DESC
+        """, days)
+    return [dict(row) for row in rows]
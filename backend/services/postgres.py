@@ -8,26 +8,31 @@ load_dotenv()
 class PostgresManager:
     _pool: Optional[asyncpg.Pool] = None
 
+    @classmethod
+    def _connection_kwargs(cls) -> dict:
+        return {
+            "user": os.getenv("POSTGRES_USER", "lanca"),
+            "password": os.getenv("POSTGRES_PASSWORD", "lanca_password"),
+            "database": os.getenv("POSTGRES_DB", "lanca_leads"),
+            "host": os.getenv("POSTGRES_HOST", "localhost"),
+            "port": int(os.getenv("POSTGRES_PORT", "5432")),
+        }
+
     @classmethod
     async def get_pool(cls) -> asyncpg.Pool:
         if cls._pool is None:
-            user = os.getenv("POSTGRES_USER", "lanca")
-            password = os.getenv("POSTGRES_PASSWORD", "lanca_password")
-            database = os.getenv("POSTGRES_DB", "lanca_leads")
-            host = os.getenv("POSTGRES_HOST", "localhost")
-            port = os.getenv("POSTGRES_PORT", "5432")
-            
             cls._pool = await asyncpg.create_pool(
-                user=user,
-                password=password,
-                database=database,
-                host=host,
-                port=int(port),
+                **cls._connection_kwargs(),
                 min_size=5,
                 max_size=20
             )
         return cls._pool
 
+    @classmethod
+    async def connect(cls) -> asyncpg.Connection:
+        """Open a dedicated connection outside the pool (e.g. for LISTEN/NOTIFY)."""
+        return await asyncpg.connect(**cls._connection_kwargs())
+
     @classmethod
     async def close(cls):
         if cls._pool:
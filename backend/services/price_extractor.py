@@ -1,57 +1,261 @@
 """
 Price Extraction Service
 Extracts and averages suit prices from text content.
+
+One precompiled scanner finds every price mention in a single pass
+(prefix/suffix currency symbols or codes, and "price: 899" style mentions),
+tried only where a currency, a keyword or an amount before a currency occurs;
+amounts are converted to EUR through a cached rate table, and the average
+is robust to outliers (trimmed mean, median), preferring prices that appear
+next to suit vocabulary.
 """
+import json
 import re
-from typing import Dict
+import statistics
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set
+
+from config import Config
+
+# Accepted suit price range in EUR (exclusive), used to drop shipping fees, years, etc.
+MIN_SUIT_PRICE_EUR = 150
+MAX_SUIT_PRICE_EUR = 6000
+
+# Characters around a price inspected for suit vocabulary
+CONTEXT_CHARS = 60
+
+# Share of prices dropped at each end before averaging (needs TRIM_MIN_PRICES prices)
+TRIM_RATIO = 0.1
+TRIM_MIN_PRICES = 5
+
+SUIT_CONTEXT_WORDS = [
+    "suit", "tuxedo", "tailoring", "blazer", "fato", "traje", "terno", "abito",
+    "completo", "anzug", "costume", "kostuum", "smoking",
+]
+
+# EUR value of one unit of each currency. USD uses the same fixed rate as
+# agents.nodes.utils.get_exchange_rate (1 EUR = 1.08 USD).
+DEFAULT_EUR_RATES = {
+    "EUR": 1.0,
+    "USD": 1 / 1.08,
+    "GBP": 1.17,
+    "CHF": 1.05,
+    "BRL": 0.17,
+}
+
+CURRENCY_ALIASES = {
+    "€": "EUR", "$": "USD", "US$": "USD", "£": "GBP", "R$": "BRL", "FR.": "CHF",
+    "EUR": "EUR", "USD": "USD", "GBP": "GBP", "CHF": "CHF", "BRL": "BRL",
+}
+
+_AMOUNT = r"\d{1,3}(?:[,.'\u00a0\u202f ]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+_CURRENCY = r"US\$|R\$|[$€£]|\b(?:EUR|USD|GBP|CHF|BRL|Fr\.)"
+_KEYWORDS = r"price|prix|preço|preis|precio|from|starting\s+at|a\s+partir\s+de"
+
+# Alternatives are tried at each position in this order; a match consumes its
+# currency, so "899 €" is never counted again as a prefix price. Keyword mentions
+# ("from 899€", "price: 1.250 EUR") take the currency on either side of the amount.
+_PRICE_SCANNER = re.compile(
+    rf"(?P<pre_cur>{_CURRENCY})\s?(?P<pre_amt>{_AMOUNT})"
+    rf"|(?<![\d.,])(?P<suf_amt>{_AMOUNT})\s?(?P<suf_cur>{_CURRENCY}(?![A-Za-z]))"
+    rf"|\b(?:{_KEYWORDS})\s*[:=]?\s*(?:(?P<kw_pre>{_CURRENCY})\s?)?(?P<kw_amt>{_AMOUNT})"
+    rf"(?:\s?(?P<kw_suf>{_CURRENCY}(?![A-Za-z])))?",
+    re.IGNORECASE,
+)
+
+# Prefilter: the scanner is case-insensitive and opens with assertions, so finditer tries it
+# at every position. It is only tried where these lowercase needles (currencies and keywords)
+# occur, found with str.find, and at the amounts written before a currency.
+_ANCHOR_NEEDLES = (
+    "$", "€", "£", "eur", "usd", "gbp", "chf", "brl", "fr.",
+    "pric", "prix", "preço", "preis", "precio", "from", "starting", "partir",
+)
+
+_SUIT_CONTEXT = re.compile("|".join(SUIT_CONTEXT_WORDS), re.IGNORECASE)
+_NOT_AMOUNT_CHAR = re.compile(r"[^\d.,]")
+_SEPARATOR = re.compile(r"[.,]")
+
 
-def extract_price_from_content(content: str) -> Dict[str, float]:
+class PriceMatch(NamedTuple):
+    amount: float            # In the original currency
+    currency: Optional[str]  # ISO code, None for "price: 899" mentions without currency (not convertible)
+    offset: int              # Position of the match in the content
+    context: str             # Surrounding text (CONTEXT_CHARS each side)
+
+
+# ============================================================================
+# PARSING
+# ============================================================================
+
+def parse_amount(text: str) -> float:
+    """
+    Parse a price amount with either separator convention.
+    "1.299,00" -> 1299.0, "1,299" -> 1299.0, "899.50" -> 899.5, "1 299" -> 1299.0
+    """
+    cleaned = _NOT_AMOUNT_CHAR.sub("", text or "")
+    if not cleaned:
+        return 0.0
+    last_sep = max(cleaned.rfind(","), cleaned.rfind("."))
+    if last_sep != -1 and len(cleaned) - last_sep - 1 != 3:
+        # Last separator is the decimal point ("1.299,00", "899.50")
+        cleaned = _SEPARATOR.sub("", cleaned[:last_sep]) + "." + cleaned[last_sep + 1:]
+    else:
+        # Only thousands separators ("1,299", "1.299")
+        cleaned = _SEPARATOR.sub("", cleaned)
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+
+@lru_cache(maxsize=1)
+def get_rate_table() -> Dict[str, float]:
+    """EUR conversion rates; EXCHANGE_RATES_EUR (JSON) overrides individual currencies."""
+    rates = dict(DEFAULT_EUR_RATES)
+    override = Config.EXCHANGE_RATES_EUR
+    if override:
+        try:
+            rates.update({code.upper(): float(rate) for code, rate in json.loads(override).items()})
+        except (ValueError, AttributeError) as e:
+            print(f"[PRICE] Ignoring invalid EXCHANGE_RATES_EUR: {e}")
+    return rates
+
+
+def to_eur(amount: float, currency: Optional[str]) -> Optional[float]:
+    """Convert an amount to EUR (None when the currency is unknown)."""
+    rate = get_rate_table().get(currency) if currency else None
+    return amount * rate if rate is not None else None
+
+
+# ============================================================================
+# SCANNING
+# ============================================================================
+
+def _add_starts(content: str, lowered: str, needle: str, start: int, starts: Set[int]):
+    if needle == "partir":
+        # "a partir de": back to the "a"
+        before = lowered[:start].rstrip()
+        if before.endswith("a"):
+            starts.add(len(before) - 1)
+        return
+    # "$" may end "R$" or "US$"
+    for currency_start in (start, start - 1, start - 2) if needle == "$" else (start,):
+        if currency_start < 0:
+            continue
+        starts.add(currency_start)
+        # Suffix currency: every amount start in the digits, separators and spaces before it
+        i = currency_start
+        while i > 0 and (content[i - 1].isdecimal() or content[i - 1].isspace() or content[i - 1] in ",.'"):
+            i -= 1
+            if content[i].isdecimal() and (i == 0 or not (content[i - 1].isdecimal() or content[i - 1] in ".,")):
+                starts.add(i)
+
+
+def _match_starts(content: str) -> Optional[List[int]]:
+    """
+    Sorted positions where _PRICE_SCANNER can match: currency and keyword starts, and the
+    digits of an amount written before a currency. None when lowercasing shifts offsets.
+    """
+    lowered = content.lower()
+    if len(lowered) != len(content):
+        return None
+    starts = set()
+    for needle in _ANCHOR_NEEDLES:
+        start = lowered.find(needle)
+        while start != -1:
+            _add_starts(content, lowered, needle, start, starts)
+            start = lowered.find(needle, start + 1)
+    return sorted(starts)
+
+
+def _iter_matches(content: str) -> Iterator["re.Match"]:
+    """_PRICE_SCANNER.finditer(content), trying the scanner only where a match can start."""
+    starts = _match_starts(content)
+    if starts is None:
+        yield from _PRICE_SCANNER.finditer(content)
+        return
+    end = 0
+    for start in starts:
+        if start < end:
+            continue
+        match = _PRICE_SCANNER.match(content, start)
+        if match:
+            end = match.end()
+            yield match
+
+
+def scan_prices(content: str) -> Iterator[PriceMatch]:
+    """Yield every price mention in `content` in one left-to-right pass."""
+    if not content:
+        return
+    for match in _iter_matches(content):
+        if match.group("pre_amt") is not None:
+            raw_amount, raw_currency = match.group("pre_amt"), match.group("pre_cur")
+        elif match.group("suf_amt") is not None:
+            raw_amount, raw_currency = match.group("suf_amt"), match.group("suf_cur")
+        else:
+            raw_amount, raw_currency = match.group("kw_amt"), match.group("kw_pre") or match.group("kw_suf")
+
+        start, end = match.span()
+        yield PriceMatch(
+            amount=parse_amount(raw_amount),
+            currency=CURRENCY_ALIASES.get(raw_currency.upper()) if raw_currency else None,
+            offset=start,
+            context=content[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS],
+        )
+
+
+def _in_suit_range(amount_eur: Optional[float]) -> bool:
+    return amount_eur is not None and MIN_SUIT_PRICE_EUR < amount_eur < MAX_SUIT_PRICE_EUR
+
+
+def has_price(content: str) -> bool:
+    """
+    True if extract_price_from_content would find a price (a currency amount in the suit
+    range); decides on deep price discovery.
+    """
+    return any(_in_suit_range(to_eur(price.amount, price.currency)) for price in scan_prices(content))
+
+
+def trimmed_mean(values: List[float], ratio: float = TRIM_RATIO) -> float:
+    """Mean after dropping `ratio` of the values at each end (plain mean for small samples)."""
+    ordered = sorted(values)
+    cut = int(len(ordered) * ratio) if len(ordered) >= TRIM_MIN_PRICES else 0
+    kept = ordered[cut:len(ordered) - cut] if cut else ordered
+    return sum(kept) / len(kept)
+
+
+def extract_price_from_content(content: str) -> Dict[str, Any]:
     """
     Heuristic to find average price in content for rapid filtering.
-    Supports various currency formats (€, $, £).
+    Supports various currency formats (€, $, £, CHF, ...), converted to EUR.
+
+    Prices next to suit vocabulary are preferred; when there are none, every
+    price in the suit range is used.
     """
     if not content:
         return {"avg_price": 0}
-        
-    # Search for price patterns: $1,299 or €1.299 or 899€ or 500 EUR
-    # Captured groups handle both prefix and suffix currencies
-    patterns = [
-        r'[$€£]\s?(\d{1,3}(?:[,.]\d{3})*(?:[.,]\d{2})?)', # Prefix
-        r'(\d{1,3}(?:[,.]\d{3})*(?:[.,]\d{2})?)\s?[$€£]', # Suffix
-        r'(\d{1,3}(?:[,.]\d{3})*(?:[.,]\d{2})?)\s?EUR'     # Text EUR
-    ]
-    
-    all_prices = []
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, content)
-        for m in matches:
-            try:
-                # Basic cleaning: remove dots/commas to get raw numbers
-                # We assume if there's both , and . it's a decimal format 1.299,00
-                if ',' in m and '.' in m:
-                    # Heuristic: Suit prices are usually > 100, so 1.299,00 -> 1299
-                    val_str = m.replace(',', '').replace('.', '')
-                    val = float(val_str) / 100
-                elif ',' in m:
-                    # Could be 1,299 or 12,99
-                    val_str = m.replace(',', '')
-                    val = float(val_str)
-                elif '.' in m:
-                    # Could be 1.299 or 12.99
-                    val_str = m.replace('.', '')
-                    val = float(val_str)
-                else:
-                    val = float(m)
-                
-                # Filter reasonable suit prices (between 150 and 6000 EUR)
-                if 150 < val < 6000:
-                    all_prices.append(val)
-            except Exception:
-                continue
-            
-    if not all_prices:
+
+    suit_prices, other_prices, currencies = [], [], set()
+    for price in scan_prices(content):
+        amount_eur = to_eur(price.amount, price.currency)
+        # Filter reasonable suit prices (between 150 and 6000 EUR)
+        if not _in_suit_range(amount_eur):
+            continue
+        currencies.add(price.currency)
+        if _SUIT_CONTEXT.search(price.context):
+            suit_prices.append(amount_eur)
+        else:
+            other_prices.append(amount_eur)
+
+    prices = suit_prices or other_prices
+    if not prices:
         return {"avg_price": 0}
-        
-    avg_price = sum(all_prices) / len(all_prices)
-    return {"avg_price": avg_price}
+
+    return {
+        "avg_price": trimmed_mean(prices),
+        "median_price": statistics.median(prices),
+        "price_count": len(prices),
+        "suit_context": bool(suit_prices),
+        "currencies": sorted(currencies),
+    }
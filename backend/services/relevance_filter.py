@@ -0,0 +1,240 @@
+"""
+Relevance Pre-Filter
+Cheap first pass that drops directories, blogs and non-menswear pages before
+price extraction, embeddings and the LLM see them.
+
+- Positive/strong keywords of the selected languages are compiled into one regex,
+  so a page is scored in a single pass over its first MAX_CHARS characters
+- Pages can be fed in chunks while downloading (RelevanceStream) and rejected
+  as soon as MAX_CHARS characters are in without enough evidence
+- Per-keyword hit counters (see stats()) show which keywords actually decide
+
+Scoring (same rules as the original filter_by_keywords):
+    score = number of distinct positive keywords found
+          + STRONG_BONUS if any strong keyword is found
+    relevant when score >= MIN_SCORE and the URL has no negative keyword.
+Keywords match as substrings, ignoring case and accents.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Pattern, Set
+
+from config import Config
+from data.premium_locations import fold_accents
+
+MAX_CHARS = 5000
+MIN_SCORE = 2
+STRONG_BONUS = 3
+
+# "base" is always active; the others are added via Config.RELEVANCE_LANGUAGES
+KEYWORD_SETS: Dict[str, Dict[str, List[str]]] = {
+    "base": {
+        "positive": ["suit", "fato", "jacket", "blazer", "tailor", "sartorial", "bespoke", "abito", "traje", "costume", "menswear", "moda"],
+        "strong": ["suit", "tailor", "bespoke", "sartorial"],
+        "negative_url": ["yelp", "tripadvisor", "directory", "pages", "list", "blog", "news", "guide", "ranking"],
+    },
+    "pt": {
+        "positive": ["alfaiate", "alfaiataria", "casaco", "moda masculina", "fatos por medida"],
+        "strong": ["alfaiataria", "por medida"],
+        "negative_url": ["paginasamarelas", "noticias"],
+    },
+    "es": {
+        "positive": ["sastre", "sastreria", "americana", "moda hombre", "trajes a medida"],
+        "strong": ["sastreria", "a medida"],
+        "negative_url": ["paginasamarillas", "noticias"],
+    },
+    "it": {
+        "positive": ["sartoria", "giacca", "moda uomo", "abiti su misura"],
+        "strong": ["sartoria", "su misura"],
+        "negative_url": ["paginegialle", "notizie"],
+    },
+    "fr": {
+        "positive": ["tailleur", "veste", "mode homme", "costumes sur mesure"],
+        "strong": ["sur mesure", "tailleur"],
+        "negative_url": ["pagesjaunes", "actualites"],
+    },
+    "de": {
+        "positive": ["anzug", "sakko", "herrenmode", "schneider", "massanzug"],
+        "strong": ["massanzug", "masskonfektion", "schneiderei"],
+        "negative_url": ["gelbeseiten", "nachrichten"],
+    },
+}
+
+
+def _normalize(text: str) -> str:
+    return fold_accents(text).replace("ß", "ss")
+
+
+def _compile_any(keywords: Iterable[str]) -> Optional[Pattern]:
+    """
+    One regex reporting, at every position, the longest keyword starting there.
+    The lookahead makes matches overlap, so no occurrence hides another one.
+    """
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    if not ordered:
+        return None
+    return re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+
+
+class RelevanceFilter:
+    def __init__(self, languages: Optional[Iterable[str]] = None, max_chars: int = MAX_CHARS, min_score: int = MIN_SCORE):
+        self.languages = ["base"] + [lang for lang in (languages or []) if lang in KEYWORD_SETS and lang != "base"]
+        self.max_chars = max_chars
+        self.min_score = min_score
+
+        positive, strong, negative = set(), set(), set()
+        for lang in self.languages:
+            positive.update(_normalize(kw) for kw in KEYWORD_SETS[lang]["positive"])
+            strong.update(_normalize(kw) for kw in KEYWORD_SETS[lang]["strong"])
+            negative.update(_normalize(kw) for kw in KEYWORD_SETS[lang]["negative_url"])
+        self.positive, self.strong, self.negative = positive, strong, negative
+
+        keywords = positive | strong
+        self._content_pattern = _compile_any(keywords)
+        self._url_pattern = _compile_any(negative)
+        # A hit on a keyword is also a hit on every keyword it contains ("tailoring" -> "tailor")
+        self._implied = {kw: {other for other in keywords if other in kw} for kw in keywords}
+        self._longest = max((len(kw) for kw in keywords), default=1)
+
+        self._keyword_hits: Counter = Counter()
+        self._negative_hits: Counter = Counter()
+        self._counters: Counter = Counter()
+
+    # ------------------------------------------------------------------
+    # SCORING
+    # ------------------------------------------------------------------
+
+    def url_negative_hits(self, url: str) -> Set[str]:
+        if not url or not self._url_pattern:
+            return set()
+        return {m.group(1) for m in self._url_pattern.finditer(_normalize(url.lower()))}
+
+    def is_url_excluded(self, url: str) -> bool:
+        """True if the URL contains a negative keyword (no need to fetch it). Counted in stats."""
+        negative = self.url_negative_hits(url)
+        if negative:
+            self._record(set(), negative, False)
+        return bool(negative)
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """All positive/strong keywords contained in `text` (single pass)."""
+        hits: Set[str] = set()
+        if text and self._content_pattern:
+            for match in self._content_pattern.finditer(_normalize(text.lower())):
+                hits |= self._implied[match.group(1)]
+        return hits
+
+    def score_keywords(self, hits: Set[str]) -> int:
+        score = len(hits & self.positive)
+        if hits & self.strong:
+            score += STRONG_BONUS
+        return score
+
+    def evaluate(self, url: str, content: str) -> Dict:
+        """Score one page. Returns {"relevant", "score", "keywords", "negative_url_keywords"}."""
+        negative = self.url_negative_hits(url)
+        hits = set() if negative else self.find_keywords((content or "")[:self.max_chars])
+        score = self.score_keywords(hits)
+        relevant = not negative and score >= self.min_score
+        self._record(hits, negative, relevant)
+        return {"relevant": relevant, "score": score, "keywords": sorted(hits), "negative_url_keywords": sorted(negative)}
+
+    def stream(self, url: str) -> "RelevanceStream":
+        """Incremental scorer for a page that is still downloading."""
+        return RelevanceStream(self, url)
+
+    # ------------------------------------------------------------------
+    # STATS
+    # ------------------------------------------------------------------
+
+    def _record(self, hits: Set[str], negative: Set[str], relevant: bool, streamed: bool = False):
+        self._counters["pages"] += 1
+        if negative:
+            self._counters["rejected_url"] += 1
+        elif streamed:
+            self._counters["rejected_while_streaming"] += 1
+        elif relevant:
+            self._counters["accepted"] += 1
+        else:
+            self._counters["rejected_content"] += 1
+        for kw in hits:
+            self._keyword_hits[(kw, relevant)] += 1
+        self._negative_hits.update(negative)
+
+    def stats(self) -> Dict:
+        """Per-keyword hit counts (pages containing the keyword, split by outcome)."""
+        keywords = sorted(self.positive | self.strong)
+        return {
+            "languages": self.languages,
+            "pages": dict(self._counters),
+            "keywords": {
+                kw: {
+                    "accepted_pages": self._keyword_hits[(kw, True)],
+                    "rejected_pages": self._keyword_hits[(kw, False)],
+                    "strong": kw in self.strong,
+                }
+                for kw in keywords
+            },
+            "negative_url_keywords": {kw: self._negative_hits[kw] for kw in sorted(self.negative)},
+        }
+
+    def reset_stats(self):
+        self._keyword_hits.clear()
+        self._negative_hits.clear()
+        self._counters.clear()
+
+
+class RelevanceStream:
+    """
+    Feed a page chunk by chunk. feed() returns True once the page is relevant,
+    False once MAX_CHARS characters are in without reaching MIN_SCORE, else None.
+
+    Only rejections are counted in stats: accepted pages are downloaded in full
+    and counted when evaluate() sees them.
+    """
+
+    def __init__(self, relevance_filter: RelevanceFilter, url: str):
+        self._filter = relevance_filter
+        self._text = ""
+        self._scanned = 0
+        self._hits: Set[str] = set()
+        self.decision: Optional[bool] = False if relevance_filter.is_url_excluded(url) else None
+
+    @property
+    def score(self) -> int:
+        return self._filter.score_keywords(self._hits)
+
+    def feed(self, chunk: str) -> Optional[bool]:
+        if self.decision is not None or not chunk:
+            return self.decision
+
+        self._text += chunk[:self._filter.max_chars - len(self._text)]
+        # Rescan the tail of the previous chunk so keywords split across chunks are found
+        start = max(0, self._scanned - self._filter._longest + 1)
+        self._hits |= self._filter.find_keywords(self._text[start:])
+        self._scanned = len(self._text)
+
+        if self.score >= self._filter.min_score:
+            self._decide(True)
+        elif len(self._text) >= self._filter.max_chars:
+            self._decide(False)
+        return self.decision
+
+    def finish(self) -> bool:
+        """Decide at end of content (pages shorter than MAX_CHARS)."""
+        if self.decision is None:
+            self._decide(self.score >= self._filter.min_score)
+        return self.decision
+
+    def _decide(self, relevant: bool):
+        self.decision = relevant
+        if not relevant:
+            self._filter._record(self._hits, set(), False, streamed=True)
+
+
+def _configured_languages() -> List[str]:
+    return [lang.strip().lower() for lang in (Config.RELEVANCE_LANGUAGES or "").split(",") if lang.strip()]
+
+
+# Singleton instance (languages from Config.RELEVANCE_LANGUAGES, e.g. "pt,es")
+relevance_filter = RelevanceFilter(_configured_languages())
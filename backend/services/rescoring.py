@@ -0,0 +1,356 @@
+"""
+Rescoring Service
+Recomputes stored prospect scores after thresholds in vector_db.py change
+or client embeddings are refreshed.
+
+- Walks `prospects` in keyset-ordered chunks (ORDER BY id)
+- Similarity comes from the cached `profile_embedding` (embedded once, in batches)
+- Each chunk is scored in one pass by the columnar kernel (scoring_kernel.py)
+- Changed rows are written back with one bulk UPDATE per chunk
+- Progress is checkpointed in `rescore_jobs`, so jobs resume after interruption
+- Dry-run mode writes nothing and reports the score-distribution diff
+"""
+import asyncio
+import json
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from .postgres import PostgresManager
+from .llm_metrics import llm_attribution
+from .vector_db import (
+    generate_client_profile_text,
+    embed_profile_texts,
+    find_similar_clients_for_embeddings,
+    fallback_similarity_explanation,
+    get_clients_count,
+    populate_clients_database,
+)
+from .scoring_kernel import score_prospects
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Same brackets as the dashboard score distribution (database.get_dashboard_stats)
+SCORE_BUCKETS = [("excellent", 80), ("good", 65), ("average", 50), ("low", float("-inf"))]
+
+DELTA_BINS = [
+    ("down_10_plus", float("-inf"), -10),
+    ("down_1_9", -9, -1),
+    ("unchanged", 0, 0),
+    ("up_1_9", 1, 9),
+    ("up_10_plus", 10, float("inf")),
+]
+
+# Background tasks started from the API (kept referenced so they are not garbage-collected)
+_running_jobs: Dict[str, asyncio.Task] = {}
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def score_bucket(score: float) -> str:
+    for name, threshold in SCORE_BUCKETS:
+        if score >= threshold:
+            return name
+    return "low"
+
+
+def _empty_report() -> Dict:
+    buckets = {name: 0 for name, _ in SCORE_BUCKETS}
+    return {
+        "before": dict(buckets),
+        "after": dict(buckets),
+        "sum_before": 0,
+        "sum_after": 0,
+        "count": 0,
+        "deltas": {name: 0 for name, _, _ in DELTA_BINS},
+    }
+
+
+def _add_to_report(report: Dict, old_score: int, new_score: int):
+    report["before"][score_bucket(old_score)] += 1
+    report["after"][score_bucket(new_score)] += 1
+    report["sum_before"] += old_score
+    report["sum_after"] += new_score
+    report["count"] += 1
+    delta = new_score - old_score
+    for name, low, high in DELTA_BINS:
+        if low <= delta <= high:
+            report["deltas"][name] += 1
+            break
+
+
+def summarize_report(report: Dict) -> Dict:
+    """Turn the accumulated counters into a readable distribution diff."""
+    count = report.get("count", 0)
+    return {
+        "count": count,
+        "mean_before": round(report["sum_before"] / count, 2) if count else 0,
+        "mean_after": round(report["sum_after"] / count, 2) if count else 0,
+        "buckets": {
+            name: {
+                "before": report["before"][name],
+                "after": report["after"][name],
+                "diff": report["after"][name] - report["before"][name],
+            }
+            for name, _ in SCORE_BUCKETS
+        },
+        "score_deltas": report["deltas"],
+    }
+
+
+# ============================================================================
+# JOB STATE
+# ============================================================================
+
+async def create_rescore_job(dry_run: bool = False, reembed: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    job_id = uuid.uuid4().hex[:16]
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            INSERT INTO rescore_jobs (id, dry_run, reembed, chunk_size, report)
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING *
+        """, job_id, dry_run, reembed, chunk_size, json.dumps(_empty_report()))
+    return _job_to_dict(row)
+
+
+def _job_to_dict(row) -> Dict:
+    job = dict(row)
+    report = job.get("report")
+    if isinstance(report, str):
+        report = json.loads(report)
+    job["report"] = report or _empty_report()
+    job["summary"] = summarize_report(job["report"])
+    job["is_running"] = job["id"] in _running_jobs
+    return job
+
+
+async def get_rescore_job(job_id: str) -> Optional[Dict]:
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT * FROM rescore_jobs WHERE id = $1", job_id)
+    return _job_to_dict(row) if row else None
+
+
+async def _update_job(job_id: str, **fields):
+    if "report" in fields:
+        fields["report"] = json.dumps(fields["report"])
+    assignments = ", ".join(f"{key} = ${i}" for i, key in enumerate(fields, start=2))
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            f"UPDATE rescore_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = $1",
+            job_id, *fields.values()
+        )
+
+
+# ============================================================================
+# CHUNK PROCESSING
+# ============================================================================
+
+def prospect_row_to_scoring_input(row: Dict) -> Dict:
+    """
+    Rebuild, from a stored prospects row, the prospect dict that persistence
+    (agents/nodes/persistence.py) passed to calculate_prospect_score (the keys
+    scoring and the profile text read). Like that dict it has no wool_percentage,
+    so the wool component scores 0 here too.
+    """
+    materials = row.get("material_composition") or []
+    if isinstance(materials, str):
+        try:
+            materials = json.loads(materials)
+        except ValueError:
+            materials = [materials]
+    return {
+        "name": row["name"],
+        "country": row.get("country"),
+        "country_code": row.get("country_code") or "XX",
+        "city": row.get("city"),
+        "store_count": row.get("store_count") or 0,
+        "avg_suit_price_eur": row.get("avg_suit_price_eur") or 0,
+        "material_composition": materials,
+        "made_to_measure": row.get("made_to_measure"),
+    }
+
+
+async def _fetch_chunk(last_id: Optional[str], chunk_size: int) -> List[Dict]:
+    """Next keyset chunk, with the best client match computed from the cached embedding."""
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT p.id, p.name, p.country, p.country_code, p.city, p.store_count,
+                   p.avg_suit_price_eur, p.material_composition, p.made_to_measure,
+                   p.final_score, p.similarity_score, p.most_similar_client,
+                   p.profile_embedding IS NOT NULL AS has_embedding,
+                   best.name AS best_client, best.similarity AS best_similarity
+            FROM prospects p
+            LEFT JOIN LATERAL (
+                SELECT c.name, 1 - (c.embedding <=> p.profile_embedding) AS similarity
+                FROM lanca_clients c
+                WHERE p.profile_embedding IS NOT NULL
+                ORDER BY c.embedding <=> p.profile_embedding
+                LIMIT 1
+            ) best ON TRUE
+            WHERE p.id > $1
+            ORDER BY p.id
+            LIMIT $2
+        """, last_id or "", chunk_size)
+    return [dict(row) for row in rows]
+
+
+async def _write_chunk(updates: List[Dict]):
+    """Bulk-write changed scores (and newly computed embeddings) in one statement."""
+    if not updates:
+        return
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            UPDATE prospects p SET
+                final_score = u.final_score,
+                similarity_score = u.similarity_score,
+                most_similar_client = u.most_similar_client,
+                similarity_explanation = COALESCE(u.similarity_explanation, p.similarity_explanation),
+                profile_embedding = COALESCE(u.embedding::vector, p.profile_embedding),
+                updated_at = CURRENT_TIMESTAMP
+            FROM unnest($1::text[], $2::int[], $3::int[], $4::text[], $5::text[], $6::text[])
+                AS u(id, final_score, similarity_score, most_similar_client, similarity_explanation, embedding)
+            WHERE p.id = u.id
+        """,
+            [u["id"] for u in updates],
+            [u["final_score"] for u in updates],
+            [u["similarity_score"] for u in updates],
+            [u["most_similar_client"] for u in updates],
+            [u["similarity_explanation"] for u in updates],
+            [u["embedding"] for u in updates],
+        )
+
+
+async def rescore_chunk(rows: List[Dict], reembed: bool = False) -> List[Dict]:
+    """
+    Recompute scores for a chunk of prospects rows.
+    Returns one result per row with the old/new values and any new embedding.
+    """
+    needs_embedding = [row for row in rows if reembed or not row["has_embedding"]]
+    new_embeddings: Dict[str, str] = {}
+    if needs_embedding:
+        profile_texts = [generate_client_profile_text(prospect_row_to_scoring_input(r)) for r in needs_embedding]
+        embeddings = await embed_profile_texts(profile_texts)
+        similar = await find_similar_clients_for_embeddings(embeddings, n_results=1)
+        for row, embedding, clients in zip(needs_embedding, embeddings, similar):
+            new_embeddings[row["id"]] = str(embedding)
+            row["best_client"] = clients[0]["name"] if clients else None
+            row["best_similarity"] = clients[0]["similarity"] / 100 if clients else None
+
+    similar_clients = [
+        {"name": row["best_client"], "similarity": round(row["best_similarity"] * 100, 2)}
+        if row.get("best_client") is not None and row.get("best_similarity") is not None else None
+        for row in rows
+    ]
+    scores = score_prospects(
+        [prospect_row_to_scoring_input(row) for row in rows],
+        [client["similarity"] if client else None for client in similar_clients],
+    )
+
+    results = []
+    for i, (row, best) in enumerate(zip(rows, similar_clients)):
+        most_similar = best["name"] if best else "N/A"
+        results.append({
+            "id": row["id"],
+            "old_final_score": row["final_score"] or 0,
+            "final_score": int(scores["final_score"][i]),
+            "old_similarity_score": row["similarity_score"] or 0,
+            "similarity_score": int(scores["similarity_score"][i]),
+            "old_most_similar_client": row["most_similar_client"],
+            "most_similar_client": most_similar,
+            # A different best match invalidates the stored LLM explanation
+            "similarity_explanation": (
+                fallback_similarity_explanation(best)
+                if best and most_similar != row["most_similar_client"] else None
+            ),
+            "embedding": new_embeddings.get(row["id"]),
+        })
+    return results
+
+
+def _scores_changed(result: Dict) -> bool:
+    return (
+        result["final_score"] != result["old_final_score"]
+        or result["similarity_score"] != result["old_similarity_score"]
+        or result["most_similar_client"] != result["old_most_similar_client"]
+    )
+
+
+# ============================================================================
+# JOB RUNNER
+# ============================================================================
+
+async def run_rescore_job(job_id: str, on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Run (or resume) a rescoring job from its last checkpoint."""
+    job = await get_rescore_job(job_id)
+    if not job:
+        raise ValueError(f"Rescore job {job_id} not found")
+    if job["status"] == "completed":
+        return job
+
+    last_id = job["last_id"]
+    processed, changed, report = job["rows_processed"], job["rows_changed"], job["report"]
+    mode = "DRY-RUN" if job["dry_run"] else "WRITE"
+    print(f"[RESCORE] ▶️ Job {job_id} ({mode}) resuming after id={last_id}")
+    await _update_job(job_id, status="running", error=None)
+
+    try:
+        if await get_clients_count() == 0:
+            await populate_clients_database()
+
+        while True:
+            rows = await _fetch_chunk(last_id, job["chunk_size"])
+            if not rows:
+                break
+
+            results = await rescore_chunk(rows, reembed=job["reembed"])
+            changed_results = [r for r in results if _scores_changed(r)]
+            if not job["dry_run"]:
+                # Newly computed embeddings are cached even when the score is unchanged
+                await _write_chunk([r for r in results if _scores_changed(r) or r["embedding"]])
+
+            for r in results:
+                _add_to_report(report, r["old_final_score"], r["final_score"])
+            last_id = rows[-1]["id"]
+            processed += len(rows)
+            changed += len(changed_results)
+            await _update_job(job_id, last_id=last_id, rows_processed=processed, rows_changed=changed, report=report)
+
+            print(f"[RESCORE] Job {job_id}: {processed} processed, {changed} changed")
+            if on_progress:
+                on_progress({"rows_processed": processed, "rows_changed": changed})
+
+        await _update_job(job_id, status="completed")
+        if not job["dry_run"]:
+            from .what_if import invalidate_snapshot  # what_if imports this module
+            invalidate_snapshot()
+        print(f"[RESCORE] ✅ Job {job_id} completed ({processed} rows, {changed} changed)")
+    except Exception as e:
+        print(f"[RESCORE] ❌ Job {job_id} failed after id={last_id}: {e}")
+        await _update_job(job_id, status="failed", error=str(e))
+        raise
+
+    return await get_rescore_job(job_id)
+
+
+def start_rescore_job(job_id: str) -> bool:
+    """Run a rescoring job in the background. Returns False if it is already running."""
+    if job_id in _running_jobs:
+        return False
+
+    async def runner():
+        try:
+            with llm_attribution(node="rescore_job"):
+                await run_rescore_job(job_id)
+        except Exception:
+            pass  # Failure is recorded on the job row
+        finally:
+            _running_jobs.pop(job_id, None)
+
+    _running_jobs[job_id] = asyncio.create_task(runner())
+    return True
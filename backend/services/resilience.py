@@ -0,0 +1,350 @@
+"""
+Provider Resilience
+Shared rate limiting, adaptive concurrency and circuit breaking for the external
+providers: Tavily (search, extract), Firecrawl, Jina Reader and Azure OpenAI
+(chat, embeddings). Every call to them goes through resilience.guard().
+
+- Token bucket per provider (requests per minute + burst), e.g. Jina's 20 rpm
+- AIMD concurrency: the in-flight limit grows by one per window of healthy calls
+  and halves on a 429 or on a call slower than the provider's latency target
+- Circuit breaker: after `failure_threshold` consecutive failures the provider is
+  skipped for `open_seconds` (CircuitOpenError right away, so callers go straight
+  to their fallback), then a single probe call decides whether it closes again
+- Defaults in PROVIDER_DEFAULTS, overridable per provider with PROVIDER_LIMITS
+  (JSON), e.g. {"jina": {"rate_per_minute": 200}, "firecrawl": {"max_concurrency": 10}}
+- Counters, current limits, breaker state and latency percentiles per provider:
+  resilience.stats() (GET /api/analytics/providers)
+
+Usage:
+    async with resilience.guard("firecrawl") as call:
+        result = await asyncio.to_thread(app.scrape, url=url)
+        if result is None:
+            call.failed("empty response")   # outcomes that are not exceptions
+
+    response = await resilience.run_sync("tavily_search", client.search, query=query)
+"""
+import asyncio
+import contextlib
+import json
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+
+# Tavily / Firecrawl rate limits depend on the plan: no bucket by default (AIMD backs off
+# on their 429s); set e.g. {"firecrawl": {"rate_per_minute": 100}} in PROVIDER_LIMITS
+PROVIDER_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "tavily_search": {"rate_per_minute": None, "initial_concurrency": 4, "max_concurrency": 8,
+                      "latency_target_ms": 8000, "failure_threshold": 5, "open_seconds": 60},
+    "tavily_extract": {"rate_per_minute": None, "initial_concurrency": 2, "max_concurrency": 4,
+                       "latency_target_ms": 20000, "failure_threshold": 3, "open_seconds": 60},
+    "firecrawl": {"rate_per_minute": None, "initial_concurrency": 5, "max_concurrency": 20,
+                  "latency_target_ms": 15000, "failure_threshold": 8, "open_seconds": 60},
+    "jina": {"rate_per_minute": 200 if Config.JINA_API_KEY else 20, "burst": 3, "initial_concurrency": 3,
+             "max_concurrency": 10, "latency_target_ms": 20000, "failure_threshold": 5, "open_seconds": 60},
+    "azure_chat": {"rate_per_minute": None, "initial_concurrency": 8, "max_concurrency": 16,
+                   "latency_target_ms": 60000, "failure_threshold": 5, "open_seconds": 30},
+    "azure_embeddings": {"rate_per_minute": None, "initial_concurrency": 8, "max_concurrency": 16,
+                         "latency_target_ms": 10000, "failure_threshold": 5, "open_seconds": 30},
+}
+FALLBACK_SETTINGS = {"rate_per_minute": None, "burst": 5, "min_concurrency": 1, "initial_concurrency": 4,
+                     "max_concurrency": 8, "latency_target_ms": 30000, "failure_threshold": 5, "open_seconds": 60}
+
+# A burst of 429s from calls already in flight halves the limit only once
+DECREASE_COOLDOWN_S = 2.0
+LATENCY_SAMPLES = 500
+
+# Call outcomes
+SUCCESS, FAILED, RATE_LIMITED, CANCELLED = "success", "failed", "rate_limited", "cancelled"
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is open: the call was not attempted."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit open (retry in {retry_in:.1f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429 from any of the SDKs (status on the error or its response, else the message)."""
+    for obj in (error, getattr(error, "response", None)):
+        if obj is not None and 429 in (getattr(obj, "status_code", None), getattr(obj, "status", None)):
+            return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "too many requests" in text
+
+
+def _load_overrides() -> Dict[str, Dict[str, Any]]:
+    if not Config.PROVIDER_LIMITS:
+        return {}
+    try:
+        overrides = json.loads(Config.PROVIDER_LIMITS)
+        return {provider: dict(values) for provider, values in overrides.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"[RESILIENCE] Ignoring invalid PROVIDER_LIMITS: {e}")
+        return {}
+
+
+# ============================================================================
+# BUILDING BLOCKS
+# ============================================================================
+
+class TokenBucket:
+    """Requests per minute with bursts up to `burst`; acquire() waits for a token."""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take a token (waiting in arrival order). Returns the seconds waited."""
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+        return time.monotonic() - started
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit: +1 per `limit` healthy calls, halved on congestion."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum, self.maximum = max(1, minimum), max(1, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, congested: Optional[bool]) -> bool:
+        """Free a slot and adjust the limit (None: no signal). Returns True if the limit was cut."""
+        cut = False
+        async with self._condition:
+            self.in_flight -= 1
+            if congested:
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN_S:
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    self._last_decrease, cut = now, True
+            elif congested is False:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+        return cut
+
+
+class CircuitBreaker:
+    """closed -> open after consecutive failures -> half_open (one probe) -> closed / open."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may start now (in half_open, only the single probe may)."""
+        if self.state == self.OPEN and self.retry_in() == 0:
+            self.state, self._probing = self.HALF_OPEN, False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == self.CLOSED
+
+    def record(self, outcome: str) -> Optional[str]:
+        """Update from a call outcome. Returns the new state when it changed."""
+        probe, self._probing = self._probing, False
+        if outcome == SUCCESS:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                return self.CLOSED
+        elif outcome == FAILED or (probe and outcome == RATE_LIMITED):
+            self.failures += 1
+            if self.state == self.OPEN:
+                return None
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state, self.opened_at = self.OPEN, time.monotonic()
+                self.times_opened += 1
+                return self.OPEN
+        return None
+
+
+class ProviderCall:
+    """Handle yielded by guard(): report outcomes that are not exceptions."""
+
+    __slots__ = ("outcome", "reason")
+
+    def __init__(self):
+        self.outcome = SUCCESS
+        self.reason: Optional[str] = None
+
+    def failed(self, reason: str = ""):
+        self.outcome, self.reason = FAILED, reason
+
+    def rate_limited(self):
+        self.outcome = RATE_LIMITED
+
+
+# ============================================================================
+# PROVIDER GUARD
+# ============================================================================
+
+class ProviderGuard:
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        self.name = name
+        self.settings = settings
+        self.counters: Counter = Counter()
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self.breaker = CircuitBreaker(settings["failure_threshold"], settings["open_seconds"])
+        self._loop = None
+        self.bucket: Optional[TokenBucket] = None
+        self.limit: Optional[AdaptiveLimit] = None
+
+    def _bind(self):
+        """asyncio primitives belong to one event loop; rebuild them for a new one."""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        s = self.settings
+        self._loop = loop
+        self.bucket = TokenBucket(s["rate_per_minute"], s["burst"]) if s.get("rate_per_minute") else None
+        previous = int(self.limit.limit) if self.limit else s["initial_concurrency"]
+        self.limit = AdaptiveLimit(previous, s["min_concurrency"], s["max_concurrency"])
+
+    def is_open(self) -> bool:
+        return self.breaker.state == CircuitBreaker.OPEN and self.breaker.retry_in() > 0
+
+    @contextlib.asynccontextmanager
+    async def call(self):
+        self._bind()
+        if not self.breaker.allow():
+            self.counters["rejected"] += 1
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        try:
+            waited = await self.bucket.acquire() if self.bucket else 0.0
+            await self.limit.acquire()
+        except BaseException:
+            self.breaker.record(CANCELLED)
+            raise
+        self.counters["throttled_ms"] += round(waited * 1000)
+        if self.breaker.state == CircuitBreaker.OPEN:
+            # Opened while this call was queued
+            await self.limit.release(None)
+            self.counters["rejected"] += 1
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+
+        call = ProviderCall()
+        started = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            call.outcome, call.reason = (RATE_LIMITED, None) if is_rate_limit_error(e) else (FAILED, type(e).__name__)
+            raise
+        except BaseException:
+            call.outcome = CANCELLED
+            raise
+        finally:
+            await self._finish(call, (time.perf_counter() - started) * 1000)
+
+    async def _finish(self, call: ProviderCall, latency_ms: float):
+        self.counters["calls"] += 1
+        self.counters[call.outcome] += 1
+        slow = call.outcome == SUCCESS and latency_ms > self.settings["latency_target_ms"]
+        if call.outcome == SUCCESS:
+            self.latencies.append(latency_ms)
+            self.counters["slow"] += slow
+
+        congested = True if (slow or call.outcome == RATE_LIMITED) else (False if call.outcome == SUCCESS else None)
+        if await self.limit.release(congested):
+            why = "429" if call.outcome == RATE_LIMITED else f"{latency_ms:.0f}ms"
+            print(f"[RESILIENCE] {self.name}: concurrency cut to {int(self.limit.limit)} ({why})")
+
+        changed = self.breaker.record(call.outcome)
+        if changed == CircuitBreaker.OPEN:
+            print(f"[RESILIENCE] 🔴 {self.name} circuit open for {self.settings['open_seconds']}s "
+                  f"({self.breaker.failures} failures, last: {call.reason or call.outcome})")
+        elif changed == CircuitBreaker.CLOSED:
+            print(f"[RESILIENCE] 🟢 {self.name} circuit closed")
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: int) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))], 1) if latencies else None
+
+        return {
+            **{key: self.counters[key] for key in ("calls", SUCCESS, FAILED, RATE_LIMITED, CANCELLED, "slow", "rejected")},
+            "throttled_s": round(self.counters["throttled_ms"] / 1000, 1),
+            "circuit": "open" if self.is_open() else self.breaker.state,
+            "times_opened": self.breaker.times_opened,
+            "concurrency_limit": int(self.limit.limit) if self.limit else self.settings["initial_concurrency"],
+            "in_flight": self.limit.in_flight if self.limit else 0,
+            "rate_per_minute": self.settings.get("rate_per_minute"),
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+        }
+
+
+class Resilience:
+    def __init__(self):
+        self._overrides = _load_overrides()
+        self._providers: Dict[str, ProviderGuard] = {}
+
+    def settings(self, provider: str) -> Dict[str, Any]:
+        settings = dict(FALLBACK_SETTINGS)
+        settings.update(PROVIDER_DEFAULTS.get(provider, {}))
+        settings.update(self._overrides.get(provider, {}))
+        return settings
+
+    def provider(self, name: str) -> ProviderGuard:
+        if name not in self._providers:
+            self._providers[name] = ProviderGuard(name, self.settings(name))
+        return self._providers[name]
+
+    def guard(self, provider: str):
+        """async with: rate limit + concurrency slot + breaker for one call (raises CircuitOpenError)."""
+        return self.provider(provider).call()
+
+    def is_open(self, provider: str) -> bool:
+        """True while the provider is being skipped (callers can go to the fallback without trying)."""
+        return self.provider(provider).is_open()
+
+    async def run_sync(self, provider: str, fn: Callable, *args, **kwargs):
+        """Run a blocking SDK call in a worker thread under the provider's guard."""
+        async with self.guard(provider):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: guard.stats() for name, guard in sorted(self._providers.items())}
+
+
+# Singleton instance
+resilience = Resilience()
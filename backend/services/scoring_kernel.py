@@ -0,0 +1,238 @@
+"""
+Columnar Scoring Kernel
+
+NumPy implementation of the data-driven scoring rules in vector_db.py
+(passes_hard_filters, calculate_*_score, get_market_strength_score, score_prospect).
+Scores whole columns at once for bulk rescoring, imports and what-if analysis.
+
+Results are identical to the scalar path, including its parsing quirks:
+- Text prices/store counts are parsed like score_prospect
+  (store counts must be all digits, prices digits and dots)
+- Text prices never trigger the price hard filter (only real numbers do)
+- Wool / MTM / country codes are evaluated once per distinct value
+
+scripts/verify_scoring_kernel.py checks the equivalence on random inputs.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .vector_db import (
+    HARD_FILTER_MIN_PRICE_EUR,
+    HARD_FILTER_MAX_STORES,
+    IDEAL_PRICE_EUR,
+    IDEAL_MAX_STORES,
+    GOOD_PRICE_EUR,
+    SMALL_CHAIN_MAX_STORES,
+    MEDIUM_CHAIN_MAX_STORES,
+    calculate_wool_score,
+    calculate_mtm_score,
+    get_market_strength_score,
+)
+
+DEFAULT_THRESHOLDS = {
+    "hard_filter_min_price": HARD_FILTER_MIN_PRICE_EUR,
+    "good_price": GOOD_PRICE_EUR,
+    "ideal_price": IDEAL_PRICE_EUR,
+    "ideal_max_stores": IDEAL_MAX_STORES,
+    "small_chain_max_stores": SMALL_CHAIN_MAX_STORES,
+    "medium_chain_max_stores": MEDIUM_CHAIN_MAX_STORES,
+    "hard_filter_max_stores": HARD_FILTER_MAX_STORES,
+}
+
+# Component multipliers (1.0 = points as defined in vector_db.py)
+DEFAULT_WEIGHTS = {"price": 1.0, "size": 1.0, "wool": 1.0, "mtm": 1.0, "similarity": 1.0, "market": 1.0}
+
+# Score returned when the prospect has no similar client
+NEUTRAL_SIMILARITY_SCORE = 5
+
+# Rejection codes (same strings as passes_hard_filters)
+PRICE_TOO_LOW = "price_too_low"
+TOO_MANY_STORES = "too_many_stores"
+
+
+# ============================================================================
+# INPUT PREPARATION
+# ============================================================================
+
+def _parse_store_count(value: Any):
+    if isinstance(value, str):
+        return int(value) if value.isdigit() else 0
+    return 0 if value is None else value
+
+
+def _parse_price(value: Any):
+    if isinstance(value, str):
+        return float(value) if value.replace('.', '').isdigit() else 0
+    return 0 if value is None else value
+
+
+def columns_from_prospects(prospects: Sequence[Dict], top_similarities: Sequence[Optional[float]]) -> Dict[str, Any]:
+    """
+    Build kernel input columns from prospect dicts (as passed to score_prospect).
+    `top_similarities` holds the best match similarity (0-100) per prospect, or None.
+    """
+    raw_prices = [p.get("avg_suit_price_eur", 0) for p in prospects]
+    return {
+        "prices": np.array([_parse_price(v) for v in raw_prices], dtype=np.float64),
+        # passes_hard_filters only checks prices that are real numbers
+        "price_is_numeric": np.array([isinstance(v, (int, float)) for v in raw_prices], dtype=bool),
+        "store_counts": np.array([_parse_store_count(p.get("store_count", 0)) for p in prospects], dtype=np.float64),
+        "wool": [p.get("wool_percentage", "unknown") for p in prospects],
+        "made_to_measure": [p.get("made_to_measure", None) for p in prospects],
+        "country_codes": [p.get("country_code", "XX") for p in prospects],
+        "similarities": np.array([np.nan if s is None else s for s in top_similarities], dtype=np.float64),
+    }
+
+
+def _map_distinct(values: Sequence[Any], fn: Callable[[str], float]) -> np.ndarray:
+    """Apply `fn` once per distinct str(value) and broadcast the results back."""
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.float64)
+    as_text = np.asarray(values, dtype=object).astype(str)
+    distinct, inverse = np.unique(as_text, return_inverse=True)
+    lookup = np.array([fn(value) for value in distinct], dtype=np.float64)
+    return lookup[inverse.reshape(-1)]
+
+
+def round_like_python(values: np.ndarray, ndigits: int = 2) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's round(x, ndigits).
+    np.round agrees with round() except next to .5 ties, which are recomputed exactly.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_tie):
+        rounded[index] = round(float(values[index]), ndigits)
+    return rounded
+
+
+# ============================================================================
+# KERNEL
+# ============================================================================
+
+def score_columns(
+    prices: np.ndarray,
+    store_counts: np.ndarray,
+    wool: Sequence[Any],
+    made_to_measure: Sequence[Any],
+    country_codes: Sequence[Any],
+    similarities: np.ndarray,
+    price_is_numeric: Optional[np.ndarray] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Score N prospects in one pass.
+
+    Args:
+        prices: Average suit price in EUR (0 = unknown)
+        store_counts: Number of stores (0 = B2B/unknown)
+        wool: Wool descriptions (e.g. "100% wool")
+        made_to_measure: MTM flags (True/False/None or their text form)
+        country_codes: ISO country codes
+        similarities: Best client similarity 0-100, NaN when there is no match
+        price_is_numeric: Which prices may trigger the price hard filter (default: all)
+        thresholds: Overrides for DEFAULT_THRESHOLDS
+        weights: Multipliers per component ("price", "size", "wool", "mtm",
+            "similarity", "market") applied to the final score only
+
+    Returns:
+        Dict of arrays: final_score, passes_hard_filters, rejection_reason and the
+        score_prospect breakdown (price/size/wool/mtm/similarity/market_score, unweighted)
+    """
+    t = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    prices = np.asarray(prices, dtype=np.float64)
+    stores = np.asarray(store_counts, dtype=np.float64)
+    similarities = np.asarray(similarities, dtype=np.float64)
+    if price_is_numeric is None:
+        price_is_numeric = np.ones(len(prices), dtype=bool)
+
+    # Hard filters (price is checked first, like passes_hard_filters)
+    price_too_low = price_is_numeric & (prices > 0) & (prices < t["hard_filter_min_price"])
+    too_many_stores = stores > t["hard_filter_max_stores"]
+    passes = ~(price_too_low | too_many_stores)
+    rejection_reason = np.full(len(prices), None, dtype=object)
+    rejection_reason[too_many_stores] = TOO_MANY_STORES
+    rejection_reason[price_too_low] = PRICE_TOO_LOW
+
+    price_score = np.select(
+        [prices == 0, prices >= t["ideal_price"], prices >= t["good_price"], prices >= t["hard_filter_min_price"]],
+        [15, 30, 20, 10],
+        default=0,
+    )
+    size_score = np.select(
+        [
+            stores == 0,
+            stores <= t["ideal_max_stores"],
+            stores <= t["small_chain_max_stores"],
+            stores <= t["medium_chain_max_stores"],
+            stores <= t["hard_filter_max_stores"],
+        ],
+        [25, 30, 20, 10, 5],
+        default=0,
+    )
+    # str(True) == "True", so the scalar rules give the same answer on the text form
+    wool_score = _map_distinct(wool, calculate_wool_score)
+    mtm_score = _map_distinct(made_to_measure, calculate_mtm_score)
+    market_score = _map_distinct(country_codes, get_market_strength_score)
+
+    has_match = ~np.isnan(similarities)
+    similarity_score = np.where(
+        has_match,
+        np.minimum(np.where(has_match, similarities, 0) * 0.1, 10),
+        NEUTRAL_SIMILARITY_SCORE,
+    )
+
+    if weights:
+        w = {**DEFAULT_WEIGHTS, **weights}
+        final_score = (
+            price_score * w["price"] + size_score * w["size"] + wool_score * w["wool"]
+            + mtm_score * w["mtm"] + similarity_score * w["similarity"] + market_score * w["market"]
+        )
+    else:
+        # Same addition order as score_prospect so float results match exactly
+        final_score = (price_score + size_score + wool_score + mtm_score).astype(np.float64)
+        final_score = final_score + similarity_score
+        final_score = final_score + market_score
+    final_score = np.where(passes, final_score, np.minimum(final_score, 40))
+
+    return {
+        "final_score": round_like_python(final_score),
+        "passes_hard_filters": passes,
+        "rejection_reason": rejection_reason,
+        "price_score": price_score.astype(np.int64),
+        "size_score": size_score.astype(np.int64),
+        "wool_score": wool_score.astype(np.int64),
+        "mtm_score": mtm_score.astype(np.int64),
+        "similarity_score": round_like_python(similarity_score),
+        "market_score": round_like_python(market_score),
+    }
+
+
+def score_prospects(
+    prospects: Sequence[Dict],
+    top_similarities: Sequence[Optional[float]],
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """score_columns for prospect dicts (see columns_from_prospects)."""
+    return score_columns(**columns_from_prospects(prospects, top_similarities), thresholds=thresholds)
+
+
+def top_similarity(similar_clients: List[Dict]) -> Optional[float]:
+    """Best match similarity from find_similar_clients output (None when empty)."""
+    return similar_clients[0]["similarity"] if similar_clients else None
+
+
+BREAKDOWN_FIELDS = ["price_score", "size_score", "wool_score", "mtm_score", "similarity_score", "market_score"]
+
+
+def row_scores(result: Dict[str, np.ndarray], index: int) -> Dict:
+    """One row of a kernel result in the score_prospect layout (without explanation)."""
+    return {
+        "final_score": result["final_score"][index].item(),
+        "passes_hard_filters": bool(result["passes_hard_filters"][index]),
+        "rejection_reason": result["rejection_reason"][index],
+        "breakdown": {field: result[field][index].item() for field in BREAKDOWN_FIELDS},
+    }
@@ -0,0 +1,219 @@
+"""
+State Store
+Keeps large workflow payloads out of the LangGraph checkpoints. The Postgres
+checkpointer re-serializes the channel values on every step, so search results
+(up to 90 results with content), candidate URLs and the ever-growing progress
+list were written again after each node and read back by every aget_state().
+
+- Blobs are content-addressed (`state_blobs`, key = SHA-256 of the JSON) and
+  zlib-compressed; the graph state only holds the key in "<field>_ref"
+- offload() / hydrate() run in the graph's node wrapper (agents/graph.py), so the
+  nodes keep reading and returning plain lists; accumulating fields (operator.add
+  in GraphState) are merged with the stored list before being written again
+- Progress messages go to `workflow_events` (one insert per node run) and are read
+  back with progress_messages(); if that insert fails they stay in the state
+- STATE_OFFLOAD_ENABLED=false keeps everything in the checkpoint as before
+"""
+import hashlib
+import json
+import zlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from .postgres import PostgresManager
+
+# Decoded blobs kept in memory (a node usually reads what the previous one wrote)
+BLOB_CACHE_ENTRIES = 32
+
+# state key -> (reference key, item model to rebuild or None, accumulates)
+OffloadSpec = Dict[str, Tuple[str, Optional[type], bool]]
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+class StateStore:
+    def __init__(self):
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._stats: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return Config.STATE_OFFLOAD_ENABLED
+
+    def _remember(self, key: str, text: str):
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > BLOB_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # BLOBS
+    # ------------------------------------------------------------------
+
+    async def put(self, kind: str, value: Any) -> str:
+        """Store a JSON-serializable value (pydantic models allowed) and return its key."""
+        text = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+        data = text.encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        payload = zlib.compress(data)
+
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            inserted = await conn.fetchval("""
+                INSERT INTO state_blobs (blob_key, kind, payload, size_bytes)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (blob_key) DO UPDATE SET last_used_at = CURRENT_TIMESTAMP
+                RETURNING (xmax = 0)
+            """, key, kind, payload, len(data))
+
+        self._stats["blobs_written" if inserted else "blobs_reused"] += 1
+        self._stats["bytes_offloaded"] += len(data)
+        if inserted:
+            self._stats["bytes_stored"] += len(payload)
+        self._remember(key, text)
+        return key
+
+    async def get(self, key: str) -> Any:
+        text = self._cache.get(key)
+        if text is not None:
+            self._stats["cache_hits"] += 1
+            self._cache.move_to_end(key)
+            return json.loads(text)
+
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            payload = await conn.fetchval("""
+                UPDATE state_blobs SET last_used_at = CURRENT_TIMESTAMP
+                WHERE blob_key = $1
+                RETURNING payload
+            """, key)
+        if payload is None:
+            raise KeyError(f"State blob {key} not found")
+        self._stats["blobs_read"] += 1
+        text = zlib.decompress(payload).decode("utf-8")
+        self._remember(key, text)
+        return json.loads(text)
+
+    # ------------------------------------------------------------------
+    # GRAPH STATE
+    # ------------------------------------------------------------------
+
+    async def hydrate(self, state: Any, spec: OffloadSpec, fields: Tuple[str, ...]) -> Any:
+        """State with the given offloaded fields loaded back from their references."""
+        if not self.enabled or not fields or not isinstance(state, dict):
+            return state
+        loaded = {}
+        for field in fields:
+            ref_key, model, _ = spec[field]
+            if state.get(ref_key):
+                items = await self.get(state[ref_key])
+                loaded[field] = [model(**item) for item in items] if model else items
+        return {**state, **loaded} if loaded else state
+
+    async def offload(
+        self,
+        result: Dict[str, Any],
+        state: Any,
+        spec: OffloadSpec,
+        thread_id: Optional[str] = None,
+        search_id: Optional[str] = None,
+        node: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Node result with offloaded fields replaced by references and progress moved to the event log."""
+        if not self.enabled or not isinstance(state, dict):
+            return result
+        result = dict(result)
+        for field, (ref_key, _, accumulates) in spec.items():
+            if field not in result:
+                continue
+            value = list(result.pop(field) or [])
+            if accumulates and state.get(ref_key):
+                value = await self.get(state[ref_key]) + value
+            result[ref_key] = await self.put(field, value) if value else None
+
+        if result.get("progress") and await self.log_progress(result["progress"], thread_id, search_id, node):
+            del result["progress"]
+        return result
+
+    # ------------------------------------------------------------------
+    # EVENT LOG
+    # ------------------------------------------------------------------
+
+    async def log_progress(self, messages: List[str], thread_id: Optional[str], search_id: Optional[str], node: Optional[str]) -> bool:
+        """Append progress messages to `workflow_events`; False if they could not be stored."""
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO workflow_events (thread_id, search_id, node, message)
+                    SELECT $1, $2, $3, message FROM unnest($4::text[]) WITH ORDINALITY AS m(message, position)
+                    ORDER BY position
+                """, thread_id, search_id, node, list(messages))
+        except Exception as e:
+            self._stats["event_errors"] += 1
+            print(f"[STATE] ⚠️ Progress log write failed, keeping it in the checkpoint: {e}")
+            return False
+        self._stats["events_written"] += len(messages)
+        return True
+
+    async def progress_messages(self, values: Dict[str, Any], thread_id: Optional[str] = None) -> List[str]:
+        """Progress of the search in `values` (a graph state): event log first, then any kept in the state."""
+        inline = list(values.get("progress") or [])
+        search_id = values.get("search_id")
+        if not self.enabled or not (search_id or thread_id):
+            return inline
+        try:
+            pool = await PostgresManager.get_pool()
+            async with pool.acquire() as conn:
+                if search_id:
+                    rows = await conn.fetch(
+                        "SELECT message FROM workflow_events WHERE search_id = $1 ORDER BY id", search_id
+                    )
+                else:
+                    rows = await conn.fetch(
+                        "SELECT message FROM workflow_events WHERE thread_id = $1 ORDER BY id", thread_id
+                    )
+        except Exception as e:
+            print(f"[STATE] ⚠️ Progress log read failed: {e}")
+            return inline
+        return [row["message"] for row in rows] + inline
+
+    # ------------------------------------------------------------------
+    # STATS
+    # ------------------------------------------------------------------
+
+    async def stats(self) -> Dict[str, Any]:
+        """Blob and event counters since startup plus stored totals."""
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            blobs = await conn.fetchrow("""
+                SELECT COUNT(*) AS blobs, COALESCE(SUM(size_bytes), 0) AS raw_bytes,
+                       COALESCE(SUM(octet_length(payload)), 0) AS stored_bytes
+                FROM state_blobs
+            """)
+            events = await conn.fetchval("SELECT COUNT(*) FROM workflow_events")
+        return {
+            "enabled": self.enabled,
+            "blobs_written": self._stats["blobs_written"],
+            "blobs_reused": self._stats["blobs_reused"],
+            "blobs_read": self._stats["blobs_read"],
+            "cache_hits": self._stats["cache_hits"],
+            "mb_kept_out_of_checkpoints": round(self._stats["bytes_offloaded"] / 1e6, 3),
+            "events_written": self._stats["events_written"],
+            "event_errors": self._stats["event_errors"],
+            "stored": {
+                "blobs": blobs["blobs"],
+                "mb_raw": round(blobs["raw_bytes"] / 1e6, 3),
+                "mb_compressed": round(blobs["stored_bytes"] / 1e6, 3),
+                "events": events,
+            },
+        }
+
+
+# Singleton instance
+state_store = StateStore()
@@ -0,0 +1,163 @@
+"""
+Structured LLM Output
+Streams JSON arrays out of chat completions and hands over each element as soon
+as its object closes, instead of waiting for the whole completion.
+
+- JsonArrayStreamParser: incremental parser fed with raw completion chunks
+  (code fences, prose and an {"<key>": [...]} wrapper are tolerated)
+- stream_json_array: runs llm.astream() through the parser
+- array_response_format: optional schema-constrained generation
+  (Config.STRUCTURED_OUTPUT = "json_schema" | "json_object" | "off")
+
+json_schema needs an Azure API version that supports structured outputs
+(2024-08-01-preview or later); json_object works on older versions.
+"""
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import Config
+
+
+class JsonArrayStreamParser:
+    """
+    Feed completion text chunk by chunk; feed() returns the objects of the first
+    JSON array that were completed by this chunk.
+
+    Only brackets outside strings are tracked, so the text is scanned once and
+    an element is decoded exactly once, when its closing brace arrives.
+    Elements that are not valid JSON objects are skipped (see `skipped`).
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None
+        self._object_start: Optional[int] = None
+        self.started = False
+        self.done = False
+        self.emitted = 0
+        self.skipped = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        completed = []
+
+        text = self._text
+        for i in range(self._scanned, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "[" or ch == "{":
+                self._depth += 1
+                if self._array_depth is None:
+                    if ch == "[":
+                        self._array_depth = self._depth
+                        self.started = True
+                elif ch == "{" and self._depth == self._array_depth + 1:
+                    self._object_start = i
+            elif ch == "]" or ch == "}":
+                if ch == "}" and self._object_start is not None and self._depth == self._array_depth + 1:
+                    item = self._decode(text[self._object_start:i + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._object_start = None
+                self._depth = max(0, self._depth - 1)
+                if self._array_depth is not None and self._depth < self._array_depth:
+                    self.done = True
+                    break
+
+        # Keep only the unfinished element
+        if self._object_start is None:
+            self._text, self._scanned = "", 0
+        else:
+            self._text = text[self._object_start:]
+            self._scanned = len(text) - self._object_start
+            self._object_start = 0
+        return completed
+
+    def _decode(self, raw: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            item = None
+        if not isinstance(item, dict):
+            self.skipped += 1
+            return None
+        self.emitted += 1
+        return item
+
+
+def parse_json_array(text: str) -> Optional[List[Dict[str, Any]]]:
+    """Objects of the first JSON array in `text`, or None if the array is missing or unterminated."""
+    parser = JsonArrayStreamParser()
+    items = parser.feed(text)
+    return items if parser.done else None
+
+
+def array_response_format(name: str, key: str, item_schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    response_format for an array of `item_schema` wrapped as {key: [...]}
+    (the APIs require an object at the root). None when STRUCTURED_OUTPUT is off.
+    """
+    mode = Config.STRUCTURED_OUTPUT
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": name,
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {key: {"type": "array", "items": item_schema}},
+                    "required": [key],
+                    "additionalProperties": False,
+                },
+            },
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+async def stream_json_array(
+    llm,
+    prompt: str,
+    response_format: Optional[Dict[str, Any]] = None,
+    transcript: Optional[List[str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield the objects of the JSON array in the completion while it is generated.
+    Raw completion chunks are appended to `transcript` when given (e.g. for caching).
+    Raises ValueError if the completion contains no JSON array.
+    """
+    runnable = llm.bind(response_format=response_format) if response_format else llm
+    parser = JsonArrayStreamParser()
+    async for chunk in runnable.astream(prompt):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if transcript is not None:
+            transcript.append(text)
+        for item in parser.feed(text):
+            yield item
+        if parser.done:
+            break
+
+    if not parser.started:
+        raise ValueError("No JSON array in LLM response")
+    if not parser.done:
+        print(f"[STRUCTURED-LLM] Response ended inside the array ({parser.emitted} complete items kept)")
+    if parser.skipped:
+        print(f"[STRUCTURED-LLM] Skipped {parser.skipped} malformed items")
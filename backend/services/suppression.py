@@ -0,0 +1,124 @@
+"""
+Suppression List Service (RGPD/GDPR)
+
+Keeps the `suppression_list` table mirrored in memory so candidate aggregation
+can check every domain without a database round-trip.
+
+- Loaded once from PostgreSQL, then kept fresh via LISTEN/NOTIFY
+  (see trigger in migrations/002_suppression_list.sql)
+- Falls back to periodic reloads when no listener is running (CLI scripts)
+"""
+import asyncio
+import time
+from typing import Iterable, List, Optional, Set
+
+import asyncpg
+
+from .postgres import PostgresManager
+
+NOTIFY_CHANNEL = "suppression_list_changed"
+
+# Reload interval used only when the LISTEN connection is not active
+REFRESH_INTERVAL_SECONDS = 300
+
+
+def normalize_domain(domain: str) -> str:
+    """Normalize a domain the same way it is stored in the suppression list."""
+    return (domain or "").lower().strip()
+
+
+class SuppressionListService:
+    def __init__(self):
+        self._domains: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._listener_conn: Optional[asyncpg.Connection] = None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._listener_conn is not None and not self._listener_conn.is_closed()
+
+    async def load(self) -> int:
+        """Reload the full suppression list from PostgreSQL."""
+        pool = await PostgresManager.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT domain FROM suppression_list")
+        self._domains = {normalize_domain(row["domain"]) for row in rows}
+        self._loaded_at = time.monotonic()
+        print(f"[RGPD] Suppression list loaded ({len(self._domains)} domains)")
+        return len(self._domains)
+
+    async def _ensure_fresh(self):
+        stale = (
+            self._loaded_at is None
+            or (not self.is_listening and time.monotonic() - self._loaded_at > REFRESH_INTERVAL_SECONDS)
+        )
+        if not stale:
+            return
+        async with self._lock:
+            # Another task may have reloaded while we waited for the lock
+            if self._loaded_at is None or (
+                not self.is_listening and time.monotonic() - self._loaded_at > REFRESH_INTERVAL_SECONDS
+            ):
+                await self.load()
+
+    # ------------------------------------------------------------------
+    # LISTEN/NOTIFY
+    # ------------------------------------------------------------------
+
+    async def start_listener(self):
+        """Open a dedicated connection and subscribe to suppression list changes."""
+        if self.is_listening:
+            return
+        conn = await PostgresManager.connect()
+        await conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._listener_conn = conn
+        # Load after subscribing so no change is missed in between
+        await self.load()
+        print("[RGPD] ✅ Listening for suppression list changes")
+
+    async def stop_listener(self):
+        conn, self._listener_conn = self._listener_conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            await conn.close()
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        operation, _, domains = payload.partition(":")
+        if operation == "TRUNCATE":
+            # Force a full reload before the next lookup
+            self._loaded_at = None
+        elif operation == "DELETE":
+            self._domains.discard(normalize_domain(domains))
+        elif operation == "UPDATE":
+            old_domain, _, new_domain = domains.partition(":")
+            self._domains.discard(normalize_domain(old_domain))
+            self._domains.add(normalize_domain(new_domain))
+        else:
+            self._domains.add(normalize_domain(domains))
+
+    def _on_terminate(self, conn):
+        print("[RGPD] ⚠️ Suppression listener connection lost, falling back to periodic reloads")
+        self._listener_conn = None
+
+    # ------------------------------------------------------------------
+    # LOOKUPS
+    # ------------------------------------------------------------------
+
+    def add_local(self, domain: str):
+        """Record a newly suppressed domain immediately (before the NOTIFY arrives)."""
+        self._domains.add(normalize_domain(domain))
+
+    async def is_suppressed(self, domain: str) -> bool:
+        await self._ensure_fresh()
+        return normalize_domain(domain) in self._domains
+
+    async def filter_suppressed(self, domains: Iterable[str]) -> List[str]:
+        """Return the given domains minus suppressed ones, preserving order."""
+        await self._ensure_fresh()
+        return [d for d in domains if normalize_domain(d) not in self._domains]
+
+
+# Singleton instance
+suppression_list = SuppressionListService()
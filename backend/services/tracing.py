@@ -0,0 +1,222 @@
+"""
+Workflow Tracing
+Timing spans for every graph node and the slow steps inside it (scrape providers,
+filters, price enrichment, similarity lookups, LLM calls, DB writes).
+
+- span("scrape.firecrawl", url=...) works around sync and async code; spans nest
+  through contextvars, so steps run with asyncio.gather keep the right parent
+- Span data follows the OpenTelemetry model (trace id = search id, 16-hex span ids,
+  parent ids, attributes, error status). When the opentelemetry API is installed
+  and TRACE_EXPORTER=otel, spans are also opened on the global OTel tracer
+- Local exporters (TRACE_EXPORTER): "file" appends one JSON line per span to
+  TRACE_FILE, "console" prints an indented tree per node, "none" only summarizes
+- node_trace() returns a per-node summary (total time, and count / total / max per
+  step name) that is stored in the graph state and sent with the SSE complete event
+
+Step totals add up durations, so steps that run concurrently can exceed the node time.
+"""
+import contextlib
+import json
+import os
+import secrets
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Optional dependency
+    otel_trace = None
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "root", "attributes",
+                 "start_ns", "end_ns", "error", "finished")
+
+    def __init__(self, name: str, parent: Optional["Span"], trace_id: Optional[str] = None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id or (parent.trace_id if parent else secrets.token_hex(16))
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.root = parent.root if parent else self
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self.finished: List["Span"] = []  # Completed descendants (root spans only)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 1),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+@contextlib.contextmanager
+def span(name: str, trace_id: Optional[str] = None, **attributes):
+    """
+    Time the enclosed block as a child of the current span (or a new trace).
+    Yields the Span so attributes can be added (e.g. result counts).
+    """
+    parent = _current_span.get()
+    current = Span(name, parent, trace_id=trace_id, attributes=attributes)
+    token = _current_span.set(current)
+    otel_cm = _otel_span(name, current.attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if otel_cm is not None:
+            otel_cm.__exit__(*sys.exc_info())
+        if parent is not None:
+            current.root.finished.append(current)
+        else:
+            _export(current)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _otel_span(name: str, attributes: Dict[str, Any]):
+    if otel_trace is None or Config.TRACE_EXPORTER != "otel":
+        return None
+    cm = otel_trace.get_tracer("brands-ai").start_as_current_span(
+        name, attributes={k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+    )
+    cm.__enter__()
+    return cm
+
+
+# ============================================================================
+# EXPORT & SUMMARY
+# ============================================================================
+
+def _export(root: Span):
+    exporter = Config.TRACE_EXPORTER
+    spans = [root] + root.finished
+    if exporter == "file":
+        try:
+            directory = os.path.dirname(Config.TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(Config.TRACE_FILE, "a", encoding="utf-8") as f:
+                for s in spans:
+                    f.write(json.dumps(s.to_dict(), default=str) + "\n")
+        except OSError as e:
+            print(f"[TRACE] Export failed: {e}")
+    elif exporter == "console":
+        children: Dict[Optional[str], List[Span]] = {}
+        for s in root.finished:
+            children.setdefault(s.parent_id, []).append(s)
+
+        def show(s: Span, depth: int):
+            status = " ❌" if s.error else ""
+            print(f"[TRACE] {'  ' * depth}{s.name} {s.duration_ms:.0f}ms{status}")
+            for child in sorted(children.get(s.span_id, []), key=lambda c: c.start_ns):
+                show(child, depth + 1)
+
+        show(root, 0)
+
+
+def summarize(root: Span) -> Dict[str, Any]:
+    """Node time plus count / total / max per step name, slowest steps first."""
+    steps: Dict[str, Dict[str, Any]] = {}
+    for s in root.finished:
+        step = steps.setdefault(s.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+        step["count"] += 1
+        step["total_ms"] += s.duration_ms
+        step["max_ms"] = max(step["max_ms"], s.duration_ms)
+        step["errors"] += 1 if s.error else 0
+    for step in steps.values():
+        step["total_ms"] = round(step["total_ms"], 1)
+        step["max_ms"] = round(step["max_ms"], 1)
+    return {
+        "node": root.name,
+        "trace_id": root.trace_id,
+        "duration_ms": round(root.duration_ms, 1),
+        "error": root.error,
+        "steps": dict(sorted(steps.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+    }
+
+
+@contextlib.contextmanager
+def node_trace(node: str, search_id: Optional[str] = None, **attributes):
+    """
+    Root span for one graph node; all spans opened inside are collected.
+    Yields a dict that holds the node summary once the block exits.
+    """
+    summary: Dict[str, Any] = {}
+    with span(node, trace_id=search_id, **attributes) as root:
+        try:
+            yield summary
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            summary.update(summarize(root))
+
+
+def add_trace_summaries(existing: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reducer of GraphState.trace_summary: appends node summaries, dropping those of other
+    traces (earlier searches on the same per-city thread), so the list holds one search.
+    """
+    if not new:
+        return existing or []
+    trace_ids = {s.get("trace_id") for s in new}
+    return [s for s in existing or [] if s.get("trace_id") in trace_ids] + list(new)
+
+
+def merge_summaries(summaries: List[Dict[str, Any]], trace_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Search-level view of the per-node summaries in the graph state (SSE complete event).
+    Pass the search_id as `trace_id` to skip summaries of other searches (checkpoints
+    written before add_trace_summaries kept every search of the thread).
+    """
+    if trace_id:
+        summaries = [s for s in summaries if s.get("trace_id") == trace_id]
+    nodes = [{"node": s["node"], "duration_ms": s["duration_ms"]} for s in summaries]
+    steps: Dict[str, Dict[str, Any]] = {}
+    for s in summaries:
+        for name, step in s.get("steps", {}).items():
+            merged = steps.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+            merged["count"] += step["count"]
+            merged["total_ms"] = round(merged["total_ms"] + step["total_ms"], 1)
+            merged["max_ms"] = max(merged["max_ms"], step["max_ms"])
+            merged["errors"] += step.get("errors", 0)
+    return {
+        "trace_id": summaries[0]["trace_id"] if summaries else None,
+        "total_ms": round(sum(n["duration_ms"] for n in nodes), 1),
+        "nodes": nodes,
+        "slowest_steps": dict(sorted(steps.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:10]),
+    }
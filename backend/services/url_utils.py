@@ -0,0 +1,38 @@
+"""
+URL Utilities
+URL helpers shared by the services and the LangGraph nodes (re-exported by
+agents/nodes/utils.py), so the scraping services do not import the agents package.
+"""
+import re
+from urllib.parse import urlparse
+
+
+def normalize_url(url: str) -> str:
+    """Normalize URL for comparison to detect duplicates"""
+    if not url:
+        return ""
+    
+    try:
+        normalized = url.lower().strip()
+        normalized = re.sub(r'^https?://', '', normalized)
+        normalized = re.sub(r'^www\.', '', normalized)
+        normalized = normalized.rstrip('/')
+        normalized = normalized.split('?')[0].split('#')[0]
+        return normalized
+    except Exception:
+        return url.lower().strip()
+
+def get_domain_from_url(url: str) -> str:
+    """
+    Extract base domain from URL.
+    E.g. https://www.tomjames.com/locations -> tomjames.com
+    """
+    if not url: return ""
+    try:
+        parsed = urlparse(url)
+        domain = parsed.netloc
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return domain
+    except Exception:
+        return url
@@ -22,19 +22,24 @@ from data.lanca_clients import (
     get_top_clients,
 )
 from .postgres import PostgresManager
+from .llm_cache import llm_cache, content_hash
+from .llm_metrics import InstrumentedEmbeddings, UsageCallbackHandler
+from .tracing import span
+from .resilience import resilience
 
 # ============================================================================
 # VECTOR DATABASE SETUP (PostgreSQL + pgvector)
 # ============================================================================
 
-def get_azure_embeddings() -> AzureOpenAIEmbeddings:
-    """Get Azure OpenAI embeddings function"""
-    return AzureOpenAIEmbeddings(
+def get_azure_embeddings(call_site: str = "embedding") -> InstrumentedEmbeddings:
+    """Get Azure OpenAI embeddings function (usage is recorded under `call_site`)"""
+    embeddings = AzureOpenAIEmbeddings(
         azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
         api_key=Config.AZURE_OPENAI_API_KEY,
         api_version=Config.AZURE_OPENAI_API_VERSION,
         azure_deployment=Config.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
     )
+    return InstrumentedEmbeddings(embeddings, Config.AZURE_OPENAI_EMBEDDING_DEPLOYMENT, call_site)
 
 
 # ============================================================================
@@ -135,35 +140,95 @@ async def find_similar_clients(
             await populate_clients_database()
             
         # Vector similarity search using cosine distance (<=>)
-        rows = await conn.fetch(f"""
-            SELECT *, 1 - (embedding <=> $1::vector) as similarity_score
-            FROM lanca_clients
-            ORDER BY embedding <=> $1::vector
-            LIMIT $2
-        """, str(embedding), n_results)
+        with span("db.vector_search"):
+            rows = await conn.fetch(f"""
+                SELECT *, 1 - (embedding <=> $1::vector) as similarity_score
+                FROM lanca_clients
+                ORDER BY embedding <=> $1::vector
+                LIMIT $2
+            """, str(embedding), n_results)
         
-        similar_clients = []
-        for row in rows:
-            # Convert record to dict and handle metadata structure
-            client_dict = dict(row)
-            similarity = client_dict.pop('similarity_score')
-            
-            similar_clients.append({
-                "id": client_dict['id'],
-                "name": client_dict['name'],
-                "country": client_dict['country'],
-                "similarity": round(similarity * 100, 2),
-                "metadata": client_dict,
-                "profile": client_dict['profile_text'],
-            })
+        similar_clients = [_row_to_similar_client(dict(row)) for row in rows]
             
     return similar_clients
 
 
+def _row_to_similar_client(client_dict: Dict) -> Dict:
+    """Convert a lanca_clients row (with similarity_score) into the similar-client structure."""
+    similarity = client_dict.pop('similarity_score')
+    return {
+        "id": client_dict['id'],
+        "name": client_dict['name'],
+        "country": client_dict['country'],
+        "similarity": round(similarity * 100, 2),
+        "metadata": client_dict,
+        "profile": client_dict['profile_text'],
+    }
+
+
+async def embed_profile_texts(profile_texts: List[str]) -> List[List[float]]:
+    """Embed many profile texts with a single embeddings request."""
+    if not profile_texts:
+        return []
+    embeddings_fn = get_azure_embeddings()
+    return await embeddings_fn.aembed_documents(profile_texts)
+
+
+async def find_similar_clients_for_embeddings(
+    embeddings: List[List[float]],
+    n_results: int = 5,
+) -> List[List[Dict]]:
+    """
+    Top-N similar Lança clients for each embedding, in one database round-trip.
+    """
+    if not embeddings:
+        return []
+    
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        count = await conn.fetchval("SELECT COUNT(*) FROM lanca_clients")
+        if count == 0:
+            await populate_clients_database()
+        
+        # Top-N neighbours per query embedding via a LATERAL join
+        rows = await conn.fetch("""
+            SELECT q.idx AS query_idx, c.*, 1 - (c.embedding <=> q.emb::vector) AS similarity_score
+            FROM unnest($1::text[]) WITH ORDINALITY AS q(emb, idx)
+            CROSS JOIN LATERAL (
+                SELECT * FROM lanca_clients
+                ORDER BY embedding <=> q.emb::vector
+                LIMIT $2
+            ) c
+            ORDER BY q.idx, similarity_score DESC
+        """, [str(e) for e in embeddings], n_results)
+    
+    results: List[List[Dict]] = [[] for _ in embeddings]
+    for row in rows:
+        client_dict = dict(row)
+        idx = client_dict.pop('query_idx') - 1  # ORDINALITY is 1-based
+        results[idx].append(_row_to_similar_client(client_dict))
+    return results
+
+
+async def find_similar_clients_batch(
+    prospect_descriptions: List[str],
+    n_results: int = 5,
+) -> List[List[Dict]]:
+    """
+    Batched version of find_similar_clients for bulk jobs (imports, rescoring).
+    One embeddings request and one database round-trip for the whole batch.
+    """
+    embeddings = await embed_profile_texts(prospect_descriptions)
+    return await find_similar_clients_for_embeddings(embeddings, n_results)
+
+
 # ============================================================================
 # SIMILARITY EXPLANATION GENERATION
 # ============================================================================
 
+EXPLANATION_TEMPERATURE = 0.3
+
+
 async def generate_similarity_explanation(
     prospect: Dict,
     similar_client: Dict,
@@ -178,7 +243,8 @@ async def generate_similarity_explanation(
         api_key=Config.AZURE_OPENAI_API_KEY,
         api_version=Config.AZURE_OPENAI_API_VERSION,
         deployment_name=Config.AZURE_OPENAI_DEPLOYMENT,
-        temperature=0.3,
+        temperature=EXPLANATION_TEMPERATURE,
+        callbacks=[UsageCallbackHandler("similarity_explanation", Config.AZURE_OPENAI_DEPLOYMENT)],
     )
     
     # Extract key characteristics
@@ -233,10 +299,22 @@ Example format:
 
 Explanation:"""
 
-    try:
-        response = await llm.ainvoke(prompt)
+    async def produce() -> str:
+        async with resilience.guard("azure_chat"):
+            response = await llm.ainvoke(prompt)
         explanation = response.content if hasattr(response, 'content') else str(response)
         return explanation.strip()
+
+    # Same prospect facts + same client + same displayed match -> same explanation
+    cache_parts = {
+        "prospect": prospect_info,
+        "client": client_info,
+        "client_profile": content_hash(client_profile),
+        "similarity": f"{similarity_score:.1f}",
+    }
+    try:
+        with span("llm.similarity_explanation"):
+            return await llm_cache.cached("similarity_explanation", cache_parts, EXPLANATION_TEMPERATURE, produce)
     except Exception as e:
         print(f"[VECTOR-DB] Error generating similarity explanation: {e}")
         # Fallback explanation based on key similarities
@@ -282,6 +360,11 @@ HARD_FILTER_MAX_STORES = 30       # Maximum stores among 18 clients
 IDEAL_PRICE_EUR = 800   # Median price of 18 clients
 IDEAL_MAX_STORES = 4    # Median store count of 18 clients
 
+# Intermediate tiers
+GOOD_PRICE_EUR = 500
+SMALL_CHAIN_MAX_STORES = 10
+MEDIUM_CHAIN_MAX_STORES = 20
+
 
 def passes_hard_filters(prospect: Dict) -> Tuple[bool, str]:
     """
@@ -326,7 +409,7 @@ def calculate_price_score(price: float) -> int:
         return 15  # Unknown price - neutral score
     elif price >= IDEAL_PRICE_EUR:
         return 30  # At or above median (ideal)
-    elif price >= 500:
+    elif price >= GOOD_PRICE_EUR:
         return 20  # Good price point
     elif price >= HARD_FILTER_MIN_PRICE_EUR:
         return 10  # Acceptable minimum
@@ -349,9 +432,9 @@ def calculate_size_score(store_count: int) -> int:
         return 25  # B2B/Manufacturing or unknown
     elif store_count <= IDEAL_MAX_STORES:
         return 30  # At or below median (ideal)
-    elif store_count <= 10:
+    elif store_count <= SMALL_CHAIN_MAX_STORES:
         return 20  # Good size
-    elif store_count <= 20:
+    elif store_count <= MEDIUM_CHAIN_MAX_STORES:
         return 10  # Acceptable
     elif store_count <= HARD_FILTER_MAX_STORES:
         return 5   # Within range but large
@@ -428,15 +511,44 @@ async def calculate_prospect_score(prospect: Dict) -> Tuple[Dict, List[Dict]]:
     Returns:
         Tuple of (scores_dict, similar_clients_list)
     """
-    # Check hard filters first
-    passes, rejection_reason = passes_hard_filters(prospect)
-    
     # Generate profile text for the prospect
     prospect_description = generate_client_profile_text(prospect)
     
     # Find similar clients (generates temporary embedding, not stored)
     similar_clients = await find_similar_clients(prospect_description, n_results=5)
     
+    scores = score_prospect(prospect, similar_clients)
+    
+    # Generate similarity explanation
+    most_similar = similar_clients[0] if similar_clients else None
+    if most_similar:
+        try:
+            scores["explanation"]["similarity_explanation"] = await generate_similarity_explanation(
+                prospect,
+                most_similar,
+                most_similar["similarity"]
+            )
+        except Exception as e:
+            print(f"[VECTOR-DB] Warning: Could not generate similarity explanation: {e}")
+            scores["explanation"]["similarity_explanation"] = fallback_similarity_explanation(most_similar)
+    
+    return scores, similar_clients
+
+
+def fallback_similarity_explanation(most_similar: Dict) -> str:
+    """Template explanation used when the LLM is skipped or unavailable."""
+    return f"Similar to {most_similar['name']} ({most_similar['similarity']:.1f}% match) based on brand profile and positioning."
+
+
+def score_prospect(prospect: Dict, similar_clients: List[Dict]) -> Dict:
+    """
+    Pure scoring step of calculate_prospect_score (no I/O).
+    `similar_clients` is the output of find_similar_clients / find_similar_clients_batch.
+    The returned explanation has `similarity_explanation` set to None.
+    """
+    # Check hard filters first
+    passes, rejection_reason = passes_hard_filters(prospect)
+    
     # Parse store count
     store_count = prospect.get("store_count", 0)
     if isinstance(store_count, str):
@@ -487,30 +599,17 @@ async def calculate_prospect_score(prospect: Dict) -> Tuple[Dict, List[Dict]]:
     # Build explanation
     most_similar = similar_clients[0] if similar_clients else None
     
-    # Generate similarity explanation
-    similarity_explanation = None
-    if most_similar:
-        try:
-            similarity_explanation = await generate_similarity_explanation(
-                prospect,
-                most_similar,
-                most_similar["similarity"]
-            )
-        except Exception as e:
-            print(f"[VECTOR-DB] Warning: Could not generate similarity explanation: {e}")
-            similarity_explanation = f"Similar to {most_similar['name']} ({most_similar['similarity']:.1f}% match) based on brand profile and positioning."
-    
     # Determine size category
     if store_count <= IDEAL_MAX_STORES:
         size_category = "ideal boutique"
-    elif store_count <= 10:
+    elif store_count <= SMALL_CHAIN_MAX_STORES:
         size_category = "small chain"
-    elif store_count <= 20:
+    elif store_count <= MEDIUM_CHAIN_MAX_STORES:
         size_category = "medium chain"
     else:
         size_category = "large chain"
     
-    scores = {
+    return {
         "final_score": round(final_score, 2),
         "passes_hard_filters": passes,
         "rejection_reason": rejection_reason,
@@ -535,11 +634,9 @@ async def calculate_prospect_score(prospect: Dict) -> Tuple[Dict, List[Dict]]:
             "mtm": "Yes" if prospect.get("made_to_measure") else "No/Unknown",
             "most_similar_client": most_similar["name"] if most_similar else "N/A",
             "similarity_to_best_match": most_similar["similarity"] if most_similar else 0,
-            "similarity_explanation": similarity_explanation,
+            "similarity_explanation": None,
         }
     }
-    
-    return scores, similar_clients
 
 
 # ============================================================================
@@ -0,0 +1,228 @@
+"""
+What-If Scoring Simulator
+Answers "what if the min price were €450 and ideal stores 6?" without touching
+vector_db.py or the database.
+
+- Stored prospects are loaded once into a columnar snapshot (cached for SNAPSHOT_TTL_SECONDS)
+- The baseline is the stored final_score; the scenario is scored in memory with the
+  columnar kernel, shifted by each row's offset between the kernel and the stored score
+- Only fields explicitly sent in ProspectorConfig change the scoring
+
+Similarity points come from the stored similarity_score (0-10), so the simulator
+needs no embeddings; they only change when weight_similarity is set.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models import ProspectorConfig
+from .postgres import PostgresManager
+from .rescoring import SCORE_BUCKETS, prospect_row_to_scoring_input
+from .scoring_kernel import DEFAULT_THRESHOLDS, columns_from_prospects, score_columns
+
+SNAPSHOT_TTL_SECONDS = 600
+
+# ProspectorConfig field -> kernel threshold
+THRESHOLD_FIELDS = {
+    "min_price_eur": "hard_filter_min_price",
+    "max_stores": "hard_filter_max_stores",
+    "ideal_max_stores": "ideal_max_stores",
+}
+
+# ProspectorConfig weight -> kernel components it scales
+WEIGHT_FIELDS = {
+    "weight_size": ["size"],
+    "weight_quality": ["price", "wool", "mtm"],
+    "weight_similarity": ["similarity"],
+    "weight_market": ["market"],
+}
+
+# Fields that only affect discovery (or have no scoring rule yet)
+IGNORED_FIELDS = {
+    "max_price_eur", "queries_per_search", "results_per_query",
+    "max_candidates", "prefer_heritage_brands",
+}
+
+_snapshot: Optional[Dict] = None
+_snapshot_lock = asyncio.Lock()
+
+
+# ============================================================================
+# SNAPSHOT
+# ============================================================================
+
+async def _load_snapshot() -> Dict:
+    pool = await PostgresManager.get_pool()
+    async with pool.acquire() as conn:
+        # Same domain deduplication as the prospects listing
+        rows = await conn.fetch("""
+            SELECT DISTINCT ON (domain)
+                   id, name, city, country, country_code, store_count, avg_suit_price_eur,
+                   material_composition, made_to_measure, similarity_score, final_score
+            FROM prospects
+            ORDER BY domain, final_score DESC
+        """)
+    return build_snapshot([dict(row) for row in rows])
+
+
+def build_snapshot(rows: List[Dict]) -> Dict:
+    """Columnar snapshot and baseline scores of stored prospects rows."""
+    similarities = [(row["similarity_score"] or 0) * 10 for row in rows]
+    columns = columns_from_prospects([prospect_row_to_scoring_input(row) for row in rows], similarities)
+    baseline = score_columns(**columns)
+
+    # Rows keep int() of the final score and of the similarity points, so the kernel lands up to
+    # a point off the stored final_score; the stored score is the baseline and scenarios are
+    # shifted by the same per-row offset (an empty simulation then changes nothing)
+    stored = np.array([row.get("final_score") or 0 for row in rows], dtype=np.float64)
+    offsets = stored - baseline["final_score"]
+    drifted = int(np.count_nonzero(np.abs(offsets) >= 1))
+    if drifted:
+        print(f"[WHAT-IF] ⚠️ Stored final_score differs from today's rules for {drifted}/{len(rows)} prospects")
+    baseline = {**baseline, "final_score": stored}
+    return {
+        "loaded_at": time.monotonic(),
+        "ids": [row["id"] for row in rows],
+        "names": [row["name"] for row in rows],
+        "cities": [row["city"] for row in rows],
+        "columns": columns,
+        "baseline": baseline,
+        "offsets": offsets,
+        "baseline_ranks": _ranks(baseline["final_score"]),
+    }
+
+
+async def get_snapshot() -> Dict:
+    global _snapshot
+    if _snapshot and time.monotonic() - _snapshot["loaded_at"] < SNAPSHOT_TTL_SECONDS:
+        return _snapshot
+    async with _snapshot_lock:
+        if not _snapshot or time.monotonic() - _snapshot["loaded_at"] >= SNAPSHOT_TTL_SECONDS:
+            started = time.perf_counter()
+            _snapshot = await _load_snapshot()
+            print(f"[WHAT-IF] Snapshot loaded ({len(_snapshot['ids'])} prospects, {time.perf_counter() - started:.2f}s)")
+    return _snapshot
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot (called after bulk score changes)."""
+    global _snapshot
+    _snapshot = None
+
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def config_to_kernel_args(config: ProspectorConfig) -> Tuple[Dict, Dict, List[str]]:
+    """
+    Translate the fields set on `config` into kernel thresholds and weights.
+    ProspectorConfig defaults differ from the live constants, so unset fields are ignored.
+    """
+    defaults = ProspectorConfig()
+    thresholds, weights, ignored = {}, {}, []
+    for field in sorted(config.model_fields_set):
+        value = getattr(config, field)
+        if field in THRESHOLD_FIELDS:
+            thresholds[THRESHOLD_FIELDS[field]] = value
+        elif field in WEIGHT_FIELDS:
+            default = getattr(defaults, field)
+            for component in WEIGHT_FIELDS[field]:
+                weights[component] = value / default if default else 0.0
+        elif field in IGNORED_FIELDS:
+            ignored.append(field)
+
+    # Turning a preference off drops that component (applied after weight_quality)
+    if "prefer_100_wool" in config.model_fields_set and not config.prefer_100_wool:
+        weights["wool"] = 0.0
+    if "prefer_made_to_measure" in config.model_fields_set and not config.prefer_made_to_measure:
+        weights["mtm"] = 0.0
+    return thresholds, weights, ignored
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """1-based competition rank per row (highest score first, ties share a rank)."""
+    descending = np.sort(-scores)
+    return np.searchsorted(descending, -scores, side="left") + 1
+
+
+def _bucket_counts(scores: np.ndarray) -> Dict[str, int]:
+    counts, lower_bound = {}, np.inf
+    for name, threshold in SCORE_BUCKETS:
+        counts[name] = int(np.count_nonzero((scores >= threshold) & (scores < lower_bound)))
+        lower_bound = threshold
+    return counts
+
+
+def _rank_entry(snapshot: Dict, index: int, scores: np.ndarray, ranks: np.ndarray) -> Dict:
+    before = float(snapshot["baseline"]["final_score"][index])
+    return {
+        "id": snapshot["ids"][index],
+        "name": snapshot["names"][index],
+        "city": snapshot["cities"][index],
+        "rank": int(ranks[index]),
+        "previous_rank": int(snapshot["baseline_ranks"][index]),
+        "rank_change": int(snapshot["baseline_ranks"][index] - ranks[index]),
+        "score_before": before,
+        "score_after": float(scores[index]),
+        "score_change": round(float(scores[index]) - before, 2),
+    }
+
+
+async def simulate_scoring(config: ProspectorConfig, top_n: int = 25, movers: int = 10) -> Dict:
+    """Rescore the stored prospect set in memory with `config` and diff it against today's rules."""
+    snapshot = await get_snapshot()
+    started = time.perf_counter()
+
+    thresholds, weights, ignored = config_to_kernel_args(config)
+    result = score_columns(**snapshot["columns"], thresholds=thresholds, weights=weights)
+    scores = np.round(result["final_score"] + snapshot["offsets"], 2)
+    ranks = _ranks(scores)
+    baseline = snapshot["baseline"]
+    baseline_ranks = snapshot["baseline_ranks"]
+
+    before_buckets = _bucket_counts(baseline["final_score"])
+    after_buckets = _bucket_counts(scores)
+    rank_change = baseline_ranks - ranks
+    top_indices = np.argsort(ranks, kind="stable")[:top_n]
+    up_indices = [i for i in np.argsort(-rank_change, kind="stable")[:movers] if rank_change[i] > 0]
+    down_indices = [i for i in np.argsort(rank_change, kind="stable")[:movers] if rank_change[i] < 0]
+    count = len(scores)
+
+    return {
+        "total_prospects": count,
+        "applied": {
+            "thresholds": {**DEFAULT_THRESHOLDS, **thresholds},
+            "weights": weights,
+            "ignored_fields": ignored,
+        },
+        "buckets": {
+            name: {
+                "before": before_buckets[name],
+                "after": after_buckets[name],
+                "diff": after_buckets[name] - before_buckets[name],
+            }
+            for name, _ in SCORE_BUCKETS
+        },
+        "mean_score": {
+            "before": round(float(baseline["final_score"].mean()), 2) if count else 0,
+            "after": round(float(scores.mean()), 2) if count else 0,
+        },
+        "rejected_by_hard_filters": {
+            "before": int(np.count_nonzero(~baseline["passes_hard_filters"])),
+            "after": int(np.count_nonzero(~result["passes_hard_filters"])),
+        },
+        "rank_changes": {
+            "score_changed": int(np.count_nonzero(scores != baseline["final_score"])),
+            "moved": int(np.count_nonzero(rank_change)),
+            "entered_top": int(np.count_nonzero((ranks <= top_n) & (baseline_ranks > top_n))),
+            "left_top": int(np.count_nonzero((ranks > top_n) & (baseline_ranks <= top_n))),
+            "biggest_gains": [_rank_entry(snapshot, i, scores, ranks) for i in up_indices],
+            "biggest_drops": [_rank_entry(snapshot, i, scores, ranks) for i in down_indices],
+        },
+        "top": [_rank_entry(snapshot, i, scores, ranks) for i in top_indices],
+        "snapshot_age_seconds": round(time.monotonic() - snapshot["loaded_at"], 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
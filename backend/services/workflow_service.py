@@ -8,8 +8,11 @@ from datetime import datetime
 from typing import Dict, AsyncGenerator
 from models import BrandLead
 from agents.nodes.initializer import create_initial_state
-from agents.graph import run_prospector_workflow, _get_app_with_postgres
+from agents.graph import stream_prospector_workflow, _get_app_with_postgres
 from services.database import city_has_results, get_prospects_by_city
+from services.tracing import merge_summaries
+from services.state_store import state_store
+from services.checkpoint_retention import checkpoint_retention
 
 async def prospect_event_generator(city: str, force_refresh: bool = False) -> AsyncGenerator[str, None]:
     """SSE generator for new prospecting search"""
@@ -67,18 +70,30 @@ async def prospect_event_generator(city: str, force_refresh: bool = False) -> As
 
         # 2. Run Workflow
         initial_state = create_initial_state(city).model_dump()
-        result, interrupted, next_node = await run_prospector_workflow(initial_state)
+        thread_id = 'prospect_search_' + city
+        # Running threads are never compacted, even if the thread completed an earlier search
+        await checkpoint_retention.mark_thread(thread_id, "running", initial_state.get("search_id"), city)
+        result, interrupted, next_node = {}, False, None
+        async for kind, payload in stream_prospector_workflow(initial_state, thread_id):
+            if kind == "event":
+                yield f"data: {json.dumps(payload)}\n\n"
+            else:
+                result, interrupted, next_node = payload
+        await checkpoint_retention.mark_thread(
+            thread_id, "waiting_approval" if interrupted else "completed", result.get("search_id"), city
+        )
         
         # 3. Stream Progress
-        for msg in result.get("progress", []):
+        for msg in await state_store.progress_messages(result, thread_id):
             yield f"data: {json.dumps({'type': 'progress', 'message': msg})}\n\n"
             await asyncio.sleep(0.05)
             
         if interrupted:
-            yield f"data: {json.dumps({'type': 'waiting_approval', 'next_node': next_node, 'thread_id': 'prospect_search_' + city, 'search_queries': result.get('search_queries')})}\n\n"
+            yield f"data: {json.dumps({'type': 'waiting_approval', 'next_node': next_node, 'thread_id': thread_id, 'search_queries': result.get('search_queries')})}\n\n"
         else:
             brands = [b.model_dump(by_alias=True) if hasattr(b, 'model_dump') else b for b in result.get('verified_brands', [])]
-            yield f"data: {json.dumps({'type': 'complete', 'verifiedBrands': brands})}\n\n"
+            timings = merge_summaries(result.get("trace_summary") or [], result.get("search_id"))
+            yield f"data: {json.dumps({'type': 'complete', 'verifiedBrands': brands, 'timings': timings})}\n\n"
             
     except Exception as e:
         import traceback
@@ -89,6 +104,7 @@ async def resume_workflow_generator(thread_id: str, node: str, data: Dict) -> As
     """SSE generator for resuming search"""
     config = {"configurable": {"thread_id": thread_id}}
     try:
+        await checkpoint_retention.mark_thread(thread_id, "running")
         async with _get_app_with_postgres() as app:
             update_data = {}
             if node == "discovery":
@@ -103,18 +119,24 @@ async def resume_workflow_generator(thread_id: str, node: str, data: Dict) -> As
             if update_data:
                 await app.aupdate_state(config, update_data)
 
-            async for _ in app.astream(None, config=config, stream_mode="values"): pass
+            # Custom events (leads selected during validation) are forwarded as they arrive
+            async for event in app.astream(None, config=config, stream_mode="custom"):
+                yield f"data: {json.dumps(event)}\n\n"
                 
             final_state = await app.aget_state(config)
             result = final_state.values
             next_node = final_state.next
             interrupted = len(next_node) > 0
+            await checkpoint_retention.mark_thread(
+                thread_id, "waiting_approval" if interrupted else "completed", result.get("search_id"), result.get("target_city")
+            )
             
             if interrupted:
                  yield f"data: {json.dumps({'type': 'waiting_approval', 'next_node': next_node[0], 'thread_id': thread_id, 'search_queries': result.get('search_queries')})}\n\n"
             else:
                  brands = [b.model_dump(by_alias=True) if hasattr(b, 'model_dump') else b for b in result.get('verified_brands', [])]
-                 yield f"data: {json.dumps({'type': 'complete', 'verifiedBrands': brands})}\n\n"
+                 timings = merge_summaries(result.get("trace_summary") or [], result.get("search_id"))
+                 yield f"data: {json.dumps({'type': 'complete', 'verifiedBrands': brands, 'timings': timings})}\n\n"
     except Exception as e:
         import traceback
         traceback.print_exc()